@@ -8,12 +8,21 @@ from app.config import config
 db = SQLAlchemy()
 
 
-def create_app(config_name='default'):
-    """Create and configure Flask application."""
+def create_app(config_name='default', overrides=None):
+    """
+    Create and configure Flask application.
+    
+    Args:
+        config_name: Key of the configuration class in app.config.config
+        overrides: Settings applied on top of that class, e.g. another
+                   SQLALCHEMY_DATABASE_URI
+    """
     app = Flask(__name__)
     
     # Load configuration
     app.config.from_object(config[config_name])
+    if overrides:
+        app.config.update(overrides)
     
     # Initialize extensions
     db.init_app(app)
@@ -39,15 +48,40 @@ def create_app(config_name='default'):
     # Additional blueprints will be added in later tasks
     # Analytics blueprint is now registered above
     
-    # Create database tables
+    # Register maintenance CLI commands
+    from app.cli import register_commands
+    register_commands(app)
+    
+    # Create or upgrade database tables
     with app.app_context():
-        from app.database import init_database
-        init_database()
+        # Tune SQLite connections before the first one is opened
+        if app.config.get('SQLITE_PROFILE_ENABLED'):
+            from app.sqlite_profile import configure_sqlite_engine
+            configure_sqlite_engine(db.engine, app.config.get('SQLITE_PRAGMAS') or {})
+        
+        # Only reads the schema_meta markers once the database is initialized,
+        # and loads in-memory databases from a snapshot where configured
+        from app.database import start_database
+        start_database(app.config)
     
     @app.route('/api/health')
     def health_check():
-        """Health check endpoint."""
-        return {'status': 'healthy', 'message': 'ONC REALTY PARTNERS Booking System is running'}
+        """
+        Health check endpoint, reporting the effective database settings and
+        which optional dependencies the worker has loaded so far.
+        """
+        from app.sqlite_profile import read_pragmas
+        from app.optional_imports import import_status
+        
+        with db.engine.connect() as connection:
+            database = {'dialect': connection.dialect.name, 'pragmas': read_pragmas(connection)}
+        
+        return {
+            'status': 'healthy',
+            'message': 'ONC REALTY PARTNERS Booking System is running',
+            'database': database,
+            'optional_dependencies': import_status()
+        }
     
     @app.route('/')
     def index():
@@ -0,0 +1,133 @@
+"""Versioned LRU cache for analytics results.
+
+Results are keyed by the analytics method and its normalized arguments and
+are tagged with the bookings generation they were computed at. Every committed
+booking write bumps that generation, so a cached result is only served while
+no booking has changed since it was computed (and its TTL has not expired).
+"""
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+from flask import current_app
+from app.shared_state import get_generation_counter
+
+# Generation counter bumped after every committed booking write
+BOOKINGS_GENERATION = 'bookings'
+
+# Generation counter bumped before bookings are archived; while it is still 0
+# analytics skip the archive tables altogether
+ARCHIVE_GENERATION = 'archive'
+
+
+class AnalyticsCache:
+    """Bounded LRU cache with TTL and generation-based invalidation."""
+    
+    def __init__(self, max_size=256, ttl=300):
+        """Create a cache holding at most max_size entries for ttl seconds."""
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key, generation):
+        """Return (True, value) for a fresh entry, otherwise (False, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_generation, expires_at, value = entry
+                if entry_generation == generation and expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+    
+    def set(self, key, generation, value):
+        """Store a value computed at the given generation."""
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        """Return cache size and hit/miss counters."""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+def get_analytics_cache():
+    """Return the analytics cache of the current application."""
+    app = current_app._get_current_object()
+    cache = app.extensions.get('analytics_cache')
+    if cache is None:
+        cache = app.extensions.setdefault('analytics_cache', AnalyticsCache(
+            max_size=app.config.get('ANALYTICS_CACHE_SIZE', 256),
+            ttl=app.config.get('ANALYTICS_CACHE_TTL', 300)
+        ))
+    return cache
+
+
+def _normalize(value):
+    """Turn an argument value into a hashable, order-independent cache key part."""
+    if isinstance(value, dict):
+        return tuple(sorted(
+            (key, _normalize(item)) for key, item in value.items()
+            if item is not None and item != '' and item != []
+        ))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted(_normalize(item) for item in value))
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def cached_analytics(method):
+    """
+    Cache the result of an AnalyticsService method.
+    
+    Cached results are shared between callers and must be treated as read-only.
+    """
+    signature = inspect.signature(method)
+    
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        if not current_app.config.get('ANALYTICS_CACHE_ENABLED', True):
+            return method(*args, **kwargs)
+        
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = (method.__name__,) + tuple(
+            (name, _normalize(value)) for name, value in bound.arguments.items()
+        )
+        
+        cache = get_analytics_cache()
+        generation = get_generation_counter(BOOKINGS_GENERATION).current()
+        found, value = cache.get(key, generation)
+        if found:
+            return value
+        
+        value = method(*args, **kwargs)
+        cache.set(key, generation, value)
+        return value
+    
+    return wrapper
@@ -1,15 +1,34 @@
 """Analytics data processing service for booking system."""
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
-from sqlalchemy import func, extract, and_, or_
+from typing import Dict, List, Any, Optional, Tuple, Callable, Iterable
+from sqlalchemy import func, extract, and_, or_, case, cast, Integer
 from app import db
 from app.models.booking import Booking
+from app.models.booking_archive import BookingArchive
+from app.models.booking_rollup import BookingArchiveRollup
+from app.analytics.rollup_service import RollupService
+from app.analytics.analytics_cache import cached_analytics, ARCHIVE_GENERATION
+from app.analytics.columnar_engine import get_columnar_engine
+from app.shared_state import get_generation_counter
+
+
+# Measures aggregated for every group of bookings. Averages and ratios are
+# derived from these sums in Python so that every grouping (and every caller
+# sharing the same aggregated rows) produces identical numbers.
+MEASURES = ('booking_count', 'total_revenue', 'total_tax', 'total_area', 'non_cancelled_count')
+
+STATUS_LABELS = {
+    'active': 'Active',
+    'complete': 'Complete',
+    'cancelled': 'Cancelled'
+}
 
 
 class AnalyticsService:
     """Service class for processing booking data into analytics insights."""
     
     @staticmethod
+    @cached_analytics
     def get_kpi_summary(start_date: Optional[datetime] = None, 
                        end_date: Optional[datetime] = None,
                        filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -24,62 +43,39 @@ class AnalyticsService:
         Returns:
             Dictionary containing KPI metrics
         """
-        # Build base query
-        query = Booking.query
-        
-        # Apply date filters
-        if start_date:
-            query = query.filter(Booking.created_at >= start_date)
-        if end_date:
-            query = query.filter(Booking.created_at <= end_date)
-        
-        # Apply additional filters
-        if filters:
-            query = AnalyticsService._apply_filters(query, filters)
-        
-        # Calculate basic counts
-        total_bookings = query.count()
-        active_bookings = query.filter(Booking.status == 'active').count()
-        completed_bookings = query.filter(Booking.status == 'complete').count()
-        cancelled_bookings = query.filter(Booking.status == 'cancelled').count()
-        
-        # Calculate revenue metrics
-        revenue_query = query.filter(Booking.status.in_(['active', 'complete']))
-        total_revenue = db.session.query(func.sum(Booking.amount)).filter(
-            Booking.id.in_(revenue_query.with_entities(Booking.id))
-        ).scalar() or 0
-        
-        total_tax = db.session.query(func.sum(Booking.tax_gst)).filter(
-            Booking.id.in_(revenue_query.with_entities(Booking.id))
-        ).scalar() or 0
-        
-        # Calculate average metrics
-        avg_booking_value = (total_revenue / total_bookings) if total_bookings > 0 else 0
-        completion_rate = (completed_bookings / total_bookings * 100) if total_bookings > 0 else 0
-        
-        # Calculate area metrics
-        total_area = db.session.query(func.sum(Booking.area)).filter(
-            Booking.id.in_(query.with_entities(Booking.id))
-        ).scalar() or 0
-        
-        avg_area = (total_area / total_bookings) if total_bookings > 0 else 0
-        
-        return {
-            'total_bookings': total_bookings,
-            'active_bookings': active_bookings,
-            'completed_bookings': completed_bookings,
-            'cancelled_bookings': cancelled_bookings,
-            'total_revenue': float(total_revenue),
-            'total_tax': float(total_tax),
-            'total_revenue_with_tax': float(total_revenue + total_tax),
-            'avg_booking_value': float(avg_booking_value),
-            'completion_rate': float(completion_rate),
-            'total_area': float(total_area),
-            'avg_area': float(avg_area),
-            'cancellation_rate': (cancelled_bookings / total_bookings * 100) if total_bookings > 0 else 0
-        }
+        if get_columnar_engine() is not None or AnalyticsService._archive_in_use():
+            return AnalyticsService._kpis_from_status_groups(AnalyticsService._group_measures(
+                AnalyticsService._grouped(['status'], start_date, end_date, filters), lambda row: row['status']
+            ))
+        
+        # All KPIs come from one scan of the filtered set using conditional
+        # aggregates, instead of one query per metric.
+        revenue_statuses = ['active', 'complete']
+        query = db.session.query(
+            func.count(Booking.id).label('total_bookings'),
+            func.sum(case((Booking.status == 'active', 1), else_=0)).label('active_bookings'),
+            func.sum(case((Booking.status == 'complete', 1), else_=0)).label('completed_bookings'),
+            func.sum(case((Booking.status == 'cancelled', 1), else_=0)).label('cancelled_bookings'),
+            func.sum(case((Booking.status.in_(revenue_statuses), Booking.amount), else_=0)).label('total_revenue'),
+            func.sum(case((Booking.status.in_(revenue_statuses), Booking.tax_gst), else_=0)).label('total_tax'),
+            func.sum(Booking.area).label('total_area')
+        )
+        query = AnalyticsService._filter_query(query, start_date, end_date, filters)
+        
+        result = query.one()
+        
+        return AnalyticsService._build_kpis(
+            total_bookings=result.total_bookings or 0,
+            active_bookings=int(result.active_bookings or 0),
+            completed_bookings=int(result.completed_bookings or 0),
+            cancelled_bookings=int(result.cancelled_bookings or 0),
+            total_revenue=result.total_revenue or 0,
+            total_tax=result.total_tax or 0,
+            total_area=result.total_area or 0
+        )
     
     @staticmethod
+    @cached_analytics
     def get_monthly_trends(start_date: Optional[datetime] = None,
                           end_date: Optional[datetime] = None,
                           filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
@@ -94,60 +90,16 @@ class AnalyticsService:
         Returns:
             List of monthly trend data points
         """
-        # Default to last 12 months if no dates provided
-        if not end_date:
-            end_date = datetime.utcnow()
-        if not start_date:
-            start_date = end_date - timedelta(days=365)
-        
-        # Build query
-        query = Booking.query.filter(
-            and_(
-                Booking.created_at >= start_date,
-                Booking.created_at <= end_date
-            )
-        )
+        start_date, end_date = AnalyticsService._trend_window(start_date, end_date)
         
-        # Apply additional filters
-        if filters:
-            query = AnalyticsService._apply_filters(query, filters)
-        
-        # Group by year and month
-        monthly_data = db.session.query(
-            extract('year', Booking.created_at).label('year'),
-            extract('month', Booking.created_at).label('month'),
-            func.count(Booking.id).label('booking_count'),
-            func.sum(Booking.amount).label('total_revenue'),
-            func.sum(Booking.area).label('total_area'),
-            func.count(func.nullif(Booking.status, 'cancelled')).label('non_cancelled_count')
-        ).filter(
-            Booking.id.in_(query.with_entities(Booking.id))
-        ).group_by(
-            extract('year', Booking.created_at),
-            extract('month', Booking.created_at)
-        ).order_by(
-            extract('year', Booking.created_at),
-            extract('month', Booking.created_at)
-        ).all()
-        
-        # Format results
-        trends = []
-        for data in monthly_data:
-            month_str = f"{int(data.year)}-{int(data.month):02d}"
-            trends.append({
-                'period': month_str,
-                'year': int(data.year),
-                'month': int(data.month),
-                'booking_count': data.booking_count,
-                'total_revenue': float(data.total_revenue or 0),
-                'total_area': float(data.total_area or 0),
-                'avg_booking_value': float((data.total_revenue or 0) / data.booking_count) if data.booking_count > 0 else 0,
-                'non_cancelled_count': data.non_cancelled_count
-            })
+        rows = AnalyticsService._monthly_measures(start_date, end_date, filters)
         
-        return trends
+        return AnalyticsService._format_monthly_trends(
+            AnalyticsService._group_measures(rows, lambda row: (int(row['year']), int(row['month'])))
+        )
     
     @staticmethod
+    @cached_analytics
     def get_project_distribution(start_date: Optional[datetime] = None,
                                end_date: Optional[datetime] = None,
                                filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
@@ -162,51 +114,14 @@ class AnalyticsService:
         Returns:
             List of project distribution data
         """
-        # Build query
-        query = Booking.query
-        
-        # Apply date filters
-        if start_date:
-            query = query.filter(Booking.created_at >= start_date)
-        if end_date:
-            query = query.filter(Booking.created_at <= end_date)
+        rows = AnalyticsService._grouped(['project_name'], start_date, end_date, filters)
         
-        # Apply additional filters
-        if filters:
-            query = AnalyticsService._apply_filters(query, filters)
-        
-        # Group by project
-        project_data = db.session.query(
-            Booking.project_name,
-            func.count(Booking.id).label('booking_count'),
-            func.sum(Booking.amount).label('total_revenue'),
-            func.sum(Booking.area).label('total_area'),
-            func.avg(Booking.amount).label('avg_revenue'),
-            func.count(func.nullif(Booking.status, 'cancelled')).label('active_complete_count')
-        ).filter(
-            Booking.id.in_(query.with_entities(Booking.id))
-        ).group_by(
-            Booking.project_name
-        ).order_by(
-            func.count(Booking.id).desc()
-        ).all()
-        
-        # Format results
-        distribution = []
-        for data in project_data:
-            distribution.append({
-                'project_name': data.project_name,
-                'booking_count': data.booking_count,
-                'total_revenue': float(data.total_revenue or 0),
-                'total_area': float(data.total_area or 0),
-                'avg_revenue': float(data.avg_revenue or 0),
-                'active_complete_count': data.active_complete_count,
-                'success_rate': (data.active_complete_count / data.booking_count * 100) if data.booking_count > 0 else 0
-            })
-        
-        return distribution
+        return AnalyticsService._format_project_distribution(
+            AnalyticsService._group_measures(rows, lambda row: row['project_name'])
+        )
     
     @staticmethod
+    @cached_analytics
     def get_status_distribution(start_date: Optional[datetime] = None,
                               end_date: Optional[datetime] = None,
                               filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
@@ -221,54 +136,18 @@ class AnalyticsService:
         Returns:
             List of status distribution data
         """
-        # Build query
-        query = Booking.query
-        
-        # Apply date filters
-        if start_date:
-            query = query.filter(Booking.created_at >= start_date)
-        if end_date:
-            query = query.filter(Booking.created_at <= end_date)
-        
         # Apply additional filters (excluding status filter to show all statuses)
-        if filters:
-            status_filters = {k: v for k, v in filters.items() if k != 'status'}
-            query = AnalyticsService._apply_filters(query, status_filters)
-        
-        # Group by status
-        status_data = db.session.query(
-            Booking.status,
-            func.count(Booking.id).label('booking_count'),
-            func.sum(Booking.amount).label('total_revenue'),
-            func.avg(Booking.amount).label('avg_revenue')
-        ).filter(
-            Booking.id.in_(query.with_entities(Booking.id))
-        ).group_by(
-            Booking.status
-        ).order_by(
-            func.count(Booking.id).desc()
-        ).all()
-        
-        # Format results
-        distribution = []
-        status_labels = {
-            'active': 'Active',
-            'complete': 'Complete', 
-            'cancelled': 'Cancelled'
-        }
-        
-        for data in status_data:
-            distribution.append({
-                'status': data.status,
-                'status_label': status_labels.get(data.status, data.status.title()),
-                'booking_count': data.booking_count,
-                'total_revenue': float(data.total_revenue or 0),
-                'avg_revenue': float(data.avg_revenue or 0)
-            })
+        rows = AnalyticsService._grouped(
+            ['status'], start_date, end_date,
+            AnalyticsService._without_status(filters)
+        )
         
-        return distribution
+        return AnalyticsService._format_status_distribution(
+            AnalyticsService._group_measures(rows, lambda row: row['status'])
+        )
     
     @staticmethod
+    @cached_analytics
     def get_property_type_analysis(start_date: Optional[datetime] = None,
                                  end_date: Optional[datetime] = None,
                                  filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
@@ -283,51 +162,14 @@ class AnalyticsService:
         Returns:
             List of property type analysis data
         """
-        # Build query
-        query = Booking.query
+        rows = AnalyticsService._grouped(['type'], start_date, end_date, filters)
         
-        # Apply date filters
-        if start_date:
-            query = query.filter(Booking.created_at >= start_date)
-        if end_date:
-            query = query.filter(Booking.created_at <= end_date)
-        
-        # Apply additional filters
-        if filters:
-            query = AnalyticsService._apply_filters(query, filters)
-        
-        # Group by property type
-        type_data = db.session.query(
-            Booking.type,
-            func.count(Booking.id).label('booking_count'),
-            func.sum(Booking.amount).label('total_revenue'),
-            func.sum(Booking.area).label('total_area'),
-            func.avg(Booking.amount).label('avg_revenue'),
-            func.avg(Booking.area).label('avg_area')
-        ).filter(
-            Booking.id.in_(query.with_entities(Booking.id))
-        ).group_by(
-            Booking.type
-        ).order_by(
-            func.count(Booking.id).desc()
-        ).all()
-        
-        # Format results
-        analysis = []
-        for data in type_data:
-            analysis.append({
-                'property_type': data.type,
-                'booking_count': data.booking_count,
-                'total_revenue': float(data.total_revenue or 0),
-                'total_area': float(data.total_area or 0),
-                'avg_revenue': float(data.avg_revenue or 0),
-                'avg_area': float(data.avg_area or 0),
-                'revenue_per_sqft': float(data.total_revenue or 0) / float(data.total_area or 1) if data.total_area else 0
-            })
-        
-        return analysis
+        return AnalyticsService._format_property_types(
+            AnalyticsService._group_measures(rows, lambda row: row['type'])
+        )
     
     @staticmethod
+    @cached_analytics
     def get_revenue_trends(start_date: Optional[datetime] = None,
                           end_date: Optional[datetime] = None,
                           filters: Optional[Dict[str, Any]] = None,
@@ -344,82 +186,122 @@ class AnalyticsService:
         Returns:
             List of revenue trend data points
         """
-        # Default to last 12 months if no dates provided
-        if not end_date:
-            end_date = datetime.utcnow()
-        if not start_date:
-            start_date = end_date - timedelta(days=365)
+        start_date, end_date = AnalyticsService._trend_window(start_date, end_date)
+        
+        # Quarters and years are rolled up from monthly groups in Python
+        rows = AnalyticsService._monthly_measures(start_date, end_date, filters)
+        
+        return AnalyticsService._format_revenue_trends(
+            AnalyticsService._group_measures(rows, lambda row: (int(row['year']), int(row['month']))),
+            group_by
+        )
+    
+    @staticmethod
+    @cached_analytics
+    def get_dashboard_data(start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None,
+                          filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Get KPIs and every dashboard chart from a single scan of the bookings.
+        
+        The filtered booking set is built once as a CTE and grouped into
+        (year, month, project, type, status) cells. KPIs, trends and all
+        breakdowns are then reduced from those cells, so the dashboard costs
+        one round trip regardless of how many charts it shows.
+        
+        Args:
+            start_date: Filter bookings from this date
+            end_date: Filter bookings until this date
+            filters: Additional filters
+            
+        Returns:
+            Dictionary with 'kpis' and 'charts' keys
+        """
+        trend_start, trend_end = AnalyticsService._trend_window(start_date, end_date)
         
-        # Build query
-        query = Booking.query.filter(
-            and_(
-                Booking.created_at >= start_date,
-                Booking.created_at <= end_date
+        dimensions = ['year', 'month', 'project_name', 'type', 'status']
+        engine = get_columnar_engine()
+        archived = AnalyticsService._archived(
+            dimensions, start_date, end_date, AnalyticsService._without_status(filters),
+            trend_window=(trend_start, trend_end)
+        )
+        
+        if engine is not None:
+            cells = engine.aggregate(
+                dimensions, start_date, end_date, AnalyticsService._without_status(filters),
+                trend_window=(trend_start, trend_end)
             )
+            return AnalyticsService._dashboard_from_cells(cells + archived, filters)
+        
+        # The status filter is applied to the cells in Python because the
+        # status distribution chart must ignore it.
+        in_trend_window = case(
+            (and_(Booking.created_at >= trend_start, Booking.created_at <= trend_end), 1),
+            else_=0
         )
+        filtered = AnalyticsService._filter_query(
+            db.session.query(
+                Booking.created_at,
+                Booking.project_name,
+                Booking.type,
+                Booking.status,
+                Booking.amount,
+                Booking.tax_gst,
+                Booking.area,
+                in_trend_window.label('in_trend_window')
+            ),
+            start_date, end_date, AnalyticsService._without_status(filters)
+        ).cte('filtered_bookings')
+        
+        group_columns = AnalyticsService._month_columns(filtered.c) + [
+            filtered.c.project_name,
+            filtered.c.type,
+            filtered.c.status,
+            filtered.c.in_trend_window
+        ]
+        cells = [
+            row._asdict() for row in db.session.query(
+                *group_columns, *AnalyticsService._measure_columns(filtered.c)
+            ).group_by(*group_columns).all()
+        ]
+        
+        return AnalyticsService._dashboard_from_cells(cells + archived, filters)
+    
+    @staticmethod
+    @cached_analytics
+    def get_filter_options() -> Dict[str, Any]:
+        """
+        Get the values available for each analytics filter, with booking counts.
         
-        # Apply additional filters
-        if filters:
-            query = AnalyticsService._apply_filters(query, filters)
+        The values and counts come from the monthly rollup, which booking
+        writes keep up to date, so no scan of the bookings table is needed.
         
-        # Determine grouping based on group_by parameter
-        if group_by == 'year':
-            group_fields = [extract('year', Booking.created_at).label('year')]
-            order_fields = [extract('year', Booking.created_at)]
-        elif group_by == 'quarter':
-            group_fields = [
-                extract('year', Booking.created_at).label('year'),
-                func.ceil(extract('month', Booking.created_at) / 3).label('quarter')
-            ]
-            order_fields = [
-                extract('year', Booking.created_at),
-                func.ceil(extract('month', Booking.created_at) / 3)
-            ]
-        else:  # default to month
-            group_fields = [
-                extract('year', Booking.created_at).label('year'),
-                extract('month', Booking.created_at).label('month')
-            ]
-            order_fields = [
-                extract('year', Booking.created_at),
-                extract('month', Booking.created_at)
-            ]
+        Returns:
+            Dictionary with sorted 'projects', 'property_types' and 'statuses'
+            lists and a 'counts' mapping of each option to its booking count
+        """
+        rows = RollupService.dimension_counts()
+        if AnalyticsService._archive_in_use():
+            rows += RollupService.dimension_counts(BookingArchiveRollup)
         
-        # Execute query
-        revenue_data = db.session.query(
-            *group_fields,
-            func.sum(Booking.amount).label('total_revenue'),
-            func.sum(Booking.tax_gst).label('total_tax'),
-            func.count(Booking.id).label('booking_count'),
-            func.avg(Booking.amount).label('avg_revenue')
-        ).filter(
-            Booking.id.in_(query.with_entities(Booking.id))
-        ).group_by(
-            *group_fields
-        ).order_by(
-            *order_fields
-        ).all()
-        
-        # Format results
-        trends = []
-        for data in revenue_data:
-            if group_by == 'year':
-                period = str(int(data.year))
-            elif group_by == 'quarter':
-                period = f"{int(data.year)}-Q{int(data.quarter)}"
-            else:  # month
-                period = f"{int(data.year)}-{int(data.month):02d}"
-            
-            trends.append({
-                'period': period,
-                'total_revenue': float(data.total_revenue or 0),
-                'total_tax': float(data.total_tax or 0),
-                'total_with_tax': float((data.total_revenue or 0) + (data.total_tax or 0)),
-                'booking_count': data.booking_count,
-                'avg_revenue': float(data.avg_revenue or 0)
-            })
+        counts = {'projects': {}, 'property_types': {}, 'statuses': {}}
+        for row in rows:
+            for facet, value in (('projects', row['project_name']),
+                                 ('property_types', row['type']),
+                                 ('statuses', row['status'])):
+                counts[facet][value] = counts[facet].get(value, 0) + int(row['booking_count'])
         
-        return trends
+        for status in STATUS_LABELS:
+            counts['statuses'].setdefault(status, 0)
+        
+        return {
+            'projects': sorted(counts['projects']),
+            'property_types': sorted(counts['property_types']),
+            'statuses': list(STATUS_LABELS),
+            'counts': {
+                facet: dict(sorted(values.items())) for facet, values in counts.items()
+            }
+        }
     
     @staticmethod
     def get_chart_data(chart_type: str, 
@@ -441,6 +323,23 @@ class AnalyticsService:
         """
         if chart_type == 'monthly_trends':
             data = AnalyticsService.get_monthly_trends(start_date, end_date, filters)
+        elif chart_type == 'project_distribution':
+            data = AnalyticsService.get_project_distribution(start_date, end_date, filters)
+        elif chart_type == 'property_types':
+            data = AnalyticsService.get_property_type_analysis(start_date, end_date, filters)
+        elif chart_type == 'status_distribution':
+            data = AnalyticsService.get_status_distribution(start_date, end_date, filters)
+        elif chart_type == 'revenue_trends':
+            data = AnalyticsService.get_revenue_trends(start_date, end_date, filters)
+        else:
+            raise ValueError(f"Unsupported chart type: {chart_type}")
+        
+        return AnalyticsService._format_chart(chart_type, data)
+    
+    @staticmethod
+    def _format_chart(chart_type: str, data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Shape analytics data into chart labels and datasets."""
+        if chart_type == 'monthly_trends':
             return {
                 'labels': [item['period'] for item in data],
                 'datasets': [
@@ -458,7 +357,6 @@ class AnalyticsService:
             }
         
         elif chart_type == 'project_distribution':
-            data = AnalyticsService.get_project_distribution(start_date, end_date, filters)
             return {
                 'labels': [item['project_name'] for item in data],
                 'datasets': [
@@ -471,7 +369,6 @@ class AnalyticsService:
             }
         
         elif chart_type == 'property_types':
-            data = AnalyticsService.get_property_type_analysis(start_date, end_date, filters)
             return {
                 'labels': [item['property_type'] for item in data],
                 'datasets': [
@@ -484,7 +381,6 @@ class AnalyticsService:
             }
         
         elif chart_type == 'status_distribution':
-            data = AnalyticsService.get_status_distribution(start_date, end_date, filters)
             return {
                 'labels': [item['status_label'] for item in data],
                 'datasets': [
@@ -502,7 +398,6 @@ class AnalyticsService:
             }
         
         elif chart_type == 'revenue_trends':
-            data = AnalyticsService.get_revenue_trends(start_date, end_date, filters)
             return {
                 'labels': [item['period'] for item in data],
                 'datasets': [
@@ -523,43 +418,484 @@ class AnalyticsService:
             raise ValueError(f"Unsupported chart type: {chart_type}")
     
     @staticmethod
-    def _apply_filters(query, filters: Dict[str, Any]):
+    def _dashboard_from_cells(cells: List[Dict[str, Any]],
+                              filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Reduce (year, month, project, type, status) cells into dashboard data.
+        
+        Args:
+            cells: Aggregated measure rows carrying an 'in_trend_window' flag
+            filters: Filters used to build the cells; only 'status' is applied here
+            
+        Returns:
+            Dictionary with 'kpis' and 'charts' keys
+        """
+        statuses = AnalyticsService._status_filter(filters)
+        filtered_cells = [cell for cell in cells if not statuses or cell['status'] in statuses]
+        trend_cells = [cell for cell in filtered_cells if cell['in_trend_window']]
+        
+        by_status = AnalyticsService._group_measures(filtered_cells, lambda cell: cell['status'])
+        by_month = AnalyticsService._group_measures(trend_cells, lambda cell: (int(cell['year']), int(cell['month'])))
+        
+        return {
+            'kpis': AnalyticsService._kpis_from_status_groups(by_status),
+            'charts': {
+                'monthly_trends': AnalyticsService._format_chart(
+                    'monthly_trends', AnalyticsService._format_monthly_trends(by_month)
+                ),
+                'project_distribution': AnalyticsService._format_chart(
+                    'project_distribution',
+                    AnalyticsService._format_project_distribution(
+                        AnalyticsService._group_measures(filtered_cells, lambda cell: cell['project_name'])
+                    )
+                ),
+                'property_types': AnalyticsService._format_chart(
+                    'property_types',
+                    AnalyticsService._format_property_types(
+                        AnalyticsService._group_measures(filtered_cells, lambda cell: cell['type'])
+                    )
+                ),
+                'status_distribution': AnalyticsService._format_chart(
+                    'status_distribution',
+                    AnalyticsService._format_status_distribution(
+                        AnalyticsService._group_measures(cells, lambda cell: cell['status'])
+                    )
+                ),
+                'revenue_trends': AnalyticsService._format_chart(
+                    'revenue_trends', AnalyticsService._format_revenue_trends(by_month, 'month')
+                )
+            }
+        }
+    
+    @staticmethod
+    def _filter_query(query, start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None,
+                      filters: Optional[Dict[str, Any]] = None,
+                      source=Booking):
+        """Apply the date range and additional filters to a query over source."""
+        if start_date:
+            query = query.filter(source.created_at >= start_date)
+        if end_date:
+            query = query.filter(source.created_at <= end_date)
+        if filters:
+            query = AnalyticsService._apply_filters(query, filters, source)
+        return query
+    
+    @staticmethod
+    def _trend_window(start_date: Optional[datetime],
+                      end_date: Optional[datetime]) -> Tuple[datetime, datetime]:
+        """Resolve the trend date range, defaulting to the last 12 months."""
+        if not end_date:
+            end_date = datetime.utcnow()
+        if not start_date:
+            start_date = end_date - timedelta(days=365)
+        return start_date, end_date
+    
+    @staticmethod
+    def _without_status(filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Return a copy of the filters without the status filter."""
+        return {k: v for k, v in (filters or {}).items() if k != 'status'}
+    
+    @staticmethod
+    def _status_filter(filters: Optional[Dict[str, Any]]) -> Optional[set]:
+        """Return the set of statuses selected by the filters, if any."""
+        statuses = (filters or {}).get('status')
+        if not statuses:
+            return None
+        return set(statuses) if isinstance(statuses, list) else {statuses}
+    
+    @staticmethod
+    def _month_columns(source) -> list:
+        """Year and month grouping columns for a booking-shaped column source."""
+        # EXTRACT yields a numeric on PostgreSQL; cast so every backend returns ints
+        return [
+            cast(extract('year', source.created_at), Integer).label('year'),
+            cast(extract('month', source.created_at), Integer).label('month')
+        ]
+    
+    @staticmethod
+    def _measure_columns(source) -> list:
+        """Aggregate columns for MEASURES over a booking-shaped column source."""
+        return [
+            func.count().label('booking_count'),
+            func.sum(source.amount).label('total_revenue'),
+            func.sum(source.tax_gst).label('total_tax'),
+            func.sum(source.area).label('total_area'),
+            func.count(func.nullif(source.status, 'cancelled')).label('non_cancelled_count')
+        ]
+    
+    @staticmethod
+    def _aggregate(group_columns: list,
+                   start_date: Optional[datetime] = None,
+                   end_date: Optional[datetime] = None,
+                   filters: Optional[Dict[str, Any]] = None,
+                   *criteria,
+                   source=Booking) -> List[Dict[str, Any]]:
+        """
+        Group the filtered bookings and aggregate MEASURES in a single query.
+        
+        Args:
+            group_columns: Columns to group by
+            start_date: Filter bookings from this date
+            end_date: Filter bookings until this date
+            filters: Additional filters
+            criteria: Extra SQL criteria applied to the bookings
+            source: Booking-shaped model to aggregate (Booking or BookingArchive)
+            
+        Returns:
+            List of dictionaries keyed by group column labels and measure names
+        """
+        query = db.session.query(
+            *group_columns, *AnalyticsService._measure_columns(source)
+        ).filter(*criteria)
+        query = AnalyticsService._filter_query(query, start_date, end_date, filters, source)
+        
+        return [row._asdict() for row in query.group_by(*group_columns).all()]
+    
+    @staticmethod
+    def _grouped(dimensions: List[str],
+                 start_date: Optional[datetime] = None,
+                 end_date: Optional[datetime] = None,
+                 filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Group the filtered bookings by booking columns and aggregate MEASURES.
+        
+        Uses the columnar engine when it is enabled, otherwise one SQL query;
+        archived bookings are added from the archive rollup.
+        
+        Args:
+            dimensions: Names of the booking columns to group by
+            start_date: Filter bookings from this date
+            end_date: Filter bookings until this date
+            filters: Additional filters
+            
+        Returns:
+            List of dictionaries keyed by column and measure names
+        """
+        engine = get_columnar_engine()
+        archived = AnalyticsService._archived(dimensions, start_date, end_date, filters)
+        if engine is not None:
+            return engine.aggregate(dimensions, start_date, end_date, filters) + archived
+        
+        return AnalyticsService._aggregate(
+            [getattr(Booking, name) for name in dimensions], start_date, end_date, filters
+        ) + archived
+    
+    @staticmethod
+    def _monthly_measures(start_date: datetime, end_date: datetime,
+                          filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Aggregate MEASURES by (year, month) for a date range.
+        
+        Whole calendar months are read from the monthly rollup table when the
+        filters allow it; only the partial months at either end of the range
+        are aggregated from raw bookings. The columnar engine, when enabled,
+        answers the whole range directly. Archived bookings are added from the
+        archive rollup.
+        
+        Args:
+            start_date: Start of the range (inclusive)
+            end_date: End of the range (inclusive)
+            filters: Additional filters
+            
+        Returns:
+            List of dictionaries with year, month and measure values
+        """
+        engine = get_columnar_engine()
+        archived = AnalyticsService._archived(['year', 'month'], start_date, end_date, filters)
+        if engine is not None:
+            return engine.aggregate(['year', 'month'], start_date, end_date, filters) + archived
+        
+        month_columns = AnalyticsService._month_columns(Booking)
+        
+        if not RollupService.supports_filters(filters):
+            return AnalyticsService._aggregate(month_columns, start_date, end_date, filters) + archived
+        
+        first, stop = RollupService.full_month_span(start_date, end_date)
+        if first >= stop:
+            return AnalyticsService._aggregate(month_columns, start_date, end_date, filters) + archived
+        
+        rows = RollupService.monthly_rows(first, stop, filters) + archived
+        rows += AnalyticsService._aggregate(
+            month_columns, start_date, None, filters, Booking.created_at < first
+        )
+        rows += AnalyticsService._aggregate(month_columns, stop, end_date, filters)
+        
+        return rows
+    
+    @staticmethod
+    def _archive_in_use() -> bool:
+        """Check whether bookings may have been archived, without a query."""
+        return get_generation_counter(ARCHIVE_GENERATION).current() > 0
+    
+    @staticmethod
+    def _archived(dimensions: List[str],
+                  start_date: Optional[datetime] = None,
+                  end_date: Optional[datetime] = None,
+                  filters: Optional[Dict[str, Any]] = None,
+                  trend_window: Optional[Tuple[datetime, datetime]] = None) -> List[Dict[str, Any]]:
+        """
+        Aggregate MEASURES of archived bookings, to be added to the live rows.
+        
+        Whole months are read from the archive rollup when the filters allow
+        it. Only the partial months at either end of the range, and those a
+        trend window boundary falls in, are aggregated from bookings_archive.
+        
+        Args:
+            dimensions: Booking columns, or year and month, to group by
+            start_date: Filter bookings from this date
+            end_date: Filter bookings until this date
+            filters: Additional filters
+            trend_window: Optional (start, end) range; adds an
+                          'in_trend_window' flag dimension
+        
+        Returns:
+            List of dictionaries keyed by dimension and measure names; empty
+            if nothing was ever archived
+        """
+        if not AnalyticsService._archive_in_use():
+            return []
+        
+        A = BookingArchive
+        month_columns = {column.name: column for column in AnalyticsService._month_columns(A)}
+        group_columns = [
+            month_columns[name] if name in month_columns else getattr(A, name) for name in dimensions
+        ]
+        if trend_window is not None:
+            group_columns.append(case(
+                (and_(A.created_at >= trend_window[0], A.created_at <= trend_window[1]), 1), else_=0
+            ).label('in_trend_window'))
+        
+        # Open ends of the range extend to the earliest and latest representable months
+        first, stop = RollupService.full_month_span(start_date or datetime.min, end_date or datetime.max)
+        if not RollupService.supports_filters(filters) or first >= stop:
+            rows = AnalyticsService._aggregate(group_columns, start_date, end_date, filters, source=A)
+        else:
+            boundaries = [RollupService._as_naive_utc(value) for value in trend_window or ()]
+            split_months = {
+                datetime(value.year, value.month, 1) for value in boundaries
+                if first <= datetime(value.year, value.month, 1) < stop
+            }
+            
+            rows = RollupService.grouped_rows(
+                dimensions, first, stop, filters, BookingArchiveRollup, skip_months=split_months
+            )
+            if trend_window is not None:
+                trend_start, trend_end = boundaries
+                for row in rows:
+                    month_start = datetime(row['year'], row['month'], 1)
+                    row['in_trend_window'] = int(trend_start < month_start and
+                                                 RollupService._next_month(month_start) <= trend_end)
+            
+            outside = [A.created_at < first, A.created_at >= stop] + [
+                and_(A.created_at >= month, A.created_at < RollupService._next_month(month))
+                for month in split_months
+            ]
+            rows += AnalyticsService._aggregate(
+                group_columns, start_date, end_date, filters, or_(*outside), source=A
+            )
+        
+        return rows
+    
+    @staticmethod
+    def _group_measures(rows: Iterable[Dict[str, Any]],
+                        key_func: Callable[[Dict[str, Any]], Any]) -> Dict[Any, Dict[str, Any]]:
+        """Sum MEASURES of aggregated rows into groups keyed by key_func."""
+        groups = {}
+        for row in rows:
+            group = groups.setdefault(key_func(row), dict.fromkeys(MEASURES, 0))
+            for measure in MEASURES:
+                group[measure] += row[measure] or 0
+        return groups
+    
+    @staticmethod
+    def _by_count_desc(groups: Dict[Any, Dict[str, Any]]) -> List[Tuple[Any, Dict[str, Any]]]:
+        """Order groups by booking count (descending), then by key."""
+        return sorted(groups.items(), key=lambda item: (-item[1]['booking_count'], str(item[0])))
+    
+    @staticmethod
+    def _build_kpis(total_bookings: int, active_bookings: int, completed_bookings: int,
+                    cancelled_bookings: int, total_revenue, total_tax, total_area) -> Dict[str, Any]:
+        """Derive the KPI dictionary from the aggregated counts and sums."""
+        avg_booking_value = (total_revenue / total_bookings) if total_bookings > 0 else 0
+        completion_rate = (completed_bookings / total_bookings * 100) if total_bookings > 0 else 0
+        avg_area = (total_area / total_bookings) if total_bookings > 0 else 0
+        
+        return {
+            'total_bookings': total_bookings,
+            'active_bookings': active_bookings,
+            'completed_bookings': completed_bookings,
+            'cancelled_bookings': cancelled_bookings,
+            'total_revenue': float(total_revenue),
+            'total_tax': float(total_tax),
+            'total_revenue_with_tax': float(total_revenue + total_tax),
+            'avg_booking_value': float(avg_booking_value),
+            'completion_rate': float(completion_rate),
+            'total_area': float(total_area),
+            'avg_area': float(avg_area),
+            'cancellation_rate': (cancelled_bookings / total_bookings * 100) if total_bookings > 0 else 0
+        }
+    
+    @staticmethod
+    def _kpis_from_status_groups(by_status: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Derive the KPI dictionary from measures grouped by status."""
+        empty = dict.fromkeys(MEASURES, 0)
+        revenue_groups = [by_status.get('active', empty), by_status.get('complete', empty)]
+        
+        return AnalyticsService._build_kpis(
+            total_bookings=sum(group['booking_count'] for group in by_status.values()),
+            active_bookings=by_status.get('active', empty)['booking_count'],
+            completed_bookings=by_status.get('complete', empty)['booking_count'],
+            cancelled_bookings=by_status.get('cancelled', empty)['booking_count'],
+            total_revenue=sum(group['total_revenue'] for group in revenue_groups),
+            total_tax=sum(group['total_tax'] for group in revenue_groups),
+            total_area=sum(group['total_area'] for group in by_status.values())
+        )
+    
+    @staticmethod
+    def _format_monthly_trends(by_month: Dict[Tuple[int, int], Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Format measures grouped by (year, month) as monthly trend points."""
+        trends = []
+        for (year, month), data in sorted(by_month.items()):
+            trends.append({
+                'period': f"{year}-{month:02d}",
+                'year': year,
+                'month': month,
+                'booking_count': data['booking_count'],
+                'total_revenue': float(data['total_revenue']),
+                'total_area': float(data['total_area']),
+                'avg_booking_value': float(data['total_revenue'] / data['booking_count']) if data['booking_count'] > 0 else 0,
+                'non_cancelled_count': data['non_cancelled_count']
+            })
+        
+        return trends
+    
+    @staticmethod
+    def _format_project_distribution(by_project: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Format measures grouped by project as a distribution."""
+        distribution = []
+        for project_name, data in AnalyticsService._by_count_desc(by_project):
+            distribution.append({
+                'project_name': project_name,
+                'booking_count': data['booking_count'],
+                'total_revenue': float(data['total_revenue']),
+                'total_area': float(data['total_area']),
+                'avg_revenue': float(data['total_revenue'] / data['booking_count']) if data['booking_count'] > 0 else 0,
+                'active_complete_count': data['non_cancelled_count'],
+                'success_rate': (data['non_cancelled_count'] / data['booking_count'] * 100) if data['booking_count'] > 0 else 0
+            })
+        
+        return distribution
+    
+    @staticmethod
+    def _format_status_distribution(by_status: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Format measures grouped by status as a distribution."""
+        distribution = []
+        for status, data in AnalyticsService._by_count_desc(by_status):
+            distribution.append({
+                'status': status,
+                'status_label': STATUS_LABELS.get(status, status.title()),
+                'booking_count': data['booking_count'],
+                'total_revenue': float(data['total_revenue']),
+                'avg_revenue': float(data['total_revenue'] / data['booking_count']) if data['booking_count'] > 0 else 0
+            })
+        
+        return distribution
+    
+    @staticmethod
+    def _format_property_types(by_type: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Format measures grouped by property type as an analysis."""
+        analysis = []
+        for property_type, data in AnalyticsService._by_count_desc(by_type):
+            count = data['booking_count']
+            analysis.append({
+                'property_type': property_type,
+                'booking_count': count,
+                'total_revenue': float(data['total_revenue']),
+                'total_area': float(data['total_area']),
+                'avg_revenue': float(data['total_revenue'] / count) if count > 0 else 0,
+                'avg_area': float(data['total_area'] / count) if count > 0 else 0,
+                'revenue_per_sqft': float(data['total_revenue']) / float(data['total_area']) if data['total_area'] else 0
+            })
+        
+        return analysis
+    
+    @staticmethod
+    def _format_revenue_trends(by_month: Dict[Tuple[int, int], Dict[str, Any]],
+                               group_by: str = 'month') -> List[Dict[str, Any]]:
+        """Format measures grouped by (year, month) as revenue trend points."""
+        if group_by == 'year':
+            groups = AnalyticsService._group_measures(
+                ({**data, 'year': year} for (year, _), data in by_month.items()),
+                lambda row: (row['year'],)
+            )
+        elif group_by == 'quarter':
+            groups = AnalyticsService._group_measures(
+                ({**data, 'year': year, 'quarter': (month + 2) // 3} for (year, month), data in by_month.items()),
+                lambda row: (row['year'], row['quarter'])
+            )
+        else:  # default to month
+            groups = by_month
+        
+        trends = []
+        for key, data in sorted(groups.items()):
+            if group_by == 'year':
+                period = str(key[0])
+            elif group_by == 'quarter':
+                period = f"{key[0]}-Q{key[1]}"
+            else:  # month
+                period = f"{key[0]}-{key[1]:02d}"
+            
+            trends.append({
+                'period': period,
+                'total_revenue': float(data['total_revenue']),
+                'total_tax': float(data['total_tax']),
+                'total_with_tax': float(data['total_revenue'] + data['total_tax']),
+                'booking_count': data['booking_count'],
+                'avg_revenue': float(data['total_revenue'] / data['booking_count']) if data['booking_count'] > 0 else 0
+            })
+        
+        return trends
+    
+    @staticmethod
+    def _apply_filters(query, filters: Dict[str, Any], source=Booking):
         """
         Apply additional filters to a query.
         
         Args:
             query: SQLAlchemy query object
             filters: Dictionary of filter criteria
+            source: Booking-shaped model the query reads
             
         Returns:
             Modified query with filters applied
         """
         if 'status' in filters and filters['status']:
             if isinstance(filters['status'], list):
-                query = query.filter(Booking.status.in_(filters['status']))
+                query = query.filter(source.status.in_(filters['status']))
             else:
-                query = query.filter(Booking.status == filters['status'])
+                query = query.filter(source.status == filters['status'])
         
         if 'project_name' in filters and filters['project_name']:
-            query = query.filter(Booking.project_name.ilike(f"%{filters['project_name']}%"))
+            query = query.filter(source.project_name.ilike(f"%{filters['project_name']}%"))
         
         if 'property_type' in filters and filters['property_type']:
-            query = query.filter(Booking.type.ilike(f"%{filters['property_type']}%"))
+            query = query.filter(source.type.ilike(f"%{filters['property_type']}%"))
         
         if 'customer_name' in filters and filters['customer_name']:
-            query = query.filter(Booking.customer_name.ilike(f"%{filters['customer_name']}%"))
+            query = query.filter(source.customer_name.ilike(f"%{filters['customer_name']}%"))
         
         if 'min_amount' in filters and filters['min_amount'] is not None:
-            query = query.filter(Booking.amount >= filters['min_amount'])
+            query = query.filter(source.amount >= filters['min_amount'])
         
         if 'max_amount' in filters and filters['max_amount'] is not None:
-            query = query.filter(Booking.amount <= filters['max_amount'])
+            query = query.filter(source.amount <= filters['max_amount'])
         
         if 'min_area' in filters and filters['min_area'] is not None:
-            query = query.filter(Booking.area >= filters['min_area'])
+            query = query.filter(source.area >= filters['min_area'])
         
         if 'max_area' in filters and filters['max_area'] is not None:
-            query = query.filter(Booking.area <= filters['max_area'])
+            query = query.filter(source.area <= filters['max_area'])
         
         return query
     
@@ -0,0 +1,347 @@
+"""In-memory columnar analytics engine for bookings.
+
+Bookings are held as NumPy column arrays: numeric columns as float64/int64
+(money additionally as integer paise so sums are exact), created_at as
+datetime64 and the string dimensions as dictionary-encoded integer codes.
+Analytics filters become boolean masks and every grouping is computed with
+np.unique and np.bincount, producing the same measure rows as the SQL path
+so both share the AnalyticsService formatters.
+
+The engine is optional: it is used only when ANALYTICS_ENGINE is 'columnar'
+and NumPy is installed.
+"""
+import re
+import threading
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Any, Optional, Tuple
+from flask import current_app
+from sqlalchemy import Float, cast, select
+from app import db
+from app.models.booking import Booking
+from app.analytics.analytics_cache import BOOKINGS_GENERATION
+from app.shared_state import get_generation_counter
+
+# Import NumPy (optional dependency)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Dictionary-encoded string columns
+DICTIONARY_COLUMNS = ('project_name', 'type', 'status', 'customer_name')
+
+# Column name -> NumPy dtype
+COLUMN_TYPES = {
+    'id': 'int64',
+    'created_at': 'datetime64[us]',
+    'year': 'int64',
+    'month': 'int64',
+    'project_name': 'int64',
+    'type': 'int64',
+    'status': 'int64',
+    'customer_name': 'int64',
+    'amount': 'float64',
+    'amount_paise': 'int64',
+    'tax_paise': 'int64',
+    'area': 'float64'
+}
+
+# Dimensions that can be grouped on
+GROUP_DIMENSIONS = ('year', 'month', 'project_name', 'type', 'status')
+
+_ASCII_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+
+class _Dictionary:
+    """Bidirectional mapping between string values and integer codes."""
+    
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+    
+    def encode(self, value):
+        """Return the code for value, assigning a new one if needed."""
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+    
+    def like_table(self, term):
+        """Boolean lookup table of codes whose value matches ILIKE '%term%'."""
+        matcher = _like_matcher(f'%{term}%')
+        return np.array([matcher(value) for value in self.values] + [False], dtype=bool)
+
+
+def _like_matcher(pattern):
+    """Build a predicate mirroring SQL lower(value) LIKE lower(pattern)."""
+    regex = ''.join(
+        '.*' if char == '%' else '.' if char == '_' else re.escape(char)
+        for char in pattern.translate(_ASCII_LOWER)
+    )
+    compiled = re.compile(regex, re.DOTALL)
+    return lambda value: value is not None and compiled.fullmatch(value.translate(_ASCII_LOWER)) is not None
+
+
+def _naive(value: datetime):
+    """Drop tzinfo the same way SQLAlchemy binds datetimes for SQLite."""
+    return np.datetime64(value.replace(tzinfo=None), 'us')
+
+
+def _paise(value) -> int:
+    """Convert a money value to integer paise."""
+    return int(round(float(value or 0) * 100))
+
+
+class ColumnarBookingStore:
+    """Bookings stored column-wise in NumPy arrays."""
+    
+    def __init__(self):
+        """Create an empty store; call load() before querying."""
+        self.generation = None
+        self.size = 0
+        self._lock = threading.RLock()
+        self._row_of_id = {}
+        self._dictionaries = {name: _Dictionary() for name in DICTIONARY_COLUMNS}
+        self._columns = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMN_TYPES.items()}
+    
+    def load(self, generation: int):
+        """Replace the store contents with every booking in the database."""
+        rows = db.session.execute(select(
+            Booking.id,
+            Booking.created_at,
+            Booking.project_name,
+            Booking.type,
+            Booking.status,
+            Booking.customer_name,
+            cast(Booking.amount, Float).label('amount'),
+            cast(Booking.tax_gst, Float).label('tax_gst'),
+            Booking.area
+        )).all()
+        
+        with self._lock:
+            self._dictionaries = {name: _Dictionary() for name in DICTIONARY_COLUMNS}
+            self._columns = {name: np.empty(len(rows), dtype=dtype) for name, dtype in COLUMN_TYPES.items()}
+            self.size = 0
+            self._row_of_id = {}
+            
+            if rows:
+                columns = self._columns
+                columns['id'][:] = [row.id for row in rows]
+                columns['created_at'][:] = np.array([row.created_at for row in rows], dtype='datetime64[us]')
+                for name in DICTIONARY_COLUMNS:
+                    encode = self._dictionaries[name].encode
+                    columns[name][:] = [encode(getattr(row, name)) for row in rows]
+                columns['amount'][:] = [row.amount or 0 for row in rows]
+                columns['amount_paise'][:] = np.rint(columns['amount'] * 100)
+                columns['tax_paise'][:] = np.rint(np.array([row.tax_gst or 0 for row in rows], dtype='float64') * 100)
+                columns['area'][:] = [row.area or 0 for row in rows]
+                columns['year'][:] = columns['created_at'].astype('datetime64[Y]').astype('int64') + 1970
+                columns['month'][:] = columns['created_at'].astype('datetime64[M]').astype('int64') % 12 + 1
+                self.size = len(rows)
+                self._row_of_id = {booking_id: row for row, booking_id in enumerate(columns['id'].tolist())}
+            
+            self.generation = generation
+    
+    def apply(self, changes, generation: int):
+        """
+        Apply committed booking changes incrementally.
+        
+        If another process wrote in between (the generation skipped), the
+        store is marked stale instead and reloads on its next use.
+        
+        Args:
+            changes: (before, after) booking snapshots
+            generation: Bookings generation produced by this commit
+        """
+        with self._lock:
+            if self.generation is None or self.generation != generation - 1:
+                self.generation = None
+                return
+            
+            for before, after in changes:
+                if after is None:
+                    self._delete(before['id'])
+                else:
+                    self._upsert(after)
+            
+            self.generation = generation
+    
+    def aggregate(self, dims: List[str],
+                  start_date: Optional[datetime] = None,
+                  end_date: Optional[datetime] = None,
+                  filters: Optional[Dict[str, Any]] = None,
+                  trend_window: Optional[Tuple[datetime, datetime]] = None) -> List[Dict[str, Any]]:
+        """
+        Group the filtered bookings and aggregate the analytics measures.
+        
+        Args:
+            dims: Dimensions to group by (see GROUP_DIMENSIONS)
+            start_date: Filter bookings from this date
+            end_date: Filter bookings until this date
+            filters: Additional filters, as accepted by AnalyticsService
+            trend_window: Optional (start, end) range; adds an
+                          'in_trend_window' flag dimension
+        
+        Returns:
+            List of dictionaries keyed by dimension and measure names
+        """
+        with self._lock:
+            columns = {name: array[:self.size] for name, array in self._columns.items()}
+            mask = self._mask(columns, start_date, end_date, filters or {})
+            
+            keys = [columns[dim][mask] for dim in dims]
+            if trend_window is not None:
+                created_at = columns['created_at'][mask]
+                keys.append(((created_at >= _naive(trend_window[0])) &
+                             (created_at <= _naive(trend_window[1]))).astype('int64'))
+            
+            count = int(mask.sum())
+            if count == 0:
+                return []
+            
+            if keys:
+                groups, inverse = np.unique(np.stack(keys, axis=1), axis=0, return_inverse=True)
+                inverse = inverse.reshape(-1)
+            else:
+                groups, inverse = np.empty((1, 0), dtype='int64'), np.zeros(count, dtype='int64')
+            
+            size = len(groups)
+            cancelled_code = self._dictionaries['status'].codes.get('cancelled', -1)
+            booking_count = np.bincount(inverse, minlength=size)
+            revenue_paise = np.rint(np.bincount(inverse, weights=columns['amount_paise'][mask], minlength=size))
+            tax_paise = np.rint(np.bincount(inverse, weights=columns['tax_paise'][mask], minlength=size))
+            total_area = np.bincount(inverse, weights=columns['area'][mask], minlength=size)
+            non_cancelled = np.bincount(inverse, weights=columns['status'][mask] != cancelled_code, minlength=size)
+            
+            names = list(dims) + (['in_trend_window'] if trend_window is not None else [])
+            rows = []
+            for group in range(size):
+                row = {}
+                for position, name in enumerate(names):
+                    value = int(groups[group][position])
+                    row[name] = self._dictionaries[name].values[value] if name in DICTIONARY_COLUMNS else value
+                row['booking_count'] = int(booking_count[group])
+                row['total_revenue'] = Decimal(int(revenue_paise[group])).scaleb(-2)
+                row['total_tax'] = Decimal(int(tax_paise[group])).scaleb(-2)
+                row['total_area'] = float(total_area[group])
+                row['non_cancelled_count'] = int(non_cancelled[group])
+                rows.append(row)
+            
+            return rows
+    
+    def _mask(self, columns, start_date, end_date, filters) -> 'np.ndarray':
+        """Evaluate the date range and analytics filters as a boolean mask."""
+        mask = np.ones(self.size, dtype=bool)
+        
+        if start_date:
+            mask &= columns['created_at'] >= _naive(start_date)
+        if end_date:
+            mask &= columns['created_at'] <= _naive(end_date)
+        
+        if filters.get('status'):
+            statuses = filters['status'] if isinstance(filters['status'], list) else [filters['status']]
+            codes = [self._dictionaries['status'].codes[s] for s in statuses if s in self._dictionaries['status'].codes]
+            mask &= np.isin(columns['status'], codes)
+        
+        for key, column in (('project_name', 'project_name'),
+                            ('property_type', 'type'),
+                            ('customer_name', 'customer_name')):
+            if filters.get(key):
+                mask &= self._dictionaries[column].like_table(filters[key])[columns[column]]
+        
+        if filters.get('min_amount') is not None:
+            mask &= columns['amount'] >= filters['min_amount']
+        if filters.get('max_amount') is not None:
+            mask &= columns['amount'] <= filters['max_amount']
+        if filters.get('min_area') is not None:
+            mask &= columns['area'] >= filters['min_area']
+        if filters.get('max_area') is not None:
+            mask &= columns['area'] <= filters['max_area']
+        
+        return mask
+    
+    def _upsert(self, snapshot: Dict[str, Any]):
+        """Insert or overwrite one booking row from its snapshot."""
+        row = self._row_of_id.get(snapshot['id'])
+        if row is None:
+            row = self.size
+            self._grow(row + 1)
+            self._row_of_id[snapshot['id']] = row
+            self.size += 1
+        
+        created_at = snapshot['created_at']
+        values = {
+            'id': snapshot['id'],
+            'created_at': np.datetime64(created_at, 'us'),
+            'year': created_at.year,
+            'month': created_at.month,
+            'amount': float(snapshot['amount'] or 0),
+            'amount_paise': _paise(snapshot['amount']),
+            'tax_paise': _paise(snapshot['tax_gst']),
+            'area': float(snapshot['area'] or 0)
+        }
+        for name in DICTIONARY_COLUMNS:
+            values[name] = self._dictionaries[name].encode(snapshot[name])
+        
+        for name, value in values.items():
+            self._columns[name][row] = value
+    
+    def _delete(self, booking_id: int):
+        """Remove one booking row by moving the last row into its slot."""
+        row = self._row_of_id.pop(booking_id, None)
+        if row is None:
+            return
+        
+        last = self.size - 1
+        if row != last:
+            for array in self._columns.values():
+                array[row] = array[last]
+            self._row_of_id[int(self._columns['id'][row])] = row
+        self.size -= 1
+    
+    def _grow(self, size: int):
+        """Make sure every column can hold at least size rows."""
+        capacity = len(self._columns['id'])
+        if size <= capacity:
+            return
+        
+        capacity = max(size, capacity * 2, 64)
+        for name, array in self._columns.items():
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            self._columns[name] = grown
+
+
+def columnar_engine_enabled(app=None) -> bool:
+    """Check whether the columnar engine is selected and NumPy is available."""
+    app = app or current_app
+    return NUMPY_AVAILABLE and app.config.get('ANALYTICS_ENGINE', 'sql') == 'columnar'
+
+
+def get_columnar_engine() -> Optional[ColumnarBookingStore]:
+    """Return an up-to-date columnar store, or None if the engine is disabled."""
+    if not columnar_engine_enabled():
+        return None
+    
+    app = current_app._get_current_object()
+    store = app.extensions.get('columnar_store')
+    if store is None:
+        store = app.extensions.setdefault('columnar_store', ColumnarBookingStore())
+    
+    generation = get_generation_counter(BOOKINGS_GENERATION).current()
+    if store.generation != generation:
+        store.load(generation)
+    
+    return store
+
+
+def apply_committed_changes(changes, generation: int):
+    """Feed committed booking changes to the columnar store, if one is loaded."""
+    store = current_app.extensions.get('columnar_store')
+    if store is not None:
+        store.apply(changes, generation)
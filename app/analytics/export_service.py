@@ -0,0 +1,294 @@
+"""Streaming exports of analytics results and raw bookings."""
+import csv
+import io
+import itertools
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Iterable, Iterator, Tuple, BinaryIO
+from sqlalchemy import DateTime, Float, Integer, Numeric
+from app import db
+from app.models.booking import Booking
+from app.analytics.analytics_service import AnalyticsService
+from app.optional_imports import optional_import, is_available
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+# Data types that can be exported
+EXPORT_DATA_TYPES = ['kpis', 'trends', 'projects', 'types', 'bookings']
+
+# Streaming formats and their content types
+STREAM_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+# Formats that can only carry raw booking rows
+BOOKINGS_ONLY_FORMATS = {'parquet'}
+
+
+class ExportService:
+    """Service class producing exports as streams of text chunks."""
+    
+    @staticmethod
+    def stream_export(data_type: str,
+                      start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None,
+                      filters: Optional[Dict[str, Any]] = None,
+                      format_type: str = 'csv',
+                      chunk_size: int = 1000) -> Tuple[Iterator[str], str]:
+        """
+        Build a streaming export.
+        
+        Raw bookings are read from the database chunk_size rows at a time and
+        written out as they arrive, so memory use does not grow with the
+        number of exported rows.
+        
+        Args:
+            data_type: Type of data to export (see EXPORT_DATA_TYPES)
+            start_date: Start date for data
+            end_date: End date for data
+            filters: Additional filters
+            format_type: Stream format ('csv', 'ndjson', 'parquet')
+            chunk_size: Number of rows fetched and emitted per chunk
+        
+        Returns:
+            Tuple of (generator of text or bytes chunks, content type)
+        """
+        if data_type not in EXPORT_DATA_TYPES:
+            raise ValueError(f"Unsupported data type: {data_type}")
+        if format_type not in STREAM_FORMATS:
+            raise ValueError(f"Unsupported stream format: {format_type}")
+        if format_type in BOOKINGS_ONLY_FORMATS and data_type != 'bookings':
+            raise ValueError(f"The {format_type} format is only available for bookings exports")
+        
+        if format_type == 'parquet':
+            stream = ExportService._parquet_chunks(start_date, end_date, filters, chunk_size)
+            return stream, STREAM_FORMATS[format_type]
+        
+        if data_type == 'bookings':
+            headers = ExportService.booking_columns()
+            records = ExportService.iter_bookings(start_date, end_date, filters, chunk_size)
+        elif format_type == 'csv':
+            headers = AnalyticsService._get_csv_headers(data_type)
+            records = AnalyticsService._convert_to_csv_format(
+                data_type, ExportService._analytics_data(data_type, start_date, end_date, filters)
+            )
+        else:
+            headers = None
+            data = ExportService._analytics_data(data_type, start_date, end_date, filters)
+            records = [data] if isinstance(data, dict) else data
+        
+        if format_type == 'csv':
+            stream = ExportService._csv_chunks(headers, records, chunk_size)
+        else:
+            stream = ExportService._ndjson_chunks(records, chunk_size)
+        
+        return stream, STREAM_FORMATS[format_type]
+    
+    @staticmethod
+    def booking_columns() -> List[str]:
+        """Get the exported booking column names, in table order."""
+        return [column.key for column in Booking.__table__.columns]
+    
+    @staticmethod
+    def iter_bookings(start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None,
+                      filters: Optional[Dict[str, Any]] = None,
+                      chunk_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over filtered bookings as plain dictionaries, in id order.
+        
+        Archived bookings are included, like in the aggregated exports.
+        Rows are fetched chunk_size at a time with yield_per (server-side
+        cursors where the driver supports them) and are never loaded as ORM
+        objects, so the session does not accumulate them.
+        
+        Args:
+            start_date: Filter bookings from this date
+            end_date: Filter bookings until this date
+            filters: Additional filters
+            chunk_size: Number of rows per fetch
+        
+        Yields:
+            Dictionary of column values for each booking
+        """
+        # app.booking imports the analytics package in turn
+        from app.booking.archive_service import bookings_with_archived
+        
+        # The archive union is only read once bookings have been archived
+        source = bookings_with_archived() if AnalyticsService._archive_in_use() else Booking
+        query = db.session.query(
+            *[getattr(source, column.key) for column in Booking.__table__.columns]
+        ).order_by(source.id)
+        query = AnalyticsService._filter_query(query, start_date, end_date, filters, source)
+        
+        for row in query.yield_per(chunk_size):
+            yield row._asdict()
+    
+    @staticmethod
+    def write_parquet(sink: BinaryIO,
+                      start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None,
+                      filters: Optional[Dict[str, Any]] = None,
+                      chunk_size: int = 1000) -> int:
+        """
+        Write filtered bookings to a Parquet file.
+        
+        Every chunk of chunk_size rows becomes one row group, so only one
+        chunk is held in memory at a time. Money columns are stored as
+        decimal128 with the model's precision and scale and timestamps as
+        native microsecond timestamps, so the file round-trips losslessly.
+        
+        Args:
+            sink: Binary file object or path to write to
+            start_date: Filter bookings from this date
+            end_date: Filter bookings until this date
+            filters: Additional filters
+            chunk_size: Number of rows per row group
+        
+        Returns:
+            Number of bookings written
+        """
+        return sum(ExportService._write_parquet_row_groups(sink, start_date, end_date, filters, chunk_size))
+    
+    @staticmethod
+    def booking_arrow_schema() -> 'pa.Schema':
+        """Build the Arrow schema of the bookings table from the model columns."""
+        pa = optional_import('pyarrow')
+        fields = []
+        for column in Booking.__table__.columns:
+            if isinstance(column.type, Numeric) and not isinstance(column.type, Float):
+                arrow_type = pa.decimal128(column.type.precision, column.type.scale)
+            elif isinstance(column.type, Float):
+                arrow_type = pa.float64()
+            elif isinstance(column.type, Integer):
+                arrow_type = pa.int64()
+            elif isinstance(column.type, DateTime):
+                arrow_type = pa.timestamp('us')
+            else:
+                arrow_type = pa.string()
+            fields.append(pa.field(column.key, arrow_type, nullable=column.nullable))
+        return pa.schema(fields)
+    
+    @staticmethod
+    def _write_parquet_row_groups(sink: BinaryIO,
+                                  start_date: Optional[datetime],
+                                  end_date: Optional[datetime],
+                                  filters: Optional[Dict[str, Any]],
+                                  chunk_size: int) -> Iterator[int]:
+        """Write bookings to sink as Parquet, yielding the row count of each row group."""
+        if not is_available('pyarrow'):
+            raise RuntimeError('Parquet export requires pyarrow. Install it with: pip install pyarrow')
+        pa = optional_import('pyarrow')
+        pq = optional_import('pyarrow.parquet')
+        
+        schema = ExportService.booking_arrow_schema()
+        rows = ExportService.iter_bookings(start_date, end_date, filters, chunk_size)
+        
+        with pq.ParquetWriter(sink, schema) as writer:
+            while True:
+                chunk = list(itertools.islice(rows, chunk_size))
+                if not chunk:
+                    break
+                writer.write_batch(pa.RecordBatch.from_pylist(chunk, schema=schema))
+                yield len(chunk)
+    
+    @staticmethod
+    def _parquet_chunks(start_date: Optional[datetime],
+                        end_date: Optional[datetime],
+                        filters: Optional[Dict[str, Any]],
+                        chunk_size: int) -> Iterator[bytes]:
+        """Write bookings as Parquet, yielding the bytes of each row group."""
+        sink = _BufferedSink()
+        for _ in ExportService._write_parquet_row_groups(sink, start_date, end_date, filters, chunk_size):
+            yield sink.take()
+        # Footer written when the writer closes
+        yield sink.take()
+    
+    @staticmethod
+    def _analytics_data(data_type: str,
+                        start_date: Optional[datetime],
+                        end_date: Optional[datetime],
+                        filters: Optional[Dict[str, Any]]) -> Any:
+        """Get the analytics result behind an aggregated export."""
+        return AnalyticsService.export_data(data_type, start_date, end_date, filters)['data']
+    
+    @staticmethod
+    def _csv_chunks(headers: List[str], records: Iterable[Dict[str, Any]],
+                    chunk_size: int) -> Iterator[str]:
+        """Write records as CSV, yielding the text every chunk_size rows."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(headers)
+        
+        pending = 0
+        for record in records:
+            writer.writerow([ExportService._csv_value(record.get(header)) for header in headers])
+            pending += 1
+            if pending >= chunk_size:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        
+        yield buffer.getvalue()
+    
+    @staticmethod
+    def _ndjson_chunks(records: Iterable[Dict[str, Any]], chunk_size: int) -> Iterator[str]:
+        """Write records as newline-delimited JSON, yielding every chunk_size rows."""
+        lines = []
+        for record in records:
+            lines.append(json.dumps(record, default=ExportService._json_value) + '\n')
+            if len(lines) >= chunk_size:
+                yield ''.join(lines)
+                lines = []
+        
+        if lines:
+            yield ''.join(lines)
+    
+    @staticmethod
+    def _csv_value(value: Any) -> Any:
+        """Format a value for a CSV cell."""
+        if value is None:
+            return ''
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+    
+    @staticmethod
+    def _json_value(value: Any) -> Any:
+        """Convert values the json module cannot serialize."""
+        if isinstance(value, Decimal):
+            return float(value)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class _BufferedSink(io.RawIOBase):
+    """Write-only file object that hands out what was written since the last take()."""
+    
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+        self._position = 0
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self):
+        return self._position
+    
+    def take(self) -> bytes:
+        """Return and forget the bytes written since the previous call."""
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
@@ -0,0 +1,266 @@
+"""Maintenance and querying of the monthly booking rollup tables.
+
+booking_monthly_rollup aggregates the live bookings table and
+booking_archive_rollup the bookings moved to bookings_archive; both share the
+same key and measures, so every method takes the rollup model to work on.
+"""
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+from sqlalchemy import func, extract, case, cast, delete, insert, select, update, Integer
+from app import db
+from app.models.booking import Booking
+from app.models.booking_rollup import BookingMonthlyRollup
+
+
+# Analytics filters that can be evaluated against rollup rows
+ROLLUP_FILTERS = {'status', 'project_name', 'property_type'}
+
+
+class RollupService:
+    """Service class keeping booking_monthly_rollup in step with bookings."""
+    
+    @staticmethod
+    def apply_changes(changes: Iterable[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]],
+                      model=BookingMonthlyRollup):
+        """
+        Apply booking changes to the rollup inside the current transaction.
+        
+        Args:
+            changes: (before, after) booking snapshots; before is None for
+                     inserts and after is None for deletes
+            model: Rollup model to update
+        """
+        deltas = {}
+        for before, after in changes:
+            if before is not None:
+                RollupService._accumulate(deltas, before, -1)
+            if after is not None:
+                RollupService._accumulate(deltas, after, 1)
+        
+        for key, delta in deltas.items():
+            if not any(delta.values()):
+                continue
+            
+            year, month, project_name, property_type, status = key
+            cell = (model.year == year, model.month == month, model.project_name == project_name,
+                    model.type == property_type, model.status == status)
+            
+            # Relative updates, so concurrent writers never lose each other's deltas
+            result = db.session.execute(
+                update(model).where(*cell).values(
+                    booking_count=model.booking_count + delta['booking_count'],
+                    total_amount=model.total_amount + delta['total_amount'],
+                    total_tax=model.total_tax + delta['total_tax'],
+                    total_area=model.total_area + delta['total_area']
+                )
+            )
+            if result.rowcount == 0 and delta['booking_count'] > 0:
+                db.session.execute(insert(model).values(
+                    year=year,
+                    month=month,
+                    project_name=project_name,
+                    type=property_type,
+                    status=status,
+                    booking_count=delta['booking_count'],
+                    total_amount=delta['total_amount'],
+                    total_tax=delta['total_tax'],
+                    total_area=delta['total_area']
+                ))
+            
+            # Drop cells that no longer hold any bookings
+            if delta['booking_count'] < 0:
+                db.session.execute(delete(model).where(*cell, model.booking_count <= 0))
+    
+    @staticmethod
+    def rebuild(source=Booking, model=BookingMonthlyRollup) -> int:
+        """
+        Recompute a whole rollup from the table it aggregates.
+        
+        Args:
+            source: Booking-shaped model to aggregate (Booking or BookingArchive)
+            model: Rollup model to rewrite
+        
+        Returns:
+            Number of rollup rows written
+        """
+        year = cast(extract('year', source.created_at), Integer)
+        month = cast(extract('month', source.created_at), Integer)
+        rows = select(
+            year,
+            month,
+            source.project_name,
+            source.type,
+            source.status,
+            func.count(source.id),
+            func.sum(source.amount),
+            func.sum(source.tax_gst),
+            func.sum(source.area)
+        ).group_by(year, month, source.project_name, source.type, source.status)
+        
+        db.session.execute(delete(model))
+        db.session.execute(
+            insert(model).from_select(
+                ['year', 'month', 'project_name', 'type', 'status',
+                 'booking_count', 'total_amount', 'total_tax', 'total_area'],
+                rows
+            )
+        )
+        db.session.commit()
+        
+        return model.query.count()
+    
+    @staticmethod
+    def supports_filters(filters: Optional[Dict[str, Any]]) -> bool:
+        """Check whether the analytics filters can be answered from the rollup."""
+        for key, value in (filters or {}).items():
+            active = value is not None if key.startswith(('min_', 'max_')) else bool(value)
+            if active and key not in ROLLUP_FILTERS:
+                return False
+        return True
+    
+    @staticmethod
+    def full_month_span(start_date: datetime, end_date: datetime) -> Tuple[datetime, datetime]:
+        """
+        Find the whole calendar months inside a date range.
+        
+        Returns:
+            (first, stop) month starts; months in [first, stop) are fully
+            covered by [start_date, end_date]
+        """
+        start_date = RollupService._as_naive_utc(start_date)
+        end_date = RollupService._as_naive_utc(end_date)
+        
+        first = datetime(start_date.year, start_date.month, 1)
+        if first < start_date:
+            first = RollupService._next_month(first)
+        stop = datetime(end_date.year, end_date.month, 1)
+        return first, stop
+    
+    @staticmethod
+    def monthly_rows(first: datetime, stop: datetime,
+                     filters: Optional[Dict[str, Any]] = None,
+                     model=BookingMonthlyRollup) -> List[Dict[str, Any]]:
+        """
+        Aggregate rollup rows by (year, month) for months in [first, stop).
+        
+        Args:
+            first: Start of the first month to include
+            stop: Start of the month to stop at (exclusive)
+            filters: Analytics filters; must satisfy supports_filters()
+            model: Rollup model to read
+        
+        Returns:
+            List of dictionaries with year, month and analytics measures
+        """
+        return RollupService.grouped_rows([], first, stop, filters, model)
+    
+    @staticmethod
+    def grouped_rows(dimensions: List[str], first: datetime, stop: datetime,
+                     filters: Optional[Dict[str, Any]] = None,
+                     model=BookingMonthlyRollup,
+                     skip_months: Iterable[datetime] = ()) -> List[Dict[str, Any]]:
+        """
+        Aggregate rollup rows by year, month and further dimensions.
+        
+        Args:
+            dimensions: Key columns to group by besides year and month
+                        (project_name, type, status)
+            first: Start of the first month to include
+            stop: Start of the month to stop at (exclusive)
+            filters: Analytics filters; must satisfy supports_filters()
+            model: Rollup model to read
+            skip_months: Starts of months in [first, stop) to leave out
+        
+        Returns:
+            List of dictionaries with year, month, the dimensions and
+            analytics measures
+        """
+        R = model
+        period = R.year * 100 + R.month
+        group_columns = [R.year.label('year'), R.month.label('month')] + [
+            getattr(R, name).label(name) for name in dimensions if name not in ('year', 'month')
+        ]
+        query = db.session.query(
+            *group_columns,
+            func.sum(R.booking_count).label('booking_count'),
+            func.sum(R.total_amount).label('total_revenue'),
+            func.sum(R.total_tax).label('total_tax'),
+            func.sum(R.total_area).label('total_area'),
+            func.sum(case((R.status != 'cancelled', R.booking_count), else_=0)).label('non_cancelled_count')
+        ).filter(
+            # The year bounds let the (year, month, ...) primary key narrow the scan
+            R.year >= first.year,
+            R.year <= stop.year,
+            period >= first.year * 100 + first.month,
+            period < stop.year * 100 + stop.month
+        )
+        
+        skipped = [month.year * 100 + month.month for month in skip_months]
+        if skipped:
+            query = query.filter(period.notin_(skipped))
+        
+        filters = filters or {}
+        if filters.get('status'):
+            if isinstance(filters['status'], list):
+                query = query.filter(R.status.in_(filters['status']))
+            else:
+                query = query.filter(R.status == filters['status'])
+        if filters.get('project_name'):
+            query = query.filter(R.project_name.ilike(f"%{filters['project_name']}%"))
+        if filters.get('property_type'):
+            query = query.filter(R.type.ilike(f"%{filters['property_type']}%"))
+        
+        return [row._asdict() for row in query.group_by(*group_columns).all()]
+    
+    @staticmethod
+    def dimension_counts(model=BookingMonthlyRollup) -> List[Dict[str, Any]]:
+        """
+        Count bookings per (project_name, type, status) across all months.
+        
+        Args:
+            model: Rollup model to read
+        
+        Returns:
+            List of dictionaries with project_name, type, status and booking_count
+        """
+        R = model
+        query = db.session.query(
+            R.project_name,
+            R.type,
+            R.status,
+            func.sum(R.booking_count).label('booking_count')
+        ).group_by(R.project_name, R.type, R.status)
+        
+        return [row._asdict() for row in query.all()]
+    
+    @staticmethod
+    def _accumulate(deltas: Dict[tuple, Dict[str, Any]], snapshot: Dict[str, Any], sign: int):
+        """Add one booking snapshot to the per-cell deltas with the given sign."""
+        created_at = snapshot['created_at']
+        key = (created_at.year, created_at.month, snapshot['project_name'],
+               snapshot['type'], snapshot['status'])
+        delta = deltas.setdefault(key, {
+            'booking_count': 0,
+            'total_amount': Decimal('0'),
+            'total_tax': Decimal('0'),
+            'total_area': 0.0
+        })
+        delta['booking_count'] += sign
+        delta['total_amount'] += sign * Decimal(str(snapshot['amount'] or 0))
+        delta['total_tax'] += sign * Decimal(str(snapshot['tax_gst'] or 0))
+        delta['total_area'] += sign * float(snapshot['area'] or 0)
+    
+    @staticmethod
+    def _as_naive_utc(value: datetime) -> datetime:
+        """Convert an aware datetime to naive UTC, matching stored timestamps."""
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    
+    @staticmethod
+    def _next_month(month_start: datetime) -> datetime:
+        """Return the first day of the month after month_start."""
+        if month_start.month == 12:
+            return datetime(month_start.year + 1, 1, 1)
+        return datetime(month_start.year, month_start.month + 1, 1)
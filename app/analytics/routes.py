@@ -1,9 +1,13 @@
 """Analytics API routes for booking system reporting."""
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from datetime import datetime, timedelta
-from app import db
 from app.analytics.analytics_service import AnalyticsService
+from app.analytics.export_service import (
+    ExportService, EXPORT_DATA_TYPES, STREAM_FORMATS, BOOKINGS_ONLY_FORMATS
+)
 from app.auth.auth_service import auth_required
+from app.booking.events import event_stream_response
+from app.optional_imports import is_available
 
 analytics_bp = Blueprint('analytics', __name__)
 
@@ -21,39 +25,12 @@ def get_dashboard_data():
         # Parse dates
         start_dt, end_dt = _parse_date_range(start_date, end_date)
         
-        # Get KPI summary
-        kpis = AnalyticsService.get_kpi_summary(start_dt, end_dt, filters)
-        
-        # Get chart data
-        monthly_trends = AnalyticsService.get_chart_data(
-            'monthly_trends', start_dt, end_dt, filters
-        )
-        
-        project_distribution = AnalyticsService.get_chart_data(
-            'project_distribution', start_dt, end_dt, filters
-        )
-        
-        property_types = AnalyticsService.get_chart_data(
-            'property_types', start_dt, end_dt, filters
-        )
-        
-        status_distribution = AnalyticsService.get_chart_data(
-            'status_distribution', start_dt, end_dt, filters
-        )
-        
-        revenue_trends = AnalyticsService.get_chart_data(
-            'revenue_trends', start_dt, end_dt, filters
-        )
+        # KPIs and all charts are computed from one scan of the filtered set
+        dashboard = AnalyticsService.get_dashboard_data(start_dt, end_dt, filters)
         
         return jsonify({
-            'kpis': kpis,
-            'charts': {
-                'monthly_trends': monthly_trends,
-                'project_distribution': project_distribution,
-                'property_types': property_types,
-                'status_distribution': status_distribution,
-                'revenue_trends': revenue_trends
-            },
+            'kpis': dashboard['kpis'],
+            'charts': dashboard['charts'],
             'date_range': {
                 'start_date': start_dt.isoformat() if start_dt else None,
                 'end_date': end_dt.isoformat() if end_dt else None
@@ -98,6 +75,30 @@ def get_kpis():
         return jsonify({'error': 'Internal server error'}), 500
 
 
+@analytics_bp.route('/events', methods=['GET'])
+@auth_required(['admin'])
+def dashboard_event_stream():
+    """
+    Stream booking changes and recomputed KPIs as Server-Sent Events.
+    
+    Takes the same date range and filters as /kpis. After every committed
+    booking write a 'kpis' event carries the new KPI summary and the change
+    of each KPI, so an open dashboard stays current without reloading.
+    """
+    try:
+        filters = _parse_filters(request.args)
+        start_dt, end_dt = _parse_date_range(request.args.get('start_date'), request.args.get('end_date'))
+        
+        return event_stream_response(
+            kpis=lambda: AnalyticsService.get_kpi_summary(start_dt, end_dt, filters)
+        )
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
+
 @analytics_bp.route('/trends', methods=['GET'])
 @auth_required(['admin'])
 def get_trends():
@@ -239,23 +240,32 @@ def get_chart_data(chart_type):
 @analytics_bp.route('/export', methods=['GET'])
 @auth_required(['admin'])
 def export_analytics_data():
-    """Export analytics data in various formats."""
+    """
+    Export analytics data in various formats.
+    
+    With stream=true the export is sent as a streamed text/csv or
+    application/x-ndjson download instead of a JSON document; this mode also
+    supports type=bookings for a full export of the filtered booking rows.
+    format=parquet (bookings only, always streamed) writes a typed columnar
+    file for offline analysis.
+    """
     try:
         # Parse query parameters
-        data_type = request.args.get('type', 'kpis')  # kpis, trends, projects, types
-        format_type = request.args.get('format', 'json')  # json, csv_data
+        data_type = request.args.get('type', 'kpis')  # kpis, trends, projects, types, bookings
+        format_type = request.args.get('format', 'json')  # json, csv_data; csv, ndjson, parquet when streaming
+        stream = request.args.get('stream', 'false').lower() == 'true' or format_type in BOOKINGS_ONLY_FORMATS
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         filters = _parse_filters(request.args)
         
         # Validate parameters
-        valid_data_types = ['kpis', 'trends', 'projects', 'types']
+        valid_data_types = EXPORT_DATA_TYPES if stream else ['kpis', 'trends', 'projects', 'types']
         if data_type not in valid_data_types:
             return jsonify({
                 'error': f'Invalid data type. Must be one of: {", ".join(valid_data_types)}'
             }), 400
         
-        valid_formats = ['json', 'csv']
+        valid_formats = list(STREAM_FORMATS) if stream else ['json', 'csv']
         if format_type not in valid_formats:
             return jsonify({
                 'error': f'Invalid format. Must be one of: {", ".join(valid_formats)}'
@@ -264,6 +274,21 @@ def export_analytics_data():
         # Parse dates
         start_dt, end_dt = _parse_date_range(start_date, end_date)
         
+        if format_type == 'parquet' and not is_available('pyarrow'):
+            return jsonify({'error': 'Parquet export not available in this environment'}), 501
+        
+        if stream:
+            chunks, content_type = ExportService.stream_export(
+                data_type, start_dt, end_dt, filters, format_type,
+                chunk_size=current_app.config.get('EXPORT_CHUNK_SIZE', 1000)
+            )
+            filename = f"{data_type}_export_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{format_type}"
+            return Response(
+                stream_with_context(chunks),
+                mimetype=content_type,
+                headers={'Content-Disposition': f'attachment; filename={filename}'}
+            )
+        
         # Export data
         export_data = AnalyticsService.export_data(
             data_type, start_dt, end_dt, filters, format_type
@@ -287,21 +312,16 @@ def export_analytics_data():
 @analytics_bp.route('/filters/options', methods=['GET'])
 @auth_required(['admin'])
 def get_filter_options():
-    """Get available filter options for analytics."""
+    """Get available filter options for analytics, with per-option booking counts."""
     try:
-        from app.models.booking import Booking
-        from sqlalchemy import distinct
-        
-        # Get distinct values for filter options
-        projects = [row[0] for row in db.session.query(distinct(Booking.project_name)).all()]
-        property_types = [row[0] for row in db.session.query(distinct(Booking.type)).all()]
-        statuses = ['active', 'complete', 'cancelled']
+        options = AnalyticsService.get_filter_options()
         
         return jsonify({
             'filter_options': {
-                'projects': sorted(projects),
-                'property_types': sorted(property_types),
-                'statuses': statuses,
+                'projects': options['projects'],
+                'property_types': options['property_types'],
+                'statuses': options['statuses'],
+                'counts': options['counts'],
                 'date_ranges': {
                     'last_7_days': (datetime.utcnow() - timedelta(days=7)).isoformat(),
                     'last_30_days': (datetime.utcnow() - timedelta(days=30)).isoformat(),
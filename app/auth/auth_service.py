@@ -1,10 +1,13 @@
 """Authentication service with JWT token management."""
 import jwt
+import uuid
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import current_app, request, jsonify
 from app.models import User
 from app import db
+from app.auth.token_cache import TokenRevokedError, decode_token
+from app.auth.user_status_cache import get_user_status
 
 
 class AuthService:
@@ -34,7 +37,9 @@ class AuthService:
             'username': user.username,
             'role': user.role,
             'exp': datetime.utcnow() + current_app.config['JWT_ACCESS_TOKEN_EXPIRES'],
-            'iat': datetime.utcnow()
+            'iat': datetime.utcnow(),
+            # Unique per token, so revoking one never revokes another
+            'jti': uuid.uuid4().hex
         }
         
         token = jwt.encode(
@@ -49,25 +54,24 @@ class AuthService:
     def verify_token(token):
         """Verify and decode JWT token."""
         try:
-            payload = jwt.decode(
-                token,
-                current_app.config['JWT_SECRET_KEY'],
-                algorithms=['HS256']
-            )
+            # Signatures of tokens seen before are not checked again
+            payload = decode_token(token)
             
-            # Check if user still exists and is active
-            user = User.query.filter_by(
-                id=payload['user_id'],
-                is_active=True
-            ).first()
+            # Check if user still exists and is active (cached per user)
+            status = get_user_status(payload['user_id'])
             
-            if not user:
+            if not status or not status['is_active']:
                 return None, "User not found or inactive"
             
+            # A role change applies to tokens issued before it
+            payload['role'] = status['role']
+            
             return payload, None
             
         except jwt.ExpiredSignatureError:
             return None, "Token has expired"
+        except TokenRevokedError:
+            return None, "Token has been revoked"
         except jwt.InvalidTokenError:
             return None, "Invalid token"
     
@@ -109,6 +113,7 @@ def token_required(f):
         
         # Add user info to request context
         request.current_user = payload
+        request.current_token = token
         
         return f(*args, **kwargs)
     
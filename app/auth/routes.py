@@ -1,6 +1,8 @@
 """Authentication API routes."""
 from flask import Blueprint, request, jsonify
-from app.auth.auth_service import AuthService, token_required
+from app.auth.auth_service import AuthService, token_required, admin_required
+from app.auth.token_cache import get_token_cache, revoke_token
+from app.auth.user_status_cache import get_user_status_cache
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -90,11 +92,31 @@ def verify_token():
 @auth_bp.route('/logout', methods=['POST'])
 @token_required
 def logout():
-    """User logout endpoint (client-side token removal)."""
+    """User logout endpoint, revoking the token on the server."""
     try:
+        revoke_token(request.current_token, request.current_user)
+        
         return jsonify({
             'message': 'Logout successful. Please remove token from client storage.'
         }), 200
         
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@auth_bp.route('/cache-stats', methods=['GET'])
+@admin_required
+def cache_stats():
+    """Hit rates of the verified token and user status caches."""
+    try:
+        user_status = get_user_status_cache().stats()
+        lookups = user_status['hits'] + user_status['misses']
+        user_status['hit_rate'] = round(user_status['hits'] / lookups, 4) if lookups else None
+        
+        return jsonify({
+            'token_cache': get_token_cache().stats(),
+            'user_status_cache': user_status
+        }), 200
+        
     except Exception as e:
         return jsonify({'error': 'Internal server error'}), 500
\ No newline at end of file
@@ -0,0 +1,168 @@
+"""Verified JWT payloads and server-side token revocation.
+
+A dashboard sends the same bearer token many times a minute, and checking
+its HMAC signature every time is wasted work. Verified payloads are
+therefore kept in a bounded LRU cache keyed by the SHA-256 digest of the
+token, each until the token expires.
+
+Logging out revokes a token: its digest is stored in revoked_tokens until
+the token would have expired, and the tokens generation is bumped. Each
+worker reloads the (small) set of revoked digests once per generation and
+checks it before the cache, so a revoked token is rejected everywhere on the
+next request without a query per request.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Optional
+import jwt
+from flask import current_app
+from sqlalchemy import delete, select
+from app import db
+from app.models.revoked_token import RevokedToken
+from app.shared_state import get_generation_counter
+
+# Generation counter bumped after every token revocation
+TOKENS_GENERATION = 'tokens'
+
+
+class TokenRevokedError(jwt.InvalidTokenError):
+    """Raised for a token that was revoked by logging out."""
+
+
+def token_digest(token: str) -> str:
+    """Return the SHA-256 hex digest identifying a token."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenCache:
+    """Bounded LRU cache of verified token payloads, each kept until its token expires."""
+    
+    def __init__(self, max_size=4096):
+        """Create a cache holding at most max_size payloads."""
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.revoked = (None, frozenset())
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, digest):
+        """Return the payload of an unexpired token, or None."""
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    return payload
+                del self._entries[digest]
+            self.misses += 1
+            return None
+    
+    def set(self, digest, payload):
+        """Store a verified payload until its 'exp' claim."""
+        if 'exp' not in payload:
+            return
+        with self._lock:
+            self._entries[digest] = (payload['exp'], payload)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def discard(self, digest):
+        """Drop the payload of a token, if cached."""
+        with self._lock:
+            self._entries.pop(digest, None)
+    
+    def stats(self):
+        """Return cache size, hit/miss counters and the hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'revoked': len(self.revoked[1])
+            }
+
+
+def get_token_cache() -> TokenCache:
+    """Return the token cache of the current application."""
+    app = current_app._get_current_object()
+    cache = app.extensions.get('token_cache')
+    if cache is None:
+        cache = app.extensions.setdefault('token_cache', TokenCache(
+            max_size=app.config.get('TOKEN_CACHE_SIZE', 4096)
+        ))
+    return cache
+
+
+def _revoked_digests(cache: TokenCache) -> frozenset:
+    """Return the digests of revoked tokens, reloaded after every revocation."""
+    generation = get_generation_counter(TOKENS_GENERATION).current()
+    loaded_at, digests = cache.revoked
+    if loaded_at != generation:
+        digests = frozenset(db.session.execute(
+            select(RevokedToken.token_digest).where(RevokedToken.expires_at > datetime.utcnow())
+        ).scalars())
+        cache.revoked = (generation, digests)
+    return digests
+
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """
+    Verify a JWT and return its payload, skipping the signature check for
+    tokens verified before.
+    
+    Args:
+        token: Encoded bearer token
+    
+    Returns:
+        Copy of the token payload
+    
+    Raises:
+        TokenRevokedError: If the token was revoked
+        jwt.ExpiredSignatureError: If the token has expired
+        jwt.InvalidTokenError: If the token is invalid
+    """
+    cache = get_token_cache()
+    digest = token_digest(token)
+    if digest in _revoked_digests(cache):
+        raise TokenRevokedError('Token has been revoked')
+    
+    enabled = current_app.config.get('TOKEN_CACHE_ENABLED', True)
+    payload = cache.get(digest) if enabled else None
+    if payload is None:
+        payload = jwt.decode(token, current_app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
+        if enabled:
+            cache.set(digest, payload)
+    
+    return dict(payload)
+
+
+def revoke_token(token: str, payload: Optional[Dict[str, Any]] = None):
+    """
+    Reject a token from now on, in every worker.
+    
+    Args:
+        token: Encoded bearer token
+        payload: Its verified payload, read for the expiry time
+    """
+    payload = payload or decode_token(token)
+    digest = token_digest(token)
+    now = datetime.utcnow()
+    
+    # Revocations of tokens that have expired anyway are no longer needed
+    db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+    if db.session.get(RevokedToken, digest) is None:
+        db.session.add(RevokedToken(token_digest=digest, expires_at=datetime.utcfromtimestamp(payload['exp'])))
+    db.session.commit()
+    
+    get_token_cache().discard(digest)
+    get_generation_counter(TOKENS_GENERATION).bump()
@@ -0,0 +1,114 @@
+"""Cached active flag and role of users, read by token verification.
+
+Every authenticated request needs to know whether the user behind its token
+is still active and what their role is. That state is cached per user id,
+tagged with the users generation. Any committed change to a user's active
+flag or role, and any user insert or delete, bumps that generation, which is
+shared between workers like the bookings generation, so a deactivation or a
+role change takes effect on the very next request everywhere.
+"""
+from typing import Dict, Any, Optional
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.orm import attributes
+from app import db
+from app.models.user import User
+from app.shared_state import get_generation_counter
+
+# Generation counter bumped after every committed change of user status
+USERS_GENERATION = 'users'
+
+# User columns that token verification depends on
+STATUS_COLUMNS = ('is_active', 'role')
+
+
+def get_user_status_cache():
+    """Return the user status cache of the current application."""
+    # app.analytics imports the auth decorators in turn
+    from app.analytics.analytics_cache import AnalyticsCache
+    
+    app = current_app._get_current_object()
+    cache = app.extensions.get('user_status_cache')
+    if cache is None:
+        cache = app.extensions.setdefault('user_status_cache', AnalyticsCache(
+            max_size=app.config.get('USER_STATUS_CACHE_SIZE', 1024),
+            ttl=app.config.get('USER_STATUS_CACHE_TTL', 300)
+        ))
+    return cache
+
+
+def _load_user_status(user_id: int) -> Optional[Dict[str, Any]]:
+    """Read the active flag and role of a user from the database."""
+    row = db.session.execute(
+        select(User.is_active, User.role).where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    return {'is_active': row.is_active, 'role': row.role}
+
+
+def get_user_status(user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Get the active flag and role of a user, from the cache when possible.
+    
+    Args:
+        user_id: ID of the user
+    
+    Returns:
+        Dictionary with 'is_active' and 'role', or None if there is no such user
+    """
+    if not current_app.config.get('USER_STATUS_CACHE_ENABLED', True):
+        return _load_user_status(user_id)
+    
+    cache = get_user_status_cache()
+    generation = get_generation_counter(USERS_GENERATION).current()
+    found, status = cache.get(user_id, generation)
+    if found:
+        return status
+    
+    status = _load_user_status(user_id)
+    cache.set(user_id, generation, status)
+    return status
+
+
+def invalidate_user_status():
+    """Drop the cached status of every user, in all workers."""
+    get_generation_counter(USERS_GENERATION).bump()
+
+
+@event.listens_for(db.session, 'after_flush')
+def _after_flush(session, flush_context):
+    """Note flushed user inserts, deletes and status changes."""
+    for user in session.new | session.deleted:
+        if isinstance(user, User):
+            session.info['users_changed'] = True
+            return
+    
+    for user in session.dirty:
+        if isinstance(user, User) and any(
+            attributes.get_history(user, column).has_changes() for column in STATUS_COLUMNS
+        ):
+            session.info['users_changed'] = True
+            return
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _do_orm_execute(orm_execute_state):
+    """Note bulk UPDATE and DELETE statements against users."""
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) \
+            and orm_execute_state.bind_mapper is not None \
+            and orm_execute_state.bind_mapper.class_ is User:
+        orm_execute_state.session.info['users_changed'] = True
+
+
+@event.listens_for(db.session, 'after_commit')
+def _after_commit(session):
+    """Bump the users generation once user changes are committed."""
+    if session.info.pop('users_changed', False):
+        invalidate_user_status()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _after_rollback(session):
+    """Forget user changes that were rolled back."""
+    session.info.pop('users_changed', None)
@@ -0,0 +1,149 @@
+"""Archival of cancelled and long-completed bookings.
+
+Bookings matching the archival policy (a status and a number of days since
+the booking was last updated) are moved from bookings to bookings_archive in
+batches, each in one transaction together with the bookkeeping of
+record_booking_archival. Lists, searches, delta sync and the columnar engine
+then no longer carry them, while analytics add the archive rollup back in so
+totals do not change.
+"""
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Optional
+from flask import current_app
+from sqlalchemy import func, and_, or_, select, insert, delete
+from sqlalchemy.orm import aliased
+from app import db
+from app.models.booking import Booking
+from app.models.booking_archive import BookingArchive
+from app.analytics.analytics_cache import ARCHIVE_GENERATION
+from app.booking.write_hooks import record_booking_archival
+from app.shared_state import get_generation_counter
+
+# Statuses the archival policy may name
+ARCHIVABLE_STATUSES = ('cancelled', 'complete')
+
+
+@lru_cache(maxsize=None)
+def bookings_with_archived():
+    """
+    Booking entity over live and archived bookings together.
+    
+    Queries over the returned alias load archived bookings as Booking
+    objects. It has no full-text index, so searches over it use substring
+    matching. The alias is built once, so compiled serializers are reused.
+    """
+    columns = [column.key for column in Booking.__table__.columns]
+    union = select(*[getattr(Booking, name) for name in columns]).union_all(
+        select(*[getattr(BookingArchive, name) for name in columns])
+    ).subquery('all_bookings')
+    return aliased(Booking, union)
+
+
+class BookingArchiveService:
+    """Service class moving bookings to bookings_archive."""
+    
+    @staticmethod
+    def parse_policy(value: str) -> Dict[str, int]:
+        """
+        Parse an archival policy such as 'cancelled:90,complete:365'.
+        
+        Returns:
+            Dictionary mapping each status to the days after their last
+            update at which its bookings are archived
+        
+        Raises:
+            ValueError: If the policy is malformed or names another status
+        """
+        policy = {}
+        for entry in (value or '').split(','):
+            if not entry.strip():
+                continue
+            status, _, days = entry.partition(':')
+            status = status.strip()
+            if status not in ARCHIVABLE_STATUSES:
+                raise ValueError(f"Cannot archive '{status}' bookings. Must be one of: {', '.join(ARCHIVABLE_STATUSES)}")
+            if not days.strip().isdigit():
+                raise ValueError(f"Invalid number of days for '{status}' bookings")
+            policy[status] = int(days)
+        return policy
+    
+    @staticmethod
+    def policy() -> Dict[str, int]:
+        """Archival policy of the current application (ARCHIVE_POLICY)."""
+        return BookingArchiveService.parse_policy(current_app.config.get('ARCHIVE_POLICY', ''))
+    
+    @staticmethod
+    def _candidates(policy: Dict[str, int], now: datetime):
+        """Select the ids of the live bookings matching the policy."""
+        if not policy:
+            return None
+        
+        return select(Booking.id).where(
+            or_(*[
+                and_(Booking.status == status, Booking.updated_at < now - timedelta(days=days))
+                for status, days in policy.items()
+            ])
+        )
+    
+    @staticmethod
+    def count_pending(policy: Optional[Dict[str, int]] = None, now: Optional[datetime] = None) -> int:
+        """Count the live bookings the policy would archive now."""
+        candidates = BookingArchiveService._candidates(
+            BookingArchiveService.policy() if policy is None else policy, now or datetime.utcnow()
+        )
+        if candidates is None:
+            return 0
+        return db.session.execute(select(func.count()).select_from(candidates.subquery())).scalar()
+    
+    @staticmethod
+    def archive(policy: Optional[Dict[str, int]] = None,
+                batch_size: int = 500,
+                now: Optional[datetime] = None) -> int:
+        """
+        Move the bookings matching the policy to bookings_archive.
+        
+        Each batch is committed on its own, so an interrupted run can simply
+        be started again.
+        
+        Args:
+            policy: Status to days mapping; defaults to ARCHIVE_POLICY
+            batch_size: Bookings moved per transaction
+            now: Reference time for the policy; defaults to the current time
+        
+        Returns:
+            Number of bookings archived
+        """
+        policy = BookingArchiveService.policy() if policy is None else policy
+        now = now or datetime.utcnow()
+        from app.database import ARCHIVE_MARKER, write_schema_meta
+        counter = get_generation_counter(ARCHIVE_GENERATION)
+        
+        archived = 0
+        while True:
+            candidates = BookingArchiveService._candidates(policy, now)
+            if candidates is None:
+                break
+            
+            rows = db.session.execute(
+                select(Booking.__table__).where(Booking.id.in_(candidates.order_by(Booking.id).limit(batch_size)))
+            ).mappings().all()
+            if not rows:
+                break
+            
+            # Analytics start reading the archive before any booking leaves,
+            # in this process and in any started later
+            if archived == 0:
+                counter.bump()
+                write_schema_meta(ARCHIVE_MARKER, 1)
+            
+            snapshots = [dict(row) for row in rows]
+            ids = [snapshot['id'] for snapshot in snapshots]
+            db.session.execute(insert(BookingArchive), [dict(snapshot, archived_at=now) for snapshot in snapshots])
+            db.session.execute(delete(Booking).where(Booking.id.in_(ids)))
+            record_booking_archival(snapshots)
+            db.session.commit()
+            
+            archived += len(snapshots)
+        
+        return archived
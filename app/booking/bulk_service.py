@@ -0,0 +1,267 @@
+"""Batched creation and update of bookings."""
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Tuple
+from sqlalchemy import insert, select, update
+from app import db
+from app.models.booking import Booking
+from app.booking.write_hooks import record_booking_changes
+
+# Bulk request modes
+ATOMIC = 'atomic'
+BEST_EFFORT = 'best_effort'
+BULK_MODES = (ATOMIC, BEST_EFFORT)
+
+REQUIRED_FIELDS = [
+    'customer_name', 'contact_number', 'project_name', 'type',
+    'area', 'agreement_cost', 'amount', 'timeline'
+]
+MONEY_FIELDS = ['tax_gst', 'refund_buyer', 'refund_referral', 'onc_trust_fund', 'oncct_funded']
+TEXT_FIELDS = ['customer_name', 'contact_number', 'project_name', 'type']
+UPDATABLE_FIELDS = [
+    'customer_name', 'contact_number', 'project_name', 'type', 'area',
+    'agreement_cost', 'amount', 'tax_gst', 'refund_buyer', 'refund_referral',
+    'onc_trust_fund', 'oncct_funded', 'invoice_status', 'timeline',
+    'loan_req', 'status'
+]
+
+VALID_STATUSES = ('active', 'complete', 'cancelled')
+
+
+def parse_timeline(value: str) -> datetime:
+    """
+    Parse an ISO timeline into the naive UTC datetime stored in the table.
+    
+    Raises:
+        ValueError: If the value is not an ISO date/time
+        AttributeError: If the value is not a string
+    """
+    timeline = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if timeline.tzinfo is not None:
+        timeline = timeline.astimezone(timezone.utc).replace(tzinfo=None)
+    return timeline
+
+
+class BulkBookingService:
+    """Service class validating and writing batches of bookings in one transaction."""
+    
+    @staticmethod
+    def create_bookings(rows: List[Dict[str, Any]], user_id: int,
+                        mode: str = ATOMIC) -> Tuple[bool, List[Dict[str, Any]]]:
+        """
+        Validate and insert a batch of bookings.
+        
+        Valid rows are inserted with a single executemany INSERT. In atomic
+        mode nothing is written if any row is invalid; in best-effort mode
+        the valid rows are written and the invalid ones reported.
+        
+        Args:
+            rows: Booking payloads, as accepted by POST /api/bookings
+            user_id: ID of the user creating the bookings
+            mode: ATOMIC or BEST_EFFORT
+        
+        Returns:
+            Tuple of (whether anything was written, per-row results in input
+            order with 'index', 'status' and 'id' or 'errors')
+        """
+        written, results = BulkBookingService.insert_bookings(rows, user_id, mode)
+        if written:
+            db.session.commit()
+        return written, results
+    
+    @staticmethod
+    def insert_bookings(rows: List[Dict[str, Any]], user_id: int,
+                        mode: str = ATOMIC) -> Tuple[bool, List[Dict[str, Any]]]:
+        """
+        Validate and insert a batch of bookings without committing.
+        
+        Same as create_bookings, but leaves the transaction open so callers
+        can write their own bookkeeping alongside the bookings.
+        """
+        now = datetime.utcnow()
+        results = []
+        valid = []
+        
+        for index, data in enumerate(rows):
+            try:
+                values, errors = BulkBookingService._prepare_create(data, user_id, now)
+            except Exception as e:
+                # One unreadable row must not abort the rest of the batch
+                values, errors = None, [f'Invalid booking: {str(e)}']
+            if errors:
+                results.append({'index': index, 'status': 'error', 'errors': errors})
+            else:
+                results.append({'index': index, 'status': 'created'})
+                valid.append((index, values))
+        
+        if not valid or (mode == ATOMIC and len(valid) != len(rows)):
+            return False, BulkBookingService._skipped(results)
+        
+        ids = db.session.scalars(
+            insert(Booking).returning(Booking.id, sort_by_parameter_order=True),
+            [values for _, values in valid]
+        ).all()
+        
+        changes = []
+        for (index, values), booking_id in zip(valid, ids):
+            results[index]['id'] = booking_id
+            changes.append((None, dict(values, id=booking_id)))
+        
+        record_booking_changes(changes)
+        
+        return True, results
+    
+    @staticmethod
+    def update_bookings(rows: List[Dict[str, Any]],
+                        mode: str = ATOMIC) -> Tuple[bool, List[Dict[str, Any]]]:
+        """
+        Validate and apply a batch of partial booking updates.
+        
+        Current rows are read with one query and the updates are written as
+        executemany UPDATEs by primary key, in one transaction.
+        
+        Args:
+            rows: Partial booking payloads, each with the 'id' to update
+            mode: ATOMIC or BEST_EFFORT
+        
+        Returns:
+            Tuple of (whether anything was written, per-row results in input
+            order with 'index', 'status', 'id' and possibly 'errors')
+        """
+        ids = [data.get('id') for data in rows if isinstance(data, dict)]
+        current = {
+            row['id']: dict(row) for row in db.session.execute(
+                select(Booking.__table__).where(Booking.id.in_([i for i in ids if BulkBookingService._is_id(i)]))
+            ).mappings()
+        }
+        
+        now = datetime.utcnow()
+        results = []
+        valid = []
+        seen = set()
+        
+        for index, data in enumerate(rows):
+            booking_id = data.get('id') if isinstance(data, dict) else None
+            if not BulkBookingService._is_id(booking_id):
+                results.append({'index': index, 'id': None, 'status': 'error',
+                                'errors': ['Booking id must be an integer']})
+                continue
+            before = current.get(booking_id)
+            
+            if before is None:
+                errors = ['Booking not found']
+            elif booking_id in seen:
+                errors = ['Booking appears more than once in the batch']
+            else:
+                changes, errors = BulkBookingService._prepare_update(data, now)
+                if not errors:
+                    errors = BulkBookingService._validate(dict(before, **changes))
+            
+            seen.add(booking_id)
+            if errors:
+                results.append({'index': index, 'id': booking_id, 'status': 'error', 'errors': errors})
+            else:
+                results.append({'index': index, 'id': booking_id, 'status': 'updated'})
+                valid.append((before, dict(before, **changes), changes))
+        
+        if not valid or (mode == ATOMIC and len(valid) != len(rows)):
+            return False, BulkBookingService._skipped(results)
+        
+        db.session.execute(
+            update(Booking),
+            [dict(changes, id=before['id']) for before, _, changes in valid]
+        )
+        
+        record_booking_changes([(before, after) for before, after, _ in valid])
+        db.session.commit()
+        
+        return True, results
+    
+    @staticmethod
+    def _is_id(value: Any) -> bool:
+        """Check whether a payload value can be a booking id."""
+        return isinstance(value, int) and not isinstance(value, bool)
+    
+    @staticmethod
+    def _prepare_create(data: Any, user_id: int,
+                        now: datetime) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+        """Turn one create payload into column values, or collect its errors."""
+        if not isinstance(data, dict):
+            return None, ['Booking must be a JSON object']
+        
+        missing_fields = [field for field in REQUIRED_FIELDS if not data.get(field)]
+        if missing_fields:
+            return None, [f'Missing required fields: {", ".join(missing_fields)}']
+        
+        try:
+            values = {field: data[field].strip() for field in TEXT_FIELDS}
+            values['area'] = float(data['area'])
+            values['agreement_cost'] = float(data['agreement_cost'])
+            values['amount'] = float(data['amount'])
+            for field in MONEY_FIELDS:
+                values[field] = float(data.get(field, 0))
+        except (ValueError, TypeError, AttributeError) as e:
+            return None, [f'Invalid data type: {str(e)}']
+        
+        try:
+            values['timeline'] = parse_timeline(data['timeline'])
+        except (ValueError, AttributeError):
+            return None, ['Invalid timeline format. Use ISO format.']
+        
+        values['invoice_status'] = data.get('invoice_status', 'pending')
+        values['loan_req'] = data.get('loan_req', 'no')
+        values['status'] = data.get('status', 'active')
+        values['created_by'] = user_id
+        values['created_at'] = now
+        values['updated_at'] = now
+        
+        errors = BulkBookingService._validate(values)
+        return (None, errors) if errors else (values, [])
+    
+    @staticmethod
+    def _prepare_update(data: Dict[str, Any],
+                        now: datetime) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+        """Turn one update payload into changed column values, or collect its errors."""
+        changes = {field: data[field] for field in UPDATABLE_FIELDS if field in data}
+        
+        if 'timeline' in changes:
+            try:
+                changes['timeline'] = parse_timeline(changes['timeline'])
+            except (ValueError, AttributeError):
+                return None, ['Invalid timeline format. Use ISO format.']
+        
+        try:
+            for field in ['area', 'agreement_cost', 'amount'] + MONEY_FIELDS:
+                if field in changes:
+                    changes[field] = float(changes[field])
+        except (ValueError, TypeError) as e:
+            return None, [f'Invalid data type: {str(e)}']
+        
+        changes['updated_at'] = now
+        return changes, []
+    
+    @staticmethod
+    def _validate(values: Dict[str, Any]) -> List[str]:
+        """Apply Booking.validate_data and the table constraints to column values."""
+        try:
+            errors = Booking(**values).validate_data()
+            
+            if values['status'] not in VALID_STATUSES:
+                errors.append(f'Status must be one of: {", ".join(VALID_STATUSES)}')
+            if values['loan_req'] not in ('yes', 'no'):
+                errors.append("Loan requirement must be 'yes' or 'no'")
+            for field in MONEY_FIELDS:
+                if values[field] < 0:
+                    errors.append(f'{field} cannot be negative')
+        except (TypeError, ValueError) as e:
+            # Values the checks cannot compare are this row's error, not the batch's
+            return [f'Invalid data type: {str(e)}']
+        
+        return errors
+    
+    @staticmethod
+    def _skipped(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Mark valid rows of a batch that was not written as skipped."""
+        for result in results:
+            if result['status'] != 'error':
+                result['status'] = 'skipped'
+        return results
@@ -0,0 +1,156 @@
+"""Maintained booking counters behind /api/bookings/stats.
+
+booking_counters holds the number of bookings and their amount total per
+status, archived bookings included. Every booking write adjusts it in its own
+transaction with relative UPDATEs (count = count + :delta), so concurrent
+writers in different workers never overwrite each other, and the statistics
+become a read of a few rows instead of scans of the bookings table.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+from sqlalchemy import func, delete, insert, update, select
+from app import db
+from app.models.booking import Booking
+from app.models.booking_archive import BookingArchive
+from app.models.booking_counter import BookingCounter
+
+# Statuses whose amounts count as revenue
+REVENUE_STATUSES = ('active', 'complete')
+
+
+def _paise(value) -> int:
+    """Convert a money value to integer paise."""
+    return int((Decimal(str(value or 0)) * 100).to_integral_value(ROUND_HALF_UP))
+
+
+class BookingCounterService:
+    """Service class keeping booking_counters in step with bookings."""
+    
+    @staticmethod
+    def apply_changes(changes: Iterable[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]):
+        """
+        Apply booking changes to the counters inside the current transaction.
+        
+        Args:
+            changes: (before, after) booking snapshots; before is None for
+                     inserts and after is None for deletes
+        """
+        deltas = {}
+        for before, after in changes:
+            for snapshot, sign in ((before, -1), (after, 1)):
+                if snapshot is not None:
+                    delta = deltas.setdefault(snapshot['status'], [0, 0])
+                    delta[0] += sign
+                    delta[1] += sign * _paise(snapshot['amount'])
+        
+        for status, (count, paise) in deltas.items():
+            if not count and not paise:
+                continue
+            
+            result = db.session.execute(
+                update(BookingCounter).where(BookingCounter.status == status).values(
+                    booking_count=BookingCounter.booking_count + count,
+                    total_amount_paise=BookingCounter.total_amount_paise + paise
+                )
+            )
+            if result.rowcount == 0:
+                db.session.execute(insert(BookingCounter).values(
+                    status=status, booking_count=count, total_amount_paise=paise
+                ))
+    
+    @staticmethod
+    def get_stats() -> Dict[str, Any]:
+        """
+        Get the booking statistics from the counters.
+        
+        Returns:
+            Dictionary with total, active, completed and cancelled booking
+            counts, total revenue of active and completed bookings, and the
+            completion rate
+        """
+        counters = {
+            row.status: row for row in db.session.execute(
+                select(BookingCounter.status, BookingCounter.booking_count, BookingCounter.total_amount_paise)
+            )
+        }
+        
+        def count(status):
+            return counters[status].booking_count if status in counters else 0
+        
+        total_bookings = sum(row.booking_count for row in counters.values())
+        completed_bookings = count('complete')
+        revenue_paise = sum(counters[status].total_amount_paise for status in REVENUE_STATUSES if status in counters)
+        
+        return {
+            'total_bookings': total_bookings,
+            'active_bookings': count('active'),
+            'completed_bookings': completed_bookings,
+            'cancelled_bookings': count('cancelled'),
+            'total_revenue': revenue_paise / 100,
+            'completion_rate': (completed_bookings / total_bookings * 100) if total_bookings > 0 else 0
+        }
+    
+    @staticmethod
+    def _computed() -> Dict[str, Tuple[int, int]]:
+        """Count bookings and total their amounts per status, archived bookings included."""
+        computed = {}
+        for source in (Booking, BookingArchive):
+            rows = db.session.execute(
+                select(source.status, func.count(source.id), func.sum(func.round(source.amount * 100)))
+                .group_by(source.status)
+            )
+            for status, count, paise in rows:
+                total_count, total_paise = computed.get(status, (0, 0))
+                computed[status] = (total_count + count, total_paise + int(paise or 0))
+        return computed
+    
+    @staticmethod
+    def reconcile() -> List[Dict[str, Any]]:
+        """
+        Compare the counters with a full recount of live and archived bookings.
+        
+        Returns:
+            One entry per status whose counters drifted, with the stored and
+            the actual count and amount total
+        """
+        stored = {
+            row.status: (row.booking_count, row.total_amount_paise)
+            for row in db.session.execute(
+                select(BookingCounter.status, BookingCounter.booking_count, BookingCounter.total_amount_paise)
+            )
+        }
+        actual = BookingCounterService._computed()
+        
+        drift = []
+        for status in sorted(set(stored) | set(actual)):
+            stored_count, stored_paise = stored.get(status, (0, 0))
+            actual_count, actual_paise = actual.get(status, (0, 0))
+            if (stored_count, stored_paise) != (actual_count, actual_paise):
+                drift.append({
+                    'status': status,
+                    'stored_count': stored_count,
+                    'actual_count': actual_count,
+                    'stored_amount': stored_paise / 100,
+                    'actual_amount': actual_paise / 100
+                })
+        return drift
+    
+    @staticmethod
+    def rebuild() -> int:
+        """
+        Recompute the counters from live and archived bookings.
+        
+        Returns:
+            Number of counter rows written
+        """
+        rows = [
+            {'status': status, 'booking_count': count, 'total_amount_paise': paise}
+            for status, (count, paise) in BookingCounterService._computed().items()
+        ]
+        
+        db.session.execute(delete(BookingCounter))
+        if rows:
+            db.session.execute(insert(BookingCounter), rows)
+        db.session.commit()
+        
+        return len(rows)
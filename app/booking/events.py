@@ -0,0 +1,198 @@
+"""Server-Sent Events stream of booking changes.
+
+Every committed booking write already appends to the booking change log and
+then bumps the shared bookings generation counter. Together they act as the
+broker between worker processes: a stream polls only the generation counter,
+a small file shared by all workers, and reads the change log just once per
+bump. Idle clients therefore never touch the database, and between reads the
+stream hands its connection back to the pool.
+
+An open stream still occupies a worker thread for up to EVENTS_MAX_DURATION,
+so streams need threaded (e.g. gunicorn gthread) or gevent workers, and each
+worker serves at most EVENTS_MAX_STREAMS of them at a time. Clients beyond
+that get a 'busy' event and reconnect later.
+"""
+import json
+import threading
+import time
+from typing import Dict, Any, Optional, Callable, Iterator
+from flask import Response, current_app, request, stream_with_context
+from app import db
+from app.analytics.analytics_cache import BOOKINGS_GENERATION
+from app.booking.sync_service import BookingSyncService
+from app.shared_state import get_generation_counter
+
+# Booking fields carried by change events; clients fetch more on demand
+EVENT_FIELDS = ('id', 'customer_name', 'project_name', 'type', 'amount', 'status', 'timeline', 'updated_at')
+
+# Reconnection delay suggested to EventSource clients, in milliseconds
+RETRY_MS = 3000
+
+# Reconnection delay suggested to clients turned away by a full worker
+BUSY_RETRY_MS = 15000
+
+
+def format_event(event: str, data: Dict[str, Any], event_id: Optional[str] = None) -> str:
+    """Encode one Server-Sent Event."""
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"), default=str)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def _kpi_delta(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Differences of the numeric KPIs that changed between two summaries."""
+    delta = {}
+    for key, value in current.items():
+        before = previous.get(key)
+        if isinstance(value, (int, float)) and isinstance(before, (int, float)) and value != before:
+            delta[key] = round(value - before, 2)
+    return delta
+
+
+def booking_events(since: Optional[int] = None,
+                   kpis: Optional[Callable[[], Dict[str, Any]]] = None,
+                   poll_interval: float = 1.0,
+                   heartbeat: float = 15.0,
+                   max_duration: float = 60.0) -> Iterator[str]:
+    """
+    Generate the event stream of booking changes.
+    
+    Events:
+        ready: {'sync_token'[, 'kpis']} when the stream starts, with the
+               event id set to the sync token
+        bookings: {'bookings', 'deleted', 'sync_token'} with the event id set
+                  to the sync token, so reconnecting clients resume from it
+        kpis: {'kpis', 'delta'} after changes, if a KPI function is given
+        reset: {'sync_token'} if since is older than the retained change log
+    
+    Args:
+        since: Parsed sync token or Last-Event-ID to resume after; changes
+               since it are sent straight away
+        kpis: Function returning the KPI summary to push after changes
+        poll_interval: Seconds between checks of the generation counter
+        heartbeat: Seconds of silence after which a keep-alive comment is sent
+        max_duration: Seconds after which the stream ends and the client
+                      reconnects, so long-lived streams do not pin a worker
+    """
+    counter = get_generation_counter(BOOKINGS_GENERATION)
+    position = since
+    
+    def start():
+        nonlocal position
+        events = [f'retry: {RETRY_MS}\n\n']
+        if position is not None and BookingSyncService.token_expired(position):
+            position = None
+            events.append(format_event('reset', {'sync_token': BookingSyncService.current_token()}))
+        
+        ready = {'sync_token': BookingSyncService.current_token() if position is None else str(position)}
+        if position is None:
+            position = int(ready['sync_token'])
+        if kpis:
+            ready['kpis'] = kpis()
+        events.append(format_event('ready', ready, ready['sync_token']))
+        return events, ready.get('kpis')
+    
+    def changes():
+        nonlocal position
+        events = []
+        has_more = True
+        while has_more:
+            batch = BookingSyncService.changes_since(position)
+            has_more = batch['has_more']
+            if batch['sync_token'] == str(position):
+                break
+            position = int(batch['sync_token'])
+            events.append(format_event('bookings', {
+                'bookings': [
+                    {name: value for name, value in booking.to_dict().items() if name in EVENT_FIELDS}
+                    for booking in batch['bookings']
+                ],
+                'deleted': batch['deleted'],
+                'sync_token': batch['sync_token']
+            }, batch['sync_token']))
+        return events
+    
+    # Generation before reading, so a write racing this read is seen next poll
+    generation = counter.current()
+    events, last_kpis = start()
+    events.extend(changes())
+    db.session.close()
+    yield ''.join(events)
+    
+    started = last_sent = time.monotonic()
+    while time.monotonic() - started < max_duration:
+        time.sleep(poll_interval)
+        
+        current = counter.current()
+        if current == generation:
+            if time.monotonic() - last_sent >= heartbeat:
+                last_sent = time.monotonic()
+                yield ': keep-alive\n\n'
+            continue
+        
+        generation = current
+        events = changes()
+        if events and kpis:
+            current_kpis = kpis()
+            events.append(format_event('kpis', {
+                'kpis': current_kpis,
+                'delta': _kpi_delta(last_kpis or {}, current_kpis)
+            }))
+            last_kpis = current_kpis
+        db.session.close()
+        
+        if events:
+            last_sent = time.monotonic()
+            yield ''.join(events)
+
+
+def _stream_slots() -> threading.BoundedSemaphore:
+    """Return the semaphore limiting concurrent streams of the current application."""
+    app = current_app._get_current_object()
+    slots = app.extensions.get('event_stream_slots')
+    if slots is None:
+        slots = app.extensions.setdefault('event_stream_slots', threading.BoundedSemaphore(
+            app.config.get('EVENTS_MAX_STREAMS', 4)
+        ))
+    return slots
+
+
+def event_stream_response(kpis: Optional[Callable[[], Dict[str, Any]]] = None) -> Response:
+    """
+    Build the text/event-stream response for the current request.
+    
+    The stream resumes after the Last-Event-ID header sent by reconnecting
+    clients, or after the since=<sync_token> query parameter.
+    
+    Raises:
+        ValueError: If the token is malformed
+    """
+    token = request.headers.get('Last-Event-ID') or request.args.get('since')
+    since = BookingSyncService.parse_token(token) if token else None
+    
+    config = current_app.config
+    slots = _stream_slots()
+    
+    def events():
+        # Taken once streaming starts, so the finally below always releases it
+        if not slots.acquire(blocking=False):
+            yield f'retry: {BUSY_RETRY_MS}\n\n' + format_event('busy', {
+                'max_streams': config.get('EVENTS_MAX_STREAMS', 4)
+            })
+            return
+        
+        try:
+            yield from booking_events(
+                since, kpis,
+                poll_interval=config.get('EVENTS_POLL_INTERVAL', 1.0),
+                heartbeat=config.get('EVENTS_HEARTBEAT', 15.0),
+                max_duration=config.get('EVENTS_MAX_DURATION', 60.0)
+            )
+        finally:
+            slots.release()
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
@@ -0,0 +1,167 @@
+"""Chunked, resumable CSV import of bookings.
+
+A CSV file is read as a stream and validated in fixed-size chunks with the
+same rules as POST /api/bookings. Each chunk is inserted and committed
+together with the import job's progress counters, so an interrupted import
+resumes right after its last committed chunk, and memory use is bounded by
+the chunk size rather than the file size. Rejected rows never abort the
+import; they are appended to a CSV error report kept next to the upload.
+"""
+import csv
+import os
+import shutil
+from itertools import islice
+from typing import Dict, Any, Optional, Callable, IO
+from flask import current_app
+from app import db
+from app.models.booking_import import BookingImport
+from app.booking.bulk_service import BulkBookingService, REQUIRED_FIELDS, BEST_EFFORT
+
+
+def import_dir() -> str:
+    """Directory holding uploaded import files and error reports."""
+    path = current_app.config.get('IMPORT_DIR') or os.path.join(current_app.instance_path, 'imports')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _booking_payload(row: Dict[Optional[str], Any]) -> Dict[str, str]:
+    """Turn a CSV row into a booking payload, leaving blank cells to their defaults."""
+    return {
+        key.strip(): value.strip() for key, value in row.items()
+        if key and isinstance(value, str) and value.strip()
+    }
+
+
+class BookingImportService:
+    """Service class for chunked CSV imports of bookings."""
+    
+    @staticmethod
+    def create_job(filename: str, source_path: str, user_id: int,
+                   chunk_size: Optional[int] = None) -> BookingImport:
+        """
+        Register an import of a CSV file already on disk.
+        
+        Args:
+            filename: Name of the file as shown to users
+            source_path: Path of the CSV file to import
+            user_id: ID of the user the bookings are created for
+            chunk_size: Rows validated and committed together
+        
+        Returns:
+            New pending BookingImport
+        """
+        job = BookingImport(
+            filename=filename[:255],
+            source_path=os.path.abspath(source_path),
+            chunk_size=chunk_size or current_app.config.get('IMPORT_CHUNK_SIZE', 1000),
+            created_by=user_id
+        )
+        db.session.add(job)
+        db.session.commit()
+        return job
+    
+    @staticmethod
+    def save_upload(stream: IO[bytes], filename: str, user_id: int,
+                    chunk_size: Optional[int] = None) -> BookingImport:
+        """
+        Store an uploaded CSV file in the import directory and register its import.
+        
+        The upload is copied to disk block by block, so it is never held in
+        memory as a whole.
+        """
+        job = BookingImportService.create_job(filename, os.devnull, user_id, chunk_size)
+        path = os.path.join(import_dir(), f'{job.id}.csv')
+        
+        with open(path, 'wb') as target:
+            shutil.copyfileobj(stream, target)
+        
+        job.source_path = path
+        db.session.commit()
+        return job
+    
+    @staticmethod
+    def error_report_path(job: BookingImport) -> str:
+        """Path of the CSV error report of an import."""
+        return os.path.join(import_dir(), f'{job.id}-errors.csv')
+    
+    @staticmethod
+    def run(job: BookingImport,
+            on_chunk: Optional[Callable[[BookingImport], None]] = None) -> BookingImport:
+        """
+        Import the CSV file of a job, continuing after its last committed chunk.
+        
+        Args:
+            job: Pending, failed or interrupted import
+            on_chunk: Called with the job after every committed chunk
+        
+        Returns:
+            The job, 'completed' or 'failed' with its error message set
+        """
+        if job.status == 'completed':
+            return job
+        
+        job.status = 'running'
+        job.error = None
+        db.session.commit()
+        
+        report_path = BookingImportService.error_report_path(job)
+        
+        try:
+            with open(job.source_path, newline='', encoding='utf-8-sig') as source, \
+                    open(report_path, 'a', newline='', encoding='utf-8') as report:
+                # Drop report lines written by a chunk that never committed
+                report.truncate(job.error_report_size)
+                
+                reader = csv.DictReader(source)
+                missing = [field for field in REQUIRED_FIELDS if field not in (reader.fieldnames or [])]
+                if missing:
+                    job.status = 'failed'
+                    job.error = f'Missing required columns: {", ".join(missing)}'
+                    db.session.commit()
+                    return job
+                
+                writer = csv.writer(report)
+                if job.error_report_size == 0:
+                    writer.writerow(['line', 'errors'] + reader.fieldnames)
+                
+                # (line number, row) pairs, skipping rows committed by earlier runs
+                rows = islice(((reader.line_num, row) for row in reader), job.rows_processed, None)
+                
+                while True:
+                    chunk = list(islice(rows, job.chunk_size))
+                    if not chunk:
+                        break
+                    
+                    _, results = BulkBookingService.insert_bookings(
+                        [_booking_payload(row) for _, row in chunk], job.created_by, BEST_EFFORT
+                    )
+                    
+                    failed = 0
+                    for (line, row), result in zip(chunk, results):
+                        if result['status'] == 'error':
+                            failed += 1
+                            writer.writerow([line, '; '.join(result['errors'])] +
+                                            [row.get(field) for field in reader.fieldnames])
+                    report.flush()
+                    
+                    job.rows_processed += len(chunk)
+                    job.rows_imported += len(chunk) - failed
+                    job.rows_failed += failed
+                    job.error_report_size = os.fstat(report.fileno()).st_size
+                    db.session.commit()
+                    
+                    if on_chunk:
+                        on_chunk(job)
+            
+            job.status = 'completed'
+            db.session.commit()
+        
+        except Exception as e:
+            # Progress of committed chunks survives the rollback
+            db.session.rollback()
+            job.status = 'failed'
+            job.error = str(e)
+            db.session.commit()
+        
+        return job
@@ -0,0 +1,132 @@
+"""Keyset (cursor) pagination for booking lists.
+
+A page is located by the sort key and id of the last booking on the previous
+page rather than by an OFFSET, so every page is an index range read of the
+same cost. The position is handed to clients as an opaque cursor token.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+from sqlalchemy import Float, Numeric, DateTime, String, literal, tuple_, type_coerce
+from app.models.booking import Booking
+
+
+def _key_expression(column):
+    """Expression whose value is stored in cursors for the given sort column."""
+    # Read money as the stored float so cursors compare exactly against it
+    if isinstance(column.type, Numeric) and not isinstance(column.type, Float):
+        return type_coerce(column, Float)
+    return column
+
+
+def encode_cursor(sort_by: str, descending: bool, value: Any, booking_id: int) -> str:
+    """Build an opaque cursor for the position after (value, booking_id)."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort_by, 'desc' if descending else 'asc', value, booking_id],
+                         separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str, sort_by: str, descending: bool) -> Tuple[Any, int]:
+    """
+    Decode a cursor produced by encode_cursor for the same sort.
+    
+    Returns:
+        Tuple of (sort key value, booking id)
+    
+    Raises:
+        ValueError: If the token is malformed or belongs to another sort order
+    """
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        cursor_sort, cursor_order, value, booking_id = json.loads(payload)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor.')
+    
+    if cursor_sort != sort_by or cursor_order != ('desc' if descending else 'asc'):
+        raise ValueError('Cursor does not match the requested sort order.')
+    if not isinstance(booking_id, int) or isinstance(booking_id, bool):
+        raise ValueError('Invalid cursor.')
+    
+    column_type = getattr(Booking, sort_by).type
+    if isinstance(column_type, DateTime):
+        try:
+            value = datetime.fromisoformat(value)
+        except (ValueError, TypeError):
+            raise ValueError('Invalid cursor.')
+    elif isinstance(column_type, Numeric):
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise ValueError('Invalid cursor.')
+        # Compared against the stored float, like the key it was encoded from
+        value = float(value)
+    elif isinstance(column_type, String):
+        if not isinstance(value, str):
+            raise ValueError('Invalid cursor.')
+    
+    return value, booking_id
+
+
+def keyset_paginate(query, sort_by: str, descending: bool,
+                    after: Optional[str] = None,
+                    per_page: int = 50,
+                    include_total: bool = False,
+                    model=Booking) -> Dict[str, Any]:
+    """
+    Fetch one page of a Booking query in (sort column, id) order.
+    
+    Args:
+        query: Filtered, unordered SQLAlchemy query over the Booking entity
+               or over selected Booking columns
+        sort_by: Name of the Booking column to sort by
+        descending: Sort direction
+        after: Cursor returned with the previous page, or None for the first page
+        per_page: Maximum number of bookings on the page
+        include_total: Also count all bookings matching the query
+        model: Booking entity the query reads
+    
+    Returns:
+        Dictionary with 'items' (Booking objects, or result rows for column
+        queries), 'next_cursor', 'has_next' and 'total' (None unless
+        include_total is set)
+    
+    Raises:
+        ValueError: If the cursor is invalid
+    """
+    column = getattr(model, sort_by)
+    key = _key_expression(column)
+    entity_query = [entry['expr'] for entry in query.column_descriptions] == [model]
+    
+    total = query.order_by(None).count() if include_total else None
+    
+    if after:
+        value, last_id = decode_cursor(after, sort_by, descending)
+        position = tuple_(literal(value, key.type), literal(last_id))
+        if descending:
+            query = query.filter(tuple_(column, model.id) < position)
+        else:
+            query = query.filter(tuple_(column, model.id) > position)
+    
+    if descending:
+        query = query.order_by(column.desc(), model.id.desc())
+    else:
+        query = query.order_by(column.asc(), model.id.asc())
+    
+    rows = query.add_columns(
+        key.label('cursor_key'), model.id.label('cursor_id')
+    ).limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    
+    next_cursor = None
+    if has_next:
+        last = rows[-1]._mapping
+        next_cursor = encode_cursor(sort_by, descending, last['cursor_key'], last['cursor_id'])
+    
+    return {
+        'items': [row[0] for row in rows] if entity_query else rows,
+        'next_cursor': next_cursor,
+        'has_next': has_next,
+        'total': total
+    }
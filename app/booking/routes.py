@@ -1,10 +1,22 @@
 """Booking management API routes."""
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, send_file
+import os
 from datetime import datetime
-from sqlalchemy import or_, and_
+from sqlalchemy import and_, select
 from app import db
 from app.models import Booking, User
 from app.auth.auth_service import token_required, auth_required
+from app.booking.write_hooks import snapshot_booking, record_booking_write
+from app.booking.search_index import apply_search
+from app.booking.pagination import keyset_paginate
+from app.booking.serializers import parse_fields, compile_serializer
+from app.booking.bulk_service import BulkBookingService, BULK_MODES, ATOMIC
+from app.booking.import_service import BookingImportService
+from app.booking.sync_service import BookingSyncService
+from app.booking.counter_service import BookingCounterService
+from app.booking.events import event_stream_response
+from app.booking.archive_service import bookings_with_archived
+from app.models.booking_import import BookingImport
 
 booking_bp = Blueprint('booking', __name__)
 
@@ -12,7 +24,16 @@ booking_bp = Blueprint('booking', __name__)
 @booking_bp.route('/', methods=['GET'])
 @auth_required(['admin', 'sales_person'])
 def get_bookings():
-    """Get all bookings with optional search and filtering."""
+    """
+    Get all bookings with optional search and filtering.
+    
+    Pages are addressed by page number by default. Passing pagination=cursor
+    (first page) or an after=<next_cursor> token switches to keyset
+    pagination, where every page costs the same and the total is only
+    counted when include_total=true. fields=a,b,c returns only those fields,
+    read as plain rows instead of ORM objects. Archived bookings are left
+    out unless include_archived=true.
+    """
     try:
         # Get query parameters
         page = request.args.get('page', 1, type=int)
@@ -33,59 +54,118 @@ def get_bookings():
         sort_by = request.args.get('sort_by', 'created_at')
         sort_order = request.args.get('sort_order', 'desc')
         
+        # Archived bookings live in a separate table
+        include_archived = request.args.get('include_archived', 'false').lower() == 'true'
+        source = bookings_with_archived() if include_archived else Booking
+        
+        # Sparse fieldset
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         # Build query
-        query = Booking.query
+        query = db.session.query(source)
         
-        # Apply search filters
+        # Apply search filters (full-text index where available)
         if search:
-            search_filter = or_(
-                Booking.customer_name.ilike(f'%{search}%'),
-                Booking.project_name.ilike(f'%{search}%'),
-                Booking.contact_number.ilike(f'%{search}%'),
-                Booking.type.ilike(f'%{search}%'),
-                Booking.invoice_status.ilike(f'%{search}%')
-            )
-            query = query.filter(search_filter)
+            query = apply_search(query, search, model=source)
         
         # Apply specific filters
         if project_name:
-            query = query.filter(Booking.project_name.ilike(f'%{project_name}%'))
+            query = query.filter(source.project_name.ilike(f'%{project_name}%'))
         
         if customer_name:
-            query = query.filter(Booking.customer_name.ilike(f'%{customer_name}%'))
+            query = query.filter(source.customer_name.ilike(f'%{customer_name}%'))
         
         if status and status in ['active', 'complete', 'cancelled']:
-            query = query.filter(Booking.status == status)
+            query = query.filter(source.status == status)
         
         if property_type:
-            query = query.filter(Booking.type.ilike(f'%{property_type}%'))
+            query = query.filter(source.type.ilike(f'%{property_type}%'))
         
         # Date range filtering
         if start_date:
             try:
                 start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-                query = query.filter(Booking.created_at >= start_dt)
+                query = query.filter(source.created_at >= start_dt)
             except ValueError:
                 return jsonify({'error': 'Invalid start_date format. Use ISO format.'}), 400
         
         if end_date:
             try:
                 end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-                query = query.filter(Booking.created_at <= end_dt)
+                query = query.filter(source.created_at <= end_dt)
             except ValueError:
                 return jsonify({'error': 'Invalid end_date format. Use ISO format.'}), 400
         
-        # Apply sorting
+        serialize = Booking.to_dict
+        if fields:
+            columns, serialize = compile_serializer(fields, source)
+            query = query.with_entities(*columns)
+        
         valid_sort_fields = ['created_at', 'updated_at', 'customer_name', 'project_name', 
                            'amount', 'timeline', 'status']
+        
+        filters_applied = {
+            'search': search,
+            'project_name': project_name,
+            'customer_name': customer_name,
+            'status': status,
+            'type': property_type,
+            'start_date': start_date,
+            'end_date': end_date,
+            'sort_by': sort_by,
+            'sort_order': sort_order,
+            'include_archived': include_archived
+        }
+        
+        # Read before the bookings, so changes racing this request are
+        # picked up by the client's next delta sync
+        sync_token = BookingSyncService.current_token()
+        
+        # Keyset pagination
+        if 'after' in request.args or request.args.get('pagination') == 'cursor':
+            if sort_by in valid_sort_fields:
+                sort_field, descending = sort_by, sort_order.lower() == 'desc'
+            else:
+                sort_field, descending = 'created_at', True
+            
+            try:
+                page_data = keyset_paginate(
+                    query, sort_field, descending,
+                    after=request.args.get('after') or None,
+                    per_page=per_page,
+                    include_total=request.args.get('include_total', 'false').lower() == 'true',
+                    model=source
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            pagination_info = {
+                'per_page': per_page,
+                'next_cursor': page_data['next_cursor'],
+                'has_next': page_data['has_next']
+            }
+            if page_data['total'] is not None:
+                pagination_info['total'] = page_data['total']
+            
+            return jsonify({
+                'bookings': [serialize(item) for item in page_data['items']],
+                'pagination': pagination_info,
+                'filters_applied': filters_applied,
+                'sync_token': sync_token
+            }), 200
+        
+        # Apply sorting
         if sort_by in valid_sort_fields:
-            sort_column = getattr(Booking, sort_by)
+            sort_column = getattr(source, sort_by)
             if sort_order.lower() == 'desc':
                 query = query.order_by(sort_column.desc())
             else:
                 query = query.order_by(sort_column.asc())
         else:
-            query = query.order_by(Booking.created_at.desc())
+            query = query.order_by(source.created_at.desc())
         
         # Execute paginated query
         pagination = query.paginate(
@@ -94,7 +174,7 @@ def get_bookings():
             error_out=False
         )
         
-        bookings = [booking.to_dict() for booking in pagination.items]
+        bookings = [serialize(item) for item in pagination.items]
         
         return jsonify({
             'bookings': bookings,
@@ -106,35 +186,101 @@ def get_bookings():
                 'has_next': pagination.has_next,
                 'has_prev': pagination.has_prev
             },
-            'filters_applied': {
-                'search': search,
-                'project_name': project_name,
-                'customer_name': customer_name,
-                'status': status,
-                'type': property_type,
-                'start_date': start_date,
-                'end_date': end_date,
-                'sort_by': sort_by,
-                'sort_order': sort_order
-            }
+            'filters_applied': filters_applied,
+            'sync_token': sync_token
         }), 200
         
     except Exception as e:
         return jsonify({'error': 'Internal server error'}), 500
 
 
+@booking_bp.route('/changes', methods=['GET'])
+@auth_required(['admin', 'sales_person'])
+def get_booking_changes():
+    """
+    Get the bookings changed since a sync token.
+    
+    Returns bookings inserted or updated (including cancellations) after the
+    since=<sync_token> position in their current state, the ids of bookings
+    deleted since then, and the token to pass next time. Without since, only
+    the current token is returned. A token older than the retained change
+    log gets 410 Gone, and the client must reload the full list.
+    """
+    try:
+        limit = max(1, min(request.args.get('limit', 500, type=int), 1000))
+        since = request.args.get('since')
+        
+        if not since:
+            return jsonify({
+                'bookings': [],
+                'deleted': [],
+                'sync_token': BookingSyncService.current_token(),
+                'has_more': False
+            }), 200
+        
+        try:
+            since = BookingSyncService.parse_token(since)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if BookingSyncService.token_expired(since):
+            return jsonify({'error': 'Sync token expired. Reload all bookings.'}), 410
+        
+        changes = BookingSyncService.changes_since(since, limit)
+        
+        return jsonify({
+            'bookings': [booking.to_dict() for booking in changes['bookings']],
+            'deleted': changes['deleted'],
+            'sync_token': changes['sync_token'],
+            'has_more': changes['has_more']
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@booking_bp.route('/events', methods=['GET'])
+@auth_required(['admin', 'sales_person'])
+def booking_event_stream():
+    """
+    Stream booking changes as Server-Sent Events.
+    
+    Sends a 'bookings' event with the compact changed bookings, deleted ids
+    and new sync token after every committed write, from any worker.
+    Reconnecting clients resume from their Last-Event-ID.
+    """
+    try:
+        return event_stream_response()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
+
 @booking_bp.route('/<int:booking_id>', methods=['GET'])
 @auth_required(['admin', 'sales_person'])
 def get_booking(booking_id):
-    """Get a specific booking by ID."""
+    """Get a specific booking by ID, optionally limited to the requested fields."""
     try:
-        booking = Booking.query.get(booking_id)
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if fields:
+            columns, serialize = compile_serializer(fields)
+            booking = db.session.execute(
+                select(*columns).where(Booking.id == booking_id)
+            ).first()
+        else:
+            serialize = Booking.to_dict
+            booking = Booking.query.get(booking_id)
         
         if not booking:
             return jsonify({'error': 'Booking not found'}), 404
         
         return jsonify({
-            'booking': booking.to_dict()
+            'booking': serialize(booking)
         }), 200
         
     except Exception as e:
@@ -208,6 +354,7 @@ def create_booking():
         
         # Save to database
         db.session.add(booking)
+        record_booking_write(None, booking)
         db.session.commit()
         
         return jsonify({
@@ -245,6 +392,7 @@ def update_booking(booking_id):
                 return jsonify({'error': 'Invalid timeline format. Use ISO format.'}), 400
         
         # Update booking from data
+        before = snapshot_booking(booking)
         booking.update_from_dict(data)
         
         # Validate updated booking
@@ -256,6 +404,7 @@ def update_booking(booking_id):
             }), 400
         
         # Save changes
+        record_booking_write(before, booking)
         db.session.commit()
         
         return jsonify({
@@ -270,6 +419,201 @@ def update_booking(booking_id):
         return jsonify({'error': 'Internal server error'}), 500
 
 
+def _bulk_request():
+    """
+    Read the bookings list and mode of a bulk request body.
+    
+    Returns:
+        Tuple of (rows, mode, error response or None)
+    """
+    data = request.get_json(silent=True)
+    
+    if not isinstance(data, dict) or not isinstance(data.get('bookings'), list):
+        return None, None, (jsonify({'error': 'Request body must be JSON with a bookings list'}), 400)
+    
+    rows = data['bookings']
+    if not rows:
+        return None, None, (jsonify({'error': 'No bookings provided'}), 400)
+    
+    max_rows = current_app.config.get('BULK_MAX_ROWS', 1000)
+    if len(rows) > max_rows:
+        return None, None, (jsonify({'error': f'At most {max_rows} bookings per request'}), 400)
+    
+    mode = data.get('mode', ATOMIC)
+    if mode not in BULK_MODES:
+        return None, None, (jsonify({'error': f'Mode must be one of: {", ".join(BULK_MODES)}'}), 400)
+    
+    return rows, mode, None
+
+
+@booking_bp.route('/bulk', methods=['POST'])
+@auth_required(['admin', 'sales_person'])
+def bulk_create_bookings():
+    """
+    Create many bookings in one transaction.
+    
+    Body: {"bookings": [...], "mode": "atomic" | "best_effort"}. Every row is
+    validated like POST /api/bookings. In atomic mode (the default) nothing
+    is written unless all rows are valid; in best_effort mode the valid rows
+    are written and the invalid ones reported.
+    """
+    try:
+        rows, mode, error = _bulk_request()
+        if error:
+            return error
+        
+        written, results = BulkBookingService.create_bookings(
+            rows, request.current_user['user_id'], mode
+        )
+        failed = sum(1 for result in results if result['status'] == 'error')
+        
+        return jsonify({
+            'message': 'Bookings created successfully' if written else 'No bookings were created',
+            'mode': mode,
+            'created': sum(1 for result in results if result['status'] == 'created'),
+            'failed': failed,
+            'results': results
+        }), 201 if written else 400
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@booking_bp.route('/bulk', methods=['PATCH'])
+@auth_required(['admin', 'sales_person'])
+def bulk_update_bookings():
+    """
+    Update many bookings in one transaction.
+    
+    Body: {"bookings": [{"id": ..., <changed fields>}, ...], "mode": ...},
+    with the same atomic and best_effort semantics as bulk creation.
+    """
+    try:
+        rows, mode, error = _bulk_request()
+        if error:
+            return error
+        
+        written, results = BulkBookingService.update_bookings(rows, mode)
+        failed = sum(1 for result in results if result['status'] == 'error')
+        
+        return jsonify({
+            'message': 'Bookings updated successfully' if written else 'No bookings were updated',
+            'mode': mode,
+            'updated': sum(1 for result in results if result['status'] == 'updated'),
+            'failed': failed,
+            'results': results
+        }), 200 if written else 400
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@booking_bp.route('/import', methods=['POST'])
+@auth_required(['admin', 'sales_person'])
+def import_bookings():
+    """
+    Import bookings from an uploaded CSV file.
+    
+    The multipart 'file' field holds a CSV whose header uses the booking
+    field names of POST /api/bookings. Rows are validated and committed in
+    chunks of chunk_size; invalid rows are skipped and listed in the error
+    report at /api/bookings/imports/<id>/errors. A failed import can be
+    continued with POST /api/bookings/imports/<id>/resume.
+    """
+    try:
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            return jsonify({'error': 'A CSV file is required'}), 400
+        
+        chunk_size = request.form.get('chunk_size', type=int)
+        if chunk_size is not None and chunk_size < 1:
+            return jsonify({'error': 'chunk_size must be positive'}), 400
+        
+        job = BookingImportService.save_upload(
+            upload.stream, upload.filename, request.current_user['user_id'], chunk_size
+        )
+        job = BookingImportService.run(job)
+        
+        if job.status != 'completed':
+            return jsonify({'error': f'Import failed: {job.error}', 'import': job.to_dict()}), 400
+        
+        return jsonify({
+            'message': 'Import completed',
+            'import': job.to_dict()
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@booking_bp.route('/imports/<int:import_id>', methods=['GET'])
+@auth_required(['admin', 'sales_person'])
+def get_import(import_id):
+    """Get the progress of a CSV import."""
+    try:
+        job = db.session.get(BookingImport, import_id)
+        
+        if not job:
+            return jsonify({'error': 'Import not found'}), 404
+        
+        return jsonify({'import': job.to_dict()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@booking_bp.route('/imports/<int:import_id>/resume', methods=['POST'])
+@auth_required(['admin', 'sales_person'])
+def resume_import(import_id):
+    """Continue a failed or interrupted CSV import after its last committed chunk."""
+    try:
+        job = db.session.get(BookingImport, import_id)
+        
+        if not job:
+            return jsonify({'error': 'Import not found'}), 404
+        
+        if job.status == 'completed':
+            return jsonify({'error': 'Import already completed'}), 400
+        
+        job = BookingImportService.run(job)
+        
+        if job.status != 'completed':
+            return jsonify({'error': f'Import failed: {job.error}', 'import': job.to_dict()}), 400
+        
+        return jsonify({
+            'message': 'Import completed',
+            'import': job.to_dict()
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@booking_bp.route('/imports/<int:import_id>/errors', methods=['GET'])
+@auth_required(['admin', 'sales_person'])
+def download_import_errors(import_id):
+    """Download the CSV report of rows rejected by an import."""
+    try:
+        job = db.session.get(BookingImport, import_id)
+        
+        if not job:
+            return jsonify({'error': 'Import not found'}), 404
+        
+        path = BookingImportService.error_report_path(job)
+        if not os.path.exists(path):
+            return jsonify({'error': 'No error report for this import'}), 404
+        
+        return send_file(path, mimetype='text/csv', as_attachment=True,
+                         download_name=f'booking-import-{job.id}-errors.csv')
+    
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
+
 @booking_bp.route('/<int:booking_id>', methods=['DELETE'])
 @auth_required(['admin', 'sales_person'])
 def delete_booking(booking_id):
@@ -285,9 +629,11 @@ def delete_booking(booking_id):
             return jsonify({'error': 'Booking is already cancelled'}), 400
         
         # Soft delete by changing status to cancelled
+        before = snapshot_booking(booking)
         booking.status = 'cancelled'
         booking.updated_at = datetime.utcnow()
         
+        record_booking_write(before, booking)
         db.session.commit()
         
         return jsonify({
@@ -314,7 +660,9 @@ def hard_delete_booking(booking_id):
         booking_data = booking.to_dict()
         
         # Permanently delete from database
+        before = snapshot_booking(booking)
         db.session.delete(booking)
+        record_booking_write(before, None)
         db.session.commit()
         
         return jsonify({
@@ -330,30 +678,35 @@ def hard_delete_booking(booking_id):
 @booking_bp.route('/search', methods=['GET'])
 @auth_required(['admin', 'sales_person'])
 def search_bookings():
-    """Advanced search endpoint for bookings."""
+    """Advanced search endpoint for bookings (include_archived=true to search archived ones too)."""
     try:
         # Get search parameters
         query_text = request.args.get('q', '').strip()
+        include_archived = request.args.get('include_archived', 'false').lower() == 'true'
+        source = bookings_with_archived() if include_archived else Booking
         
         if not query_text:
             return jsonify({'error': 'Search query parameter "q" is required'}), 400
         
-        # Perform search across multiple fields
-        search_filter = or_(
-            Booking.customer_name.ilike(f'%{query_text}%'),
-            Booking.project_name.ilike(f'%{query_text}%'),
-            Booking.contact_number.ilike(f'%{query_text}%'),
-            Booking.type.ilike(f'%{query_text}%'),
-            Booking.invoice_status.ilike(f'%{query_text}%')
-        )
-        
-        bookings = Booking.query.filter(search_filter).order_by(
-            Booking.created_at.desc()
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Perform search across multiple fields, best matches first
+        query = apply_search(db.session.query(source), query_text, rank=True, model=source)
+        serialize = Booking.to_dict
+        if fields:
+            columns, serialize = compile_serializer(fields, source)
+            query = query.with_entities(*columns)
+        
+        bookings = query.order_by(
+            source.created_at.desc()
         ).limit(50).all()  # Limit to 50 results for performance
         
         return jsonify({
             'query': query_text,
-            'results': [booking.to_dict() for booking in bookings],
+            'results': [serialize(booking) for booking in bookings],
             'count': len(bookings)
         }), 200
         
@@ -364,32 +717,9 @@ def search_bookings():
 @booking_bp.route('/stats', methods=['GET'])
 @auth_required(['admin', 'sales_person'])
 def get_booking_stats():
-    """Get basic booking statistics."""
+    """Get basic booking statistics from the maintained booking counters."""
     try:
-        # Get total counts by status
-        total_bookings = Booking.query.count()
-        active_bookings = Booking.query.filter_by(status='active').count()
-        completed_bookings = Booking.query.filter_by(status='complete').count()
-        cancelled_bookings = Booking.query.filter_by(status='cancelled').count()
-        
-        # Get total revenue (sum of amounts for active and completed bookings)
-        from sqlalchemy import func
-        revenue_result = db.session.query(
-            func.sum(Booking.amount)
-        ).filter(
-            Booking.status.in_(['active', 'complete'])
-        ).scalar()
-        
-        total_revenue = float(revenue_result) if revenue_result else 0.0
-        
-        return jsonify({
-            'total_bookings': total_bookings,
-            'active_bookings': active_bookings,
-            'completed_bookings': completed_bookings,
-            'cancelled_bookings': cancelled_bookings,
-            'total_revenue': total_revenue,
-            'completion_rate': (completed_bookings / total_bookings * 100) if total_bookings > 0 else 0
-        }), 200
+        return jsonify(BookingCounterService.get_stats()), 200
         
     except Exception as e:
         return jsonify({'error': 'Internal server error'}), 500
\ No newline at end of file
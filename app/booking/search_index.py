@@ -0,0 +1,151 @@
+"""Full-text search over bookings.
+
+On SQLite builds with FTS5 the searchable booking columns are mirrored into
+an external-content FTS5 table, bookings_fts, which triggers keep in sync with
+every insert, update and delete on bookings (ORM or raw SQL alike). Searches
+become prefix queries against that index, ranked by bm25. Other backends, or
+SQLite builds without FTS5, fall back to ILIKE matching.
+"""
+import re
+from flask import current_app
+from sqlalchemy import event, or_, text, table, column
+from app import db
+from app.models.booking import Booking
+
+# Booking columns mirrored into the full-text index
+SEARCH_COLUMNS = ('customer_name', 'project_name', 'contact_number', 'type', 'invoice_status')
+
+FTS_TABLE = 'bookings_fts'
+
+_COLUMN_LIST = ', '.join(SEARCH_COLUMNS)
+_NEW_VALUES = ', '.join(f'new.{name}' for name in SEARCH_COLUMNS)
+_OLD_VALUES = ', '.join(f'old.{name}' for name in SEARCH_COLUMNS)
+
+_CREATE_STATEMENTS = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    f"{_COLUMN_LIST}, content='bookings', content_rowid='id', prefix='2 3')",
+    f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON bookings BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_COLUMN_LIST}) VALUES (new.id, {_NEW_VALUES}); END",
+    f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON bookings BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMN_LIST}) VALUES ('delete', old.id, {_OLD_VALUES}); END",
+    f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF {_COLUMN_LIST} ON bookings BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMN_LIST}) VALUES ('delete', old.id, {_OLD_VALUES}); "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_COLUMN_LIST}) VALUES (new.id, {_NEW_VALUES}); END"
+]
+
+_DROP_STATEMENTS = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}"
+]
+
+_fts = table(FTS_TABLE, column('rowid'))
+
+
+def fts5_supported(connection) -> bool:
+    """Check whether the connected database can host an FTS5 index."""
+    if connection.dialect.name != 'sqlite':
+        return False
+    return bool(connection.exec_driver_sql("SELECT sqlite_compileoption_used('ENABLE_FTS5')").scalar())
+
+
+def create_search_index(connection, rebuild: bool = False) -> bool:
+    """
+    Create the FTS5 table and its triggers if they are missing.
+    
+    A newly created index is filled from the existing bookings.
+    
+    Args:
+        connection: Connection to create the index on
+        rebuild: Repopulate the index even if it already existed
+    
+    Returns:
+        True if the database has a full-text index, False if unsupported
+    """
+    if not fts5_supported(connection):
+        return False
+    
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+    ).first()
+    if not exists:
+        for statement in _CREATE_STATEMENTS:
+            connection.exec_driver_sql(statement)
+        rebuild = True
+    
+    if rebuild:
+        connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    
+    return True
+
+
+def drop_search_index(connection):
+    """Drop the FTS5 table and its triggers, if the database has them."""
+    if connection.dialect.name == 'sqlite':
+        for statement in _DROP_STATEMENTS:
+            connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Booking.__table__, 'after_create')
+def _create_after_bookings(target, connection, **kw):
+    """Create the full-text index together with the bookings table."""
+    create_search_index(connection)
+
+
+@event.listens_for(Booking.__table__, 'before_drop')
+def _drop_before_bookings(target, connection, **kw):
+    """Drop the full-text index before the bookings table it mirrors."""
+    drop_search_index(connection)
+
+
+def fts_enabled() -> bool:
+    """Check whether the application database has the full-text index."""
+    app = current_app._get_current_object()
+    enabled = app.extensions.get('booking_fts')
+    if enabled is None:
+        connection = db.session.connection()
+        enabled = fts5_supported(connection) and connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+        ).first() is not None
+        app.extensions['booking_fts'] = enabled
+    return enabled
+
+
+def fts_query(term: str) -> str:
+    """
+    Turn free text into an FTS5 query matching every word as a prefix.
+    
+    Returns:
+        FTS5 query string, or '' if the term has no searchable words
+    """
+    words = re.findall(r'[^\W_]+', term)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def apply_search(query, term: str, rank: bool = False, model=Booking):
+    """
+    Restrict a Booking query to bookings matching a search term.
+    
+    Args:
+        query: SQLAlchemy query over Booking
+        term: Free-text search term
+        rank: Order results by bm25 relevance (full-text index only)
+        model: Booking entity the query reads; only Booking itself is
+               covered by the full-text index
+    
+    Returns:
+        Modified query with the search applied
+    """
+    match = fts_query(term)
+    if match and model is Booking and fts_enabled():
+        query = query.join(_fts, _fts.c.rowid == Booking.id).filter(
+            text(f'{FTS_TABLE} MATCH :booking_search').bindparams(booking_search=match)
+        )
+        if rank:
+            query = query.order_by(text(f'bm25({FTS_TABLE})'))
+        return query
+    
+    return query.filter(or_(*[
+        getattr(model, name).ilike(f'%{term}%') for name in SEARCH_COLUMNS
+    ]))
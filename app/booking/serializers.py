@@ -0,0 +1,104 @@
+"""Sparse-fieldset serialization of bookings straight from result rows.
+
+A `fields=` request selects only the columns its fields need and serializes
+the returned rows without building ORM objects. The output of every field is
+identical to the corresponding Booking.to_dict() entry. Serializers are
+compiled once per distinct field set and reused.
+"""
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple, Callable
+from app.models.booking import Booking
+
+_MONEY_FIELDS = ('agreement_cost', 'amount', 'tax_gst', 'refund_buyer',
+                 'refund_referral', 'onc_trust_fund', 'oncct_funded')
+_DATETIME_FIELDS = ('timeline', 'created_at', 'updated_at')
+_PLAIN_FIELDS = ('id', 'customer_name', 'contact_number', 'project_name', 'type',
+                 'invoice_status', 'loan_req', 'status', 'created_by')
+
+
+def _identity(value):
+    """Return a column value unchanged."""
+    return value
+
+
+def _isoformat(value):
+    """Format a datetime column like Booking.to_dict()."""
+    return value.isoformat() if value else None
+
+
+def _sum_as_float(first, second):
+    """Add two money columns as floats, like the Booking total properties."""
+    return float(first) + float(second)
+
+
+# Field name -> (columns it reads, conversion applied to those column values)
+FIELD_DEFINITIONS = {
+    **{name: ((name,), _identity) for name in _PLAIN_FIELDS},
+    **{name: ((name,), float) for name in _MONEY_FIELDS + ('area',)},
+    **{name: ((name,), _isoformat) for name in _DATETIME_FIELDS},
+    'total_amount': (('amount', 'tax_gst'), _sum_as_float),
+    'net_refund': (('refund_buyer', 'refund_referral'), _sum_as_float)
+}
+
+
+def parse_fields(value: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Parse a comma-separated fields parameter.
+    
+    Returns:
+        Tuple of field names in request order, or None if no fields were given
+    
+    Raises:
+        ValueError: If a field name is unknown
+    """
+    if not value or not value.strip():
+        return None
+    
+    fields = []
+    for name in value.split(','):
+        name = name.strip()
+        if name and name not in fields:
+            fields.append(name)
+    
+    unknown = [name for name in fields if name not in FIELD_DEFINITIONS]
+    if unknown:
+        raise ValueError(f'Unknown fields: {", ".join(unknown)}')
+    
+    return tuple(fields) or None
+
+
+@lru_cache(maxsize=64)
+def compile_serializer(fields: Tuple[str, ...], model=Booking) -> Tuple[List, Callable[[Any], Dict[str, Any]]]:
+    """
+    Build the column list and row serializer for a field set.
+    
+    Args:
+        fields: Field names, as returned by parse_fields
+        model: Booking entity to select the columns from
+    
+    Returns:
+        Tuple of (Booking columns to select, function turning a result row
+        whose leading columns are those columns into a dictionary)
+    """
+    column_names = []
+    for name in fields:
+        for column_name in FIELD_DEFINITIONS[name][0]:
+            if column_name not in column_names:
+                column_names.append(column_name)
+    
+    single, paired = [], []
+    for name in fields:
+        sources, convert = FIELD_DEFINITIONS[name]
+        positions = [column_names.index(column_name) for column_name in sources]
+        if len(positions) == 1:
+            single.append((name, positions[0], convert))
+        else:
+            paired.append((name, positions[0], positions[1], convert))
+    
+    def serialize(row) -> Dict[str, Any]:
+        data = {name: convert(row[position]) for name, position, convert in single}
+        for name, first, second, convert in paired:
+            data[name] = convert(row[first], row[second])
+        return data
+    
+    return [getattr(model, name) for name in column_names], serialize
@@ -0,0 +1,147 @@
+"""Delta sync of bookings through the booking change log.
+
+Every booking write appends (booking id, operation) entries to
+booking_changes in the same transaction as the write itself. A sync token is
+the sequence number of the last entry a client has seen; the bookings changed
+after it are returned in their current state, and hard-deleted ones as
+tombstone ids.
+
+That only works if change log ids follow commit order: otherwise a client
+could receive a token past an entry that commits later with a lower id, and
+never see that change. SQLite has one writer at a time, so it holds by
+construction. PostgreSQL assigns ids at insert time, so writers of the change
+log take a transaction-scoped advisory lock first, which serializes them from
+that point until they commit.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Iterable, Tuple
+from sqlalchemy import func, insert, delete, text
+from app import db
+from app.models.booking import Booking
+from app.models.booking_change import BookingChange
+
+# PostgreSQL advisory lock key serializing change log writers
+CHANGE_LOG_LOCK_KEY = 2026101501
+
+
+class BookingSyncService:
+    """Service class for the booking change log and delta sync."""
+    
+    @staticmethod
+    def record_changes(changes: Iterable[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]):
+        """
+        Append booking changes to the change log in the current transaction.
+        
+        Args:
+            changes: (before, after) booking snapshots, as passed to
+                     record_booking_changes
+        """
+        now = datetime.utcnow()
+        entries = []
+        for before, after in changes:
+            if before is None:
+                operation = 'insert'
+            elif after is None:
+                operation = 'delete'
+            else:
+                operation = 'update'
+            entries.append({
+                'booking_id': (after or before)['id'],
+                'operation': operation,
+                'changed_at': now
+            })
+        
+        if entries:
+            # Held until commit, so ids are handed out in commit order
+            if db.session.get_bind().dialect.name == 'postgresql':
+                db.session.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': CHANGE_LOG_LOCK_KEY})
+            db.session.execute(insert(BookingChange), entries)
+    
+    @staticmethod
+    def current_token() -> str:
+        """Sync token for the latest change."""
+        return str(db.session.query(func.max(BookingChange.id)).scalar() or 0)
+    
+    @staticmethod
+    def parse_token(token: str) -> int:
+        """
+        Parse a sync token.
+        
+        Raises:
+            ValueError: If the token is malformed
+        """
+        if not token.isdigit():
+            raise ValueError('Invalid sync token.')
+        return int(token)
+    
+    @staticmethod
+    def token_expired(since: int) -> bool:
+        """Check whether changes after a token have been pruned from the log."""
+        oldest = db.session.query(func.min(BookingChange.id)).scalar()
+        return oldest is not None and since < oldest - 1
+    
+    @staticmethod
+    def changes_since(since: int, limit: int = 500) -> Dict[str, Any]:
+        """
+        Get the bookings changed after a sync token.
+        
+        A booking changed several times is returned once, in its current
+        state. Applying the same changes twice is harmless, so a client may
+        simply retry with its previous token.
+        
+        Args:
+            since: Sequence number from a previous sync token
+            limit: Maximum number of change log entries to consume
+        
+        Returns:
+            Dictionary with 'bookings' (current Booking objects), 'deleted'
+            (ids of removed bookings), 'sync_token' and 'has_more'
+        """
+        entries = db.session.query(
+            BookingChange.id, BookingChange.booking_id, BookingChange.operation
+        ).filter(BookingChange.id > since).order_by(BookingChange.id).limit(limit + 1).all()
+        
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        
+        latest = {}
+        for entry in entries:
+            latest[entry.booking_id] = entry.operation
+        
+        changed_ids = [booking_id for booking_id, operation in latest.items() if operation != 'delete']
+        bookings = Booking.query.filter(Booking.id.in_(changed_ids)).order_by(Booking.id).all() if changed_ids else []
+        
+        # Bookings deleted after this batch count as deleted already
+        found = {booking.id for booking in bookings}
+        deleted = sorted(booking_id for booking_id in latest if booking_id not in found)
+        
+        return {
+            'bookings': bookings,
+            'deleted': deleted,
+            'sync_token': str(entries[-1].id) if entries else str(since),
+            'has_more': has_more
+        }
+    
+    @staticmethod
+    def prune(days: int) -> int:
+        """
+        Delete change log entries older than the given number of days.
+        
+        The latest entry is always kept, so that tokens older than the
+        pruned range can still be recognised as expired.
+        
+        Returns:
+            Number of entries deleted
+        """
+        latest = db.session.query(func.max(BookingChange.id)).scalar()
+        if latest is None:
+            return 0
+        
+        result = db.session.execute(
+            delete(BookingChange).where(
+                BookingChange.changed_at < datetime.utcnow() - timedelta(days=days),
+                BookingChange.id < latest
+            )
+        )
+        db.session.commit()
+        return result.rowcount
@@ -0,0 +1,102 @@
+"""Bookkeeping that must accompany every booking write.
+
+Derived tables (the monthly analytics rollup, the booking counters behind
+the stats endpoint and the change log read by delta sync clients) are
+updated here, in the same transaction as the booking change itself, so they
+can never drift from the bookings table on commit or rollback. Once the
+transaction commits, the bookings generation counter is bumped so cached
+analytics are invalidated, and the committed changes are fed to the
+in-memory columnar engine.
+
+Archiving a booking is a delete as far as the live tables are concerned, but
+its measures move to the archive rollup and the booking counters, which
+count archived bookings too, stay as they are.
+"""
+from typing import Dict, Any, Optional, Iterable, Tuple
+from sqlalchemy import event
+from app import db
+from app.models.booking import Booking
+from app.models.booking_rollup import BookingArchiveRollup
+from app.analytics.analytics_cache import BOOKINGS_GENERATION
+from app.analytics.columnar_engine import apply_committed_changes
+from app.analytics.rollup_service import RollupService
+from app.booking.counter_service import BookingCounterService
+from app.booking.sync_service import BookingSyncService
+from app.shared_state import get_generation_counter
+
+
+def snapshot_booking(booking: Optional[Booking]) -> Optional[Dict[str, Any]]:
+    """Capture the column values of a booking as a plain dictionary."""
+    if booking is None:
+        return None
+    return {column.key: getattr(booking, column.key) for column in Booking.__table__.columns}
+
+
+def record_booking_changes(changes: Iterable[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]):
+    """
+    Propagate booking changes to derived tables in the current transaction.
+    
+    Args:
+        changes: (before, after) booking snapshots; before is None for
+                 inserts and after is None for deletes
+    """
+    changes = [change for change in changes if change != (None, None)]
+    if not changes:
+        return
+    
+    RollupService.apply_changes(changes)
+    BookingCounterService.apply_changes(changes)
+    BookingSyncService.record_changes(changes)
+    
+    # Picked up by _after_commit once the transaction is durable
+    db.session.info.setdefault('booking_changes', []).extend(changes)
+
+
+def record_booking_archival(snapshots: Iterable[Dict[str, Any]]):
+    """
+    Propagate bookings moved to bookings_archive in the current transaction.
+    
+    Args:
+        snapshots: Snapshots of the archived bookings, as they were in the
+                   bookings table
+    """
+    snapshots = list(snapshots)
+    if not snapshots:
+        return
+    
+    removed = [(snapshot, None) for snapshot in snapshots]
+    RollupService.apply_changes(removed)
+    RollupService.apply_changes([(None, snapshot) for snapshot in snapshots], model=BookingArchiveRollup)
+    BookingSyncService.record_changes(removed)
+    
+    # Drops them from the columnar engine and invalidates cached analytics
+    db.session.info.setdefault('booking_changes', []).extend(removed)
+
+
+def record_booking_write(before: Optional[Dict[str, Any]], booking: Optional[Booking]):
+    """
+    Record a single booking write made through the ORM.
+    
+    Args:
+        before: Snapshot taken before the change, or None for a new booking
+        booking: The written booking, or None if it was deleted
+    """
+    if booking is not None:
+        # Flush so that defaults such as created_at are populated
+        db.session.flush()
+    record_booking_changes([(before, snapshot_booking(booking))])
+
+
+@event.listens_for(db.session, 'after_commit')
+def _after_commit(session):
+    """Bump the bookings generation and refresh the columnar engine after a booking commit."""
+    changes = session.info.pop('booking_changes', None)
+    if changes:
+        generation = get_generation_counter(BOOKINGS_GENERATION).bump()
+        apply_committed_changes(changes, generation)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _after_rollback(session):
+    """Forget booking changes that were rolled back."""
+    session.info.pop('booking_changes', None)
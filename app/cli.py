@@ -0,0 +1,232 @@
+"""Flask CLI commands for database maintenance."""
+import os
+import click
+from datetime import datetime
+from flask.cli import with_appcontext
+
+
+@click.command('rebuild-rollups')
+@with_appcontext
+def rebuild_rollups_command():
+    """Recompute the monthly booking rollups from the live and archived bookings."""
+    from app.analytics.rollup_service import RollupService
+    from app.models import BookingArchive, BookingArchiveRollup
+    
+    rows = RollupService.rebuild()
+    click.echo(f"Rebuilt booking_monthly_rollup: {rows} rows")
+    
+    rows = RollupService.rebuild(BookingArchive, BookingArchiveRollup)
+    click.echo(f"Rebuilt booking_archive_rollup: {rows} rows")
+
+
+@click.command('reconcile-booking-counters')
+@click.option('--fix', is_flag=True, help='Rebuild the counters if they drifted.')
+@with_appcontext
+def reconcile_booking_counters_command(fix):
+    """Compare booking_counters with a recount of the bookings table."""
+    from app.booking.counter_service import BookingCounterService
+    
+    drift = BookingCounterService.reconcile()
+    if not drift:
+        click.echo("booking_counters match the bookings table")
+        return
+    
+    for entry in drift:
+        click.echo(
+            f"{entry['status']}: stored {entry['stored_count']} bookings / {entry['stored_amount']:.2f}, "
+            f"actual {entry['actual_count']} bookings / {entry['actual_amount']:.2f}"
+        )
+    
+    if not fix:
+        raise click.ClickException(f'booking_counters drifted for {len(drift)} statuses (rerun with --fix)')
+    
+    rows = BookingCounterService.rebuild()
+    click.echo(f"Rebuilt booking_counters: {rows} rows")
+
+
+@click.command('export-bookings')
+@click.argument('output', type=click.Path(dir_okay=False))
+@click.option('--start-date', help='Only bookings created on or after this ISO date.')
+@click.option('--end-date', help='Only bookings created on or before this ISO date.')
+@click.option('--status', help='Comma-separated booking statuses.')
+@click.option('--project-name', help='Project name substring.')
+@click.option('--property-type', help='Property type substring.')
+@click.option('--customer-name', help='Customer name substring.')
+@click.option('--chunk-size', type=int, default=None, help='Rows per row group.')
+@with_appcontext
+def export_bookings_command(output, start_date, end_date, status, project_name,
+                            property_type, customer_name, chunk_size):
+    """Export bookings to a Parquet file at OUTPUT."""
+    from flask import current_app
+    from app.analytics.export_service import ExportService
+    from app.optional_imports import is_available
+    
+    if not is_available('pyarrow'):
+        raise click.ClickException('Parquet export requires pyarrow. Install it with: pip install pyarrow')
+    
+    try:
+        start_dt = datetime.fromisoformat(start_date) if start_date else None
+        end_dt = datetime.fromisoformat(end_date) if end_date else None
+    except ValueError:
+        raise click.BadParameter('Dates must be in ISO format (YYYY-MM-DDTHH:MM:SS).')
+    
+    filters = {
+        'status': [s.strip() for s in status.split(',') if s.strip()] if status else None,
+        'project_name': project_name,
+        'property_type': property_type,
+        'customer_name': customer_name
+    }
+    
+    rows = ExportService.write_parquet(
+        output, start_dt, end_dt, filters,
+        chunk_size=chunk_size or current_app.config.get('EXPORT_CHUNK_SIZE', 1000)
+    )
+    click.echo(f"Exported {rows} bookings to {output}")
+
+
+@click.command('import-bookings')
+@click.argument('csv_file', required=False, type=click.Path(exists=True, dir_okay=False))
+@click.option('--resume', 'resume_id', type=int, help='Continue the import with this ID.')
+@click.option('--chunk-size', type=int, default=None, help='Rows validated and committed together.')
+@click.option('--username', default='admin', show_default=True, help='User the bookings are created for.')
+@with_appcontext
+def import_bookings_command(csv_file, resume_id, chunk_size, username):
+    """Import bookings from CSV_FILE, or resume an earlier import."""
+    from app import db
+    from app.models import User, BookingImport
+    from app.booking.import_service import BookingImportService
+    
+    if resume_id is not None:
+        job = db.session.get(BookingImport, resume_id)
+        if job is None:
+            raise click.ClickException(f'Import {resume_id} not found')
+    elif csv_file:
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f"User '{username}' not found")
+        job = BookingImportService.create_job(os.path.basename(csv_file), csv_file, user.id, chunk_size)
+    else:
+        raise click.UsageError('Pass a CSV file or --resume ID.')
+    
+    click.echo(f"Import {job.id}: {job.filename}")
+    job = BookingImportService.run(job, on_chunk=lambda job: click.echo(
+        f"  {job.rows_processed} rows processed, {job.rows_imported} imported, {job.rows_failed} failed"
+    ))
+    
+    if job.rows_failed:
+        click.echo(f"Rejected rows: {BookingImportService.error_report_path(job)}")
+    if job.status != 'completed':
+        raise click.ClickException(f'Import {job.id} failed: {job.error} (continue with --resume {job.id})')
+    click.echo(f"Imported {job.rows_imported} of {job.rows_processed} rows")
+
+
+@click.command('prune-booking-changes')
+@click.option('--days', type=int, default=None, help='Keep changes from this many days (default: BOOKING_CHANGES_RETENTION_DAYS).')
+@with_appcontext
+def prune_booking_changes_command(days):
+    """Delete old entries of the booking change log used by delta sync."""
+    from flask import current_app
+    from app.booking.sync_service import BookingSyncService
+    
+    if days is None:
+        days = current_app.config.get('BOOKING_CHANGES_RETENTION_DAYS', 30)
+    
+    deleted = BookingSyncService.prune(days)
+    click.echo(f"Pruned {deleted} booking change log entries older than {days} days")
+
+
+@click.command('archive-bookings')
+@click.option('--dry-run', is_flag=True, help='Only count the bookings the policy would archive.')
+@click.option('--policy', default=None, help='status:days pairs, e.g. cancelled:90,complete:365 (default: ARCHIVE_POLICY).')
+@click.option('--batch-size', type=int, default=500, show_default=True, help='Bookings moved per transaction.')
+@with_appcontext
+def archive_bookings_command(dry_run, policy, batch_size):
+    """Move bookings matching the archival policy to bookings_archive."""
+    from app.booking.archive_service import BookingArchiveService
+    
+    try:
+        policy = BookingArchiveService.parse_policy(policy) if policy is not None else BookingArchiveService.policy()
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    
+    if not policy:
+        click.echo("The archival policy is empty; nothing to archive")
+        return
+    
+    rules = ', '.join(f'{status} after {days} days' for status, days in policy.items())
+    if dry_run:
+        click.echo(f"{BookingArchiveService.count_pending(policy)} bookings would be archived ({rules})")
+        return
+    
+    archived = BookingArchiveService.archive(policy, batch_size=batch_size)
+    click.echo(f"Archived {archived} bookings ({rules})")
+
+
+@click.command('benchmark-sqlite')
+@click.option('--seconds', type=float, default=5.0, show_default=True, help='Duration of each run.')
+@click.option('--readers', type=int, default=4, show_default=True, help='Reader threads.')
+@click.option('--rows', type=int, default=5000, show_default=True, help='Bookings seeded before each run.')
+@with_appcontext
+def benchmark_sqlite_command(seconds, readers, rows):
+    """Compare read throughput during writes with SQLite's defaults and SQLITE_PRAGMAS."""
+    from flask import current_app
+    from app.sqlite_benchmark import run_benchmark
+    
+    profiles = [('defaults', {}), ('profile', current_app.config.get('SQLITE_PRAGMAS') or {})]
+    for name, pragmas in profiles:
+        result = run_benchmark(pragmas, duration=seconds, readers=readers, rows=rows)
+        click.echo(
+            f"{name:<9} journal_mode={result['journal_mode']:<7} "
+            f"reads/s={result['reads_per_second']:<8} writes/s={result['writes_per_second']:<8} "
+            f"failed reads={result['read_errors']} failed writes={result['write_errors']}"
+        )
+
+
+@click.command('seed-database')
+@click.option('--force', is_flag=True, help='Seed again even if this seed version was applied.')
+@with_appcontext
+def seed_database_command(force):
+    """Create the demo users, the default LLM configuration and dummy bookings."""
+    from app.database import SEED_VERSION, init_database, read_schema_meta, seed_database
+    
+    init_database()
+    if not force and read_schema_meta().get('seed_version') == str(SEED_VERSION):
+        click.echo(f"Database already seeded (seed version {SEED_VERSION})")
+        return
+    seed_database()
+
+
+@click.command('build-snapshot')
+@click.argument('output', type=click.Path(dir_okay=False))
+def build_snapshot_command(output):
+    """Write an initialized and seeded SQLite database for SEED_SNAPSHOT."""
+    from app.database import build_snapshot
+    
+    build_snapshot(output)
+    click.echo(f"Wrote {output} ({os.path.getsize(output)} bytes)")
+
+
+@click.command('benchmark-startup')
+@click.option('--runs', type=int, default=5, show_default=True, help='Starts timed per database state.')
+def benchmark_startup_command(runs):
+    """Time create_app() on an empty, an unmarked and an initialized database."""
+    from app.startup_benchmark import measure_startup
+    
+    result = measure_startup(runs=runs)
+    click.echo(f"empty database:                  {result['empty']} ms")
+    click.echo(f"initialized, no schema_meta:     {result['unmarked']} ms")
+    click.echo(f"initialized (fast path):         {result['initialized']} ms")
+
+
+def register_commands(app):
+    """Register maintenance commands on the application CLI."""
+    app.cli.add_command(rebuild_rollups_command)
+    app.cli.add_command(reconcile_booking_counters_command)
+    app.cli.add_command(export_bookings_command)
+    app.cli.add_command(import_bookings_command)
+    app.cli.add_command(prune_booking_changes_command)
+    app.cli.add_command(archive_bookings_command)
+    app.cli.add_command(benchmark_sqlite_command)
+    app.cli.add_command(seed_database_command)
+    app.cli.add_command(benchmark_startup_command)
+    app.cli.add_command(build_snapshot_command)
@@ -3,6 +3,33 @@ import os
 from datetime import timedelta
 
 
+def database_url(default):
+    """Read DATABASE_URL, accepting the legacy postgres:// scheme."""
+    url = os.environ.get('DATABASE_URL') or default
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def engine_options(url):
+    """
+    Connection pool settings for a database URL.
+    
+    In-memory SQLite keeps Flask-SQLAlchemy's single shared connection; every
+    other database gets a pool sized and recycled from the environment.
+    """
+    if url in ('sqlite://', 'sqlite:///:memory:'):
+        return {}
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        # Test connections on checkout, so restarts of the server are survived
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true',
+        # Seconds after which connections are replaced, below server idle timeouts
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    }
+
+
 class Config:
     """Base configuration class."""
     
@@ -28,26 +55,111 @@ class Config:
     
     # JSON settings
     JSON_SORT_KEYS = False
+    
+    # Analytics result cache (invalidated by every booking write)
+    ANALYTICS_CACHE_ENABLED = os.environ.get('ANALYTICS_CACHE_ENABLED', 'true').lower() == 'true'
+    ANALYTICS_CACHE_SIZE = int(os.environ.get('ANALYTICS_CACHE_SIZE', 256))
+    ANALYTICS_CACHE_TTL = int(os.environ.get('ANALYTICS_CACHE_TTL', 300))  # seconds
+    
+    # Cache of user active flags and roles checked on every authenticated
+    # request; invalidated through the shared users generation counter
+    USER_STATUS_CACHE_ENABLED = os.environ.get('USER_STATUS_CACHE_ENABLED', 'true').lower() == 'true'
+    USER_STATUS_CACHE_SIZE = int(os.environ.get('USER_STATUS_CACHE_SIZE', 1024))
+    USER_STATUS_CACHE_TTL = int(os.environ.get('USER_STATUS_CACHE_TTL', 300))  # seconds
+    
+    # Cache of verified JWT payloads, each kept until its token expires
+    TOKEN_CACHE_ENABLED = os.environ.get('TOKEN_CACHE_ENABLED', 'true').lower() == 'true'
+    TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 4096))
+    
+    # Rows fetched and emitted per chunk by streaming exports
+    EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 1000))
+    
+    # Maximum number of bookings in one bulk create/update request
+    BULK_MAX_ROWS = int(os.environ.get('BULK_MAX_ROWS', 1000))
+    
+    # CSV imports: rows validated and committed per chunk, and the directory
+    # holding uploaded files and error reports (defaults to <instance>/imports)
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 1000))
+    IMPORT_DIR = os.environ.get('IMPORT_DIR')
+    
+    # Days of booking change log kept for delta sync clients (prune-booking-changes)
+    BOOKING_CHANGES_RETENTION_DAYS = int(os.environ.get('BOOKING_CHANGES_RETENTION_DAYS', 30))
+    
+    # Archival policy applied by archive-bookings: status:days pairs moving
+    # bookings of that status not updated for that many days to bookings_archive
+    ARCHIVE_POLICY = os.environ.get('ARCHIVE_POLICY', 'cancelled:90,complete:365')
+    
+    # Server-Sent Events streams: seconds between checks for new writes,
+    # between keep-alive comments, and before the client is made to reconnect
+    EVENTS_POLL_INTERVAL = float(os.environ.get('EVENTS_POLL_INTERVAL', 1.0))
+    EVENTS_HEARTBEAT = float(os.environ.get('EVENTS_HEARTBEAT', 15.0))
+    EVENTS_MAX_DURATION = float(os.environ.get('EVENTS_MAX_DURATION', 60.0))
+    # Each open stream holds a worker thread, so streams need threaded or
+    # gevent workers; keep this below the threads of a worker
+    EVENTS_MAX_STREAMS = int(os.environ.get('EVENTS_MAX_STREAMS', 4))
+    
+    # Analytics engine: 'sql' or 'columnar' (in-memory NumPy arrays)
+    ANALYTICS_ENGINE = os.environ.get('ANALYTICS_ENGINE', 'sql').lower()
+    
+    # SQLite connection profile, run on every new connection (see
+    # app/sqlite_profile.py). WAL lets readers proceed while a writer commits;
+    # busy_timeout is in milliseconds, a negative cache_size in KiB and
+    # mmap_size in bytes. SQLITE_PROFILE_ENABLED=false keeps SQLite's defaults.
+    SQLITE_PROFILE_ENABLED = os.environ.get('SQLITE_PROFILE_ENABLED', 'true').lower() == 'true'
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -20000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 268435456)),
+        'temp_store': os.environ.get('SQLITE_TEMP_STORE', 'MEMORY'),
+        'foreign_keys': os.environ.get('SQLITE_FOREIGN_KEYS', 'ON')
+    }
+    
+    # Directory for cross-worker state such as cache generation counters
+    # (defaults to the Flask instance folder)
+    SHARED_STATE_DIR = os.environ.get('SHARED_STATE_DIR')
+    
+    # Seed the demo users and bookings when the app starts. Databases that
+    # outlive the process are seeded once with `flask seed-database` instead.
+    SEED_ON_STARTUP = os.environ.get('SEED_ON_STARTUP', 'false').lower() == 'true'
+    
+    # Seeded SQLite file written by `flask build-snapshot`; an in-memory
+    # database that is seeded on startup is loaded from it instead
+    SEED_SNAPSHOT = os.environ.get('SEED_SNAPSHOT')
+    
+    # Seed the first in-memory database of the process only and give later
+    # apps a copy of it
+    CLONE_SEEDED_DATABASE = False
 
 
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
     # Use file-based SQLite for development
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///booking_system.db'
+    SQLALCHEMY_DATABASE_URI = database_url('sqlite:///booking_system.db')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
 
 
 class ProductionConfig(Config):
     """Production configuration."""
     DEBUG = False
-    # Use in-memory SQLite for Vercel serverless
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # DATABASE_URL (e.g. the Postgres service of docker-compose.yml), falling
+    # back to in-memory SQLite for Vercel serverless
+    SQLALCHEMY_DATABASE_URI = database_url('sqlite:///:memory:')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    # An in-memory database starts out empty on every cold start
+    SEED_ON_STARTUP = os.environ.get(
+        'SEED_ON_STARTUP', str(SQLALCHEMY_DATABASE_URI == 'sqlite:///:memory:')
+    ).lower() == 'true'
 
 
 class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SEED_ON_STARTUP = True
+    CLONE_SEEDED_DATABASE = True
 
 
 config = {
@@ -1,15 +1,8 @@
 """Customer service for property search and advice functionality."""
 import json
-import requests
 from datetime import datetime
 from app.models import CustomerEnquiry, LLMConfig
-
-# Import OpenAI
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+from app.optional_imports import optional_import
 
 
 class CustomerService:
@@ -59,6 +52,9 @@ class CustomerService:
     @staticmethod
     def get_property_advice(advice_request):
         """Get property advice using OpenAI LLM."""
+        # Imported on the first advice request only
+        openai = optional_import('openai')
+        
         try:
             # Get active LLM configuration
             llm_config = LLMConfig.get_active_config()
@@ -69,7 +65,7 @@ class CustomerService:
             if not llm_config.api_key:
                 return "OpenAI API key not configured. Please contact administrator to set up the API key."
             
-            if not OPENAI_AVAILABLE:
+            if openai is None:
                 return "OpenAI library not installed. Please install the openai package to use LLM features."
             
             # Initialize OpenAI client
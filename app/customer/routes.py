@@ -5,20 +5,13 @@ import smtplib
 from datetime import datetime
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from flask import Blueprint, request, jsonify, current_app
+from io import BytesIO
+from flask import Blueprint, request, jsonify, current_app, send_file
 from app import db
 from app.models import User, CustomerEnquiry, LLMConfig
 from app.auth.auth_service import auth_required
 from app.customer.customer_service import CustomerService
-
-# Import PDF service with error handling
-try:
-    from flask import send_file
-    from io import BytesIO
-    from app.customer.pdf_service import PDFReportService
-    PDF_SERVICE_AVAILABLE = True
-except ImportError:
-    PDF_SERVICE_AVAILABLE = False
+from app.optional_imports import is_available
 
 customer_bp = Blueprint('customer', __name__)
 
@@ -240,8 +233,8 @@ def generate_pdf_report():
         if not user or not user.is_email_verified:
             return jsonify({'error': 'Email verification required'}), 400
         
-        # Check if PDF service is available
-        if not PDF_SERVICE_AVAILABLE:
+        # Check if PDF service is available (reportlab is imported on first use)
+        if not is_available('reportlab'):
             # Fallback to text report
             text_report = CustomerService.generate_text_report(user_id, enquiry_ids, report_type)
             return jsonify({
@@ -251,6 +244,7 @@ def generate_pdf_report():
             }), 200
         
         # Generate PDF report
+        from app.customer.pdf_service import PDFReportService
         pdf_data, error = PDFReportService.generate_customer_report(
             customer_id=user_id,
             enquiry_ids=enquiry_ids if enquiry_ids else None,
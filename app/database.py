@@ -1,15 +1,167 @@
-"""Database initialization and management utilities."""
+"""Database initialization and management utilities.
+
+schema_meta records the schema version whose DDL and backfills have been
+applied and the version of the seeded demo data. create_app() runs
+init_database() on every start; it reads those markers in one query and
+stops there when they are current, so worker boots and serverless cold starts
+skip DDL, lookups and password hashing. Demo data is only seeded on request
+(SEED_ON_STARTUP, or the seed-database command).
+
+An in-memory database still has to be built on every start. start_database()
+therefore fills it from a prebuilt snapshot file (SEED_SNAPSHOT, written by
+the build-snapshot command) or from a seeded copy kept in the process
+(CLONE_SEEDED_DATABASE, used by the tests) with SQLite's online backup API,
+which copies the pages as they are instead of replaying DDL and inserts.
+"""
+import os
+import sqlite3
+import threading
 from datetime import datetime, timedelta
+from typing import Dict, Union
+from flask import current_app
+from sqlalchemy import func, select
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.exc import OperationalError, ProgrammingError
 from app import db
-from app.models import User, Booking, CustomerEnquiry, LLMConfig
+from app.models import (User, Booking, BookingArchive, BookingMonthlyRollup, BookingCounter, CustomerEnquiry,
+                        LLMConfig, SchemaMeta)
+from app.analytics.analytics_cache import ARCHIVE_GENERATION, BOOKINGS_GENERATION
+from app.analytics.rollup_service import RollupService
+from app.booking.counter_service import BookingCounterService
+from app.booking.write_hooks import snapshot_booking, record_booking_changes
+from app.booking.search_index import create_search_index, drop_search_index
+from app.shared_state import get_generation_counter, _uses_memory_database
+
+# Bump whenever tables, indexes or triggers change, so that existing
+# databases get the DDL and backfills applied again on their next start
+SCHEMA_VERSION = 3
+
+# Bump whenever the demo users, LLM configuration or bookings change
+SEED_VERSION = 1
+
+# schema_meta key set once bookings have been archived
+ARCHIVE_MARKER = 'archive_in_use'
+
+# Seeded in-memory databases of this process by (schema, seed) version,
+# cloned into apps configured with CLONE_SEEDED_DATABASE
+_seeded_databases = {}
+_seeded_databases_lock = threading.Lock()
+
+
+def read_schema_meta() -> Dict[str, str]:
+    """Read every schema_meta marker; empty if the table does not exist yet."""
+    try:
+        return {key: value for key, value in db.session.execute(select(SchemaMeta.key, SchemaMeta.value))}
+    except (OperationalError, ProgrammingError):
+        db.session.rollback()
+        return {}
+
+
+def write_schema_meta(key: str, value):
+    """Set a schema_meta marker in the current transaction."""
+    row = db.session.get(SchemaMeta, key)
+    if row is None:
+        db.session.add(SchemaMeta(key=key, value=str(value)))
+    else:
+        row.value = str(value)
 
 
-def init_database():
-    """Initialize database tables and create demo users and bookings."""
+def init_database(seed: bool = False) -> bool:
+    """
+    Bring the database schema up to date and optionally seed demo data.
+    
+    Args:
+        seed: Also seed the demo data, unless this seed version already was
+    
+    Returns:
+        True if anything was applied, False if the database was current
+    """
+    meta = read_schema_meta()
+    
+    # Make analytics include archived bookings even if the shared
+    # generation counters were lost
+    archive_generation = get_generation_counter(ARCHIVE_GENERATION)
+    if meta.get(ARCHIVE_MARKER) and archive_generation.current() == 0:
+        archive_generation.bump()
+    
+    applied = False
+    if meta.get('schema_version') != str(SCHEMA_VERSION):
+        upgrade_schema()
+        applied = True
+    
+    if seed and meta.get('seed_version') != str(SEED_VERSION):
+        seed_database()
+        applied = True
+    
+    return applied
+
+
+def upgrade_schema():
+    """Create missing tables, indexes and triggers and backfill derived tables."""
     # Create all tables
     db.create_all()
     
-    # Always recreate demo data for production (since we use in-memory SQLite)
+    # Give bookings ids that are never reused, in databases created before that
+    with db.engine.begin() as connection:
+        _rebuild_bookings_with_autoincrement(connection)
+    
+    # create_all() skips indexes of tables that already exist
+    for index in Booking.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+    
+    # Full-text search index, for databases created before it existed
+    with db.engine.begin() as connection:
+        create_search_index(connection)
+    
+    # Backfill the analytics rollup for databases created before it existed
+    if BookingMonthlyRollup.query.first() is None and Booking.query.first() is not None:
+        RollupService.rebuild()
+    
+    # Likewise for the counters behind the booking stats endpoint
+    if BookingCounter.query.first() is None and Booking.query.first() is not None:
+        BookingCounterService.rebuild()
+    
+    write_schema_meta('schema_version', SCHEMA_VERSION)
+    db.session.commit()
+
+
+def _rebuild_bookings_with_autoincrement(connection):
+    """
+    Recreate an SQLite bookings table declared without AUTOINCREMENT.
+    
+    Without it SQLite hands out max(id) + 1, which reuses the ids of
+    archived and deleted bookings. The rows are copied into a new table, and
+    the id sequence starts above every archived id. Indexes and the
+    full-text index are created again by the rest of upgrade_schema().
+    """
+    if connection.dialect.name != 'sqlite':
+        return
+    
+    sql = connection.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'bookings'"
+    ).scalar()
+    if sql is None or 'AUTOINCREMENT' in sql.upper():
+        return
+    
+    columns = ', '.join(column.name for column in Booking.__table__.columns)
+    create = str(CreateTable(Booking.__table__).compile(dialect=connection.dialect))
+    
+    drop_search_index(connection)
+    connection.exec_driver_sql(create.replace('CREATE TABLE bookings ', 'CREATE TABLE bookings_rebuild ', 1))
+    connection.exec_driver_sql(f'INSERT INTO bookings_rebuild ({columns}) SELECT {columns} FROM bookings')
+    connection.exec_driver_sql('DROP TABLE bookings')
+    connection.exec_driver_sql('ALTER TABLE bookings_rebuild RENAME TO bookings')
+    
+    last_id = max(
+        connection.exec_driver_sql('SELECT coalesce(max(id), 0) FROM bookings').scalar(),
+        connection.execute(select(func.coalesce(func.max(BookingArchive.id), 0))).scalar()
+    )
+    connection.exec_driver_sql("DELETE FROM sqlite_sequence WHERE name = 'bookings'")
+    connection.exec_driver_sql("INSERT INTO sqlite_sequence (name, seq) VALUES ('bookings', ?)", (last_id,))
+
+
+def seed_database():
+    """Create the demo users, the default LLM configuration and dummy bookings."""
     # Check if demo users already exist
     admin_user = User.query.filter_by(username='admin').first()
     sales_user = User.query.filter_by(username='sales').first()
@@ -61,10 +213,13 @@ def init_database():
         print(f"Error creating users and config: {e}")
         raise
     
-    # Always create dummy bookings (important for in-memory database)
+    # Dummy bookings only for a database without any
     if Booking.query.count() == 0:
         create_dummy_bookings()
     
+    write_schema_meta('seed_version', SEED_VERSION)
+    db.session.commit()
+    
     print("Database initialized successfully with demo users:")
     print("- Admin: username='admin', password='admin123'")
     print("- Sales: username='sales', password='sales123'")
@@ -72,6 +227,131 @@ def init_database():
     print(f"- {Booking.query.count()} booking records available")
 
 
+def _driver_connection(connection):
+    """Return the sqlite3 connection behind a SQLAlchemy connection."""
+    if connection.dialect.name != 'sqlite':
+        raise ValueError('Snapshots require a SQLite database.')
+    return connection.connection.driver_connection
+
+
+def save_snapshot(target: Union[str, sqlite3.Connection]):
+    """
+    Copy the application database with SQLite's online backup API.
+    
+    Args:
+        target: Path of the snapshot file, or an open sqlite3 connection
+    
+    Raises:
+        ValueError: If the application database is not SQLite
+    """
+    db.session.commit()
+    with db.engine.connect() as connection:
+        source = _driver_connection(connection)
+        if isinstance(target, sqlite3.Connection):
+            source.backup(target)
+            return
+        
+        destination = sqlite3.connect(target)
+        try:
+            source.backup(destination)
+        finally:
+            destination.close()
+
+
+def load_snapshot(source: Union[str, sqlite3.Connection]):
+    """
+    Replace the application database with a snapshot.
+    
+    Args:
+        source: Path of a snapshot file written by save_snapshot, or an open
+                sqlite3 connection
+    
+    Raises:
+        ValueError: If the application database is not SQLite
+        FileNotFoundError: If the snapshot file does not exist
+    """
+    db.session.remove()
+    with db.engine.connect() as connection:
+        destination = _driver_connection(connection)
+        if isinstance(source, sqlite3.Connection):
+            source.backup(destination)
+        else:
+            if not os.path.isfile(source):
+                raise FileNotFoundError(f'Snapshot {source} does not exist')
+            snapshot = sqlite3.connect(f'file:{source}?mode=ro', uri=True)
+            try:
+                snapshot.backup(destination)
+            finally:
+                snapshot.close()
+    
+    # Whatever was cached about the previous contents is stale now
+    get_generation_counter(BOOKINGS_GENERATION).bump()
+
+
+def build_snapshot(path: str):
+    """
+    Write a freshly initialized and seeded database to a snapshot file.
+    
+    Args:
+        path: Path of the snapshot file; an existing file is replaced
+    """
+    from app import create_app
+    
+    app = create_app('production', overrides={
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+        'SEED_ON_STARTUP': True,
+        'SEED_SNAPSHOT': None,
+        'CLONE_SEEDED_DATABASE': False
+    })
+    with app.app_context():
+        save_snapshot(path)
+
+
+def start_database(config) -> str:
+    """
+    Prepare the database of a starting application.
+    
+    In-memory databases are filled from SEED_SNAPSHOT, or from a seeded copy
+    kept in the process when CLONE_SEEDED_DATABASE is set; everything else
+    goes through init_database().
+    
+    Args:
+        config: Application configuration
+    
+    Returns:
+        'snapshot' or 'clone' if the database was loaded, otherwise 'init'
+    """
+    seed = config.get('SEED_ON_STARTUP', False)
+    if not seed or not _uses_memory_database(current_app):
+        init_database(seed=seed)
+        return 'init'
+    
+    snapshot = config.get('SEED_SNAPSHOT')
+    if snapshot:
+        load_snapshot(snapshot)
+        # Upgrades a snapshot built by an older release
+        init_database(seed=True)
+        return 'snapshot'
+    
+    if not config.get('CLONE_SEEDED_DATABASE'):
+        init_database(seed=True)
+        return 'init'
+    
+    with _seeded_databases_lock:
+        seeded = _seeded_databases.get((SCHEMA_VERSION, SEED_VERSION))
+        if seeded is not None:
+            load_snapshot(seeded)
+            init_database(seed=True)
+            return 'clone'
+        
+        init_database(seed=True)
+        seeded = sqlite3.connect(':memory:', check_same_thread=False)
+        save_snapshot(seeded)
+        _seeded_databases[(SCHEMA_VERSION, SEED_VERSION)] = seeded
+        return 'init'
+
+
 def create_dummy_bookings():
     """Create 10 dummy booking records for demonstration."""
     dummy_bookings = [
@@ -260,6 +540,7 @@ def create_dummy_bookings():
     # Get admin user for created_by field
     admin_user = User.query.filter_by(username='admin').first()
     
+    bookings = []
     for booking_data in dummy_bookings:
         booking = Booking(
             customer_name=booking_data['customer_name'],
@@ -281,8 +562,12 @@ def create_dummy_bookings():
             created_by=admin_user.id if admin_user else 1
         )
         db.session.add(booking)
+        bookings.append(booking)
     
     try:
+        # Keep derived analytics tables in step with the seeded rows
+        db.session.flush()
+        record_booking_changes([(None, snapshot_booking(booking)) for booking in bookings])
         db.session.commit()
         print(f"Created {len(dummy_bookings)} dummy booking records")
     except Exception as e:
@@ -292,9 +577,9 @@ def create_dummy_bookings():
 
 
 def reset_database():
-    """Drop and recreate all database tables."""
+    """Drop and recreate all database tables, with demo data."""
     db.drop_all()
-    init_database()
+    init_database(seed=True)
 
 
 def create_user(username, password, role):
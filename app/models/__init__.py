@@ -1,7 +1,14 @@
 # Database models
 from .user import User
 from .booking import Booking
+from .booking_rollup import BookingMonthlyRollup, BookingArchiveRollup
+from .booking_archive import BookingArchive
+from .booking_import import BookingImport
+from .booking_change import BookingChange
+from .booking_counter import BookingCounter
 from .customer_enquiry import CustomerEnquiry
 from .llm_config import LLMConfig
+from .schema_meta import SchemaMeta
+from .revoked_token import RevokedToken
 
-__all__ = ['User', 'Booking', 'CustomerEnquiry', 'LLMConfig']
\ No newline at end of file
+__all__ = ['User', 'Booking', 'BookingMonthlyRollup', 'BookingArchiveRollup', 'BookingArchive', 'BookingImport', 'BookingChange', 'BookingCounter', 'CustomerEnquiry', 'LLMConfig', 'SchemaMeta', 'RevokedToken']
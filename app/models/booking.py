@@ -17,7 +17,7 @@ class Booking(db.Model):
     contact_number = db.Column(db.String(20), nullable=False)
     
     # Project information
-    project_name = db.Column(db.String(255), nullable=False, index=True)
+    project_name = db.Column(db.String(255), nullable=False)
     type = db.Column(db.String(50), nullable=False)  # 2BHK, 3BHK, etc.
     area = db.Column(db.Float, nullable=False)  # in sq ft
     
@@ -48,7 +48,7 @@ class Booking(db.Model):
     # Relationships
     creator = db.relationship('User', backref='bookings', lazy=True)
     
-    # Constraints
+    # Constraints and indexes
     __table_args__ = (
         CheckConstraint('area > 0', name='check_area_positive'),
         CheckConstraint('agreement_cost >= 0', name='check_agreement_cost_non_negative'),
@@ -59,6 +59,17 @@ class Booking(db.Model):
         CheckConstraint('onc_trust_fund >= 0', name='check_onc_trust_fund_non_negative'),
         CheckConstraint('oncct_funded >= 0', name='check_oncct_funded_non_negative'),
         CheckConstraint("loan_req IN ('yes', 'no')", name='check_loan_req_valid'),
+        # Date-bounded analytics and the default list order
+        db.Index('ix_bookings_created_at', 'created_at'),
+        db.Index('ix_bookings_status_created_at', 'status', 'created_at'),
+        db.Index('ix_bookings_project_name_created_at', 'project_name', 'created_at'),
+        db.Index('ix_bookings_created_by_created_at', 'created_by', 'created_at'),
+        # Remaining list sort orders
+        db.Index('ix_bookings_updated_at', 'updated_at'),
+        db.Index('ix_bookings_amount', 'amount'),
+        db.Index('ix_bookings_timeline', 'timeline'),
+        # Never reuse ids, which archived bookings keep in bookings_archive
+        {'sqlite_autoincrement': True}
     )
     
     def __init__(self, **kwargs):
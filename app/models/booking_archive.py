@@ -0,0 +1,67 @@
+"""Archived booking model for bookings moved out of the live table."""
+from datetime import datetime
+from sqlalchemy import Numeric
+from app import db
+from app.models.booking import Booking
+
+
+class BookingArchive(db.Model):
+    """Booking moved out of the bookings table by the archival policy."""
+    
+    __tablename__ = 'bookings_archive'
+    
+    # Same id as the booking had in the bookings table
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    
+    # Customer information
+    customer_name = db.Column(db.String(255), nullable=False)
+    contact_number = db.Column(db.String(20), nullable=False)
+    
+    # Project information
+    project_name = db.Column(db.String(255), nullable=False)
+    type = db.Column(db.String(50), nullable=False)
+    area = db.Column(db.Float, nullable=False)
+    
+    # Financial information
+    agreement_cost = db.Column(Numeric(15, 2), nullable=False)
+    amount = db.Column(Numeric(15, 2), nullable=False)
+    tax_gst = db.Column(Numeric(15, 2), nullable=False, default=0)
+    refund_buyer = db.Column(Numeric(15, 2), nullable=False, default=0)
+    refund_referral = db.Column(Numeric(15, 2), nullable=False, default=0)
+    onc_trust_fund = db.Column(Numeric(15, 2), nullable=False, default=0)
+    oncct_funded = db.Column(Numeric(15, 2), nullable=False, default=0)
+    
+    # Status and timeline
+    invoice_status = db.Column(db.String(50), nullable=False)
+    timeline = db.Column(db.DateTime, nullable=False)
+    loan_req = db.Column(db.String(10), nullable=False)
+    status = db.Column(
+        db.Enum('active', 'complete', 'cancelled', name='booking_status'),
+        nullable=False
+    )
+    
+    # Audit fields
+    created_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+    created_by = db.Column(db.Integer, nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Constraints and indexes
+    __table_args__ = (
+        # Edge months of date-bounded analytics and archived list pages
+        db.Index('ix_bookings_archive_created_at', 'created_at'),
+    )
+    
+    # Derived amounts are computed exactly like those of live bookings
+    total_amount = Booking.total_amount
+    net_refund = Booking.net_refund
+    
+    def to_dict(self):
+        """Convert archived booking to dictionary representation."""
+        data = Booking.to_dict(self)
+        data['archived_at'] = self.archived_at.isoformat() if self.archived_at else None
+        return data
+    
+    def __repr__(self):
+        """String representation of archived booking."""
+        return f'<BookingArchive {self.id}: {self.customer_name} - {self.project_name}>'
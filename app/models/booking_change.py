@@ -0,0 +1,27 @@
+"""Booking change log model for delta sync."""
+from datetime import datetime
+from app import db
+
+
+class BookingChange(db.Model):
+    """Append-only record of every booking insert, update and delete."""
+    
+    __tablename__ = 'booking_changes'
+    
+    # Sequence number, handed to clients as their sync token
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Not a foreign key: delete entries are tombstones of removed bookings
+    booking_id = db.Column(db.Integer, nullable=False)
+    operation = db.Column(db.String(10), nullable=False)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        db.CheckConstraint("operation IN ('insert', 'update', 'delete')", name='check_change_operation'),
+        # Never reuse sequence numbers, so pruned tokens can be detected
+        {'sqlite_autoincrement': True}
+    )
+    
+    def __repr__(self):
+        """String representation of change log entry."""
+        return f'<BookingChange {self.id}: {self.operation} {self.booking_id}>'
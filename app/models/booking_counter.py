@@ -0,0 +1,26 @@
+"""Booking counter model for constant-time booking statistics."""
+from app import db
+
+
+class BookingCounter(db.Model):
+    """Running booking count and amount total per status."""
+    
+    __tablename__ = 'booking_counters'
+    
+    status = db.Column(db.String(20), primary_key=True)
+    booking_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Integer paise, so repeated increments never accumulate rounding error
+    total_amount_paise = db.Column(db.BigInteger, nullable=False, default=0)
+    
+    def to_dict(self):
+        """Convert counter row to dictionary representation."""
+        return {
+            'status': self.status,
+            'booking_count': self.booking_count,
+            'total_amount': self.total_amount_paise / 100
+        }
+    
+    def __repr__(self):
+        """String representation of counter row."""
+        return f'<BookingCounter {self.status}: {self.booking_count}>'
@@ -0,0 +1,51 @@
+"""Booking CSV import job model for tracking import progress."""
+from datetime import datetime
+from app import db
+
+
+class BookingImport(db.Model):
+    """Progress of a chunked CSV import of bookings."""
+    
+    __tablename__ = 'booking_imports'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(255), nullable=False)
+    source_path = db.Column(db.String(1024), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    chunk_size = db.Column(db.Integer, nullable=False)
+    
+    # Progress, updated in the same transaction as each imported chunk
+    rows_processed = db.Column(db.Integer, nullable=False, default=0)
+    rows_imported = db.Column(db.Integer, nullable=False, default=0)
+    rows_failed = db.Column(db.Integer, nullable=False, default=0)
+    error_report_size = db.Column(db.Integer, nullable=False, default=0)
+    
+    error = db.Column(db.Text)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    # Check constraints
+    __table_args__ = (
+        db.CheckConstraint("status IN ('pending', 'running', 'completed', 'failed')", name='check_import_status'),
+    )
+    
+    def to_dict(self):
+        """Convert import job to dictionary representation."""
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'status': self.status,
+            'chunk_size': self.chunk_size,
+            'rows_processed': self.rows_processed,
+            'rows_imported': self.rows_imported,
+            'rows_failed': self.rows_failed,
+            'error': self.error,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        """String representation of import job."""
+        return f'<BookingImport {self.id} {self.filename}: {self.status}>'
@@ -0,0 +1,51 @@
+"""Monthly booking rollup models for trend analytics."""
+from sqlalchemy import Numeric
+from app import db
+
+
+class RollupColumns:
+    """Grouping key and measures shared by the monthly rollup tables."""
+    
+    # Grouping key
+    year = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Integer, primary_key=True)
+    project_name = db.Column(db.String(255), primary_key=True)
+    type = db.Column(db.String(50), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    
+    # Aggregated measures
+    booking_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(Numeric(18, 2), nullable=False, default=0)
+    total_tax = db.Column(Numeric(18, 2), nullable=False, default=0)
+    total_area = db.Column(db.Float, nullable=False, default=0)
+    
+    def to_dict(self):
+        """Convert rollup row to dictionary representation."""
+        return {
+            'year': self.year,
+            'month': self.month,
+            'project_name': self.project_name,
+            'type': self.type,
+            'status': self.status,
+            'booking_count': self.booking_count,
+            'total_amount': float(self.total_amount),
+            'total_tax': float(self.total_tax),
+            'total_area': float(self.total_area)
+        }
+    
+    def __repr__(self):
+        """String representation of rollup row."""
+        return (f'<{type(self).__name__} {self.year}-{self.month:02d} '
+                f'{self.project_name}/{self.type}/{self.status}: {self.booking_count}>')
+
+
+class BookingMonthlyRollup(RollupColumns, db.Model):
+    """Pre-aggregated booking measures per month, project, type and status."""
+    
+    __tablename__ = 'booking_monthly_rollup'
+
+
+class BookingArchiveRollup(RollupColumns, db.Model):
+    """Pre-aggregated measures of archived bookings, keyed like BookingMonthlyRollup."""
+    
+    __tablename__ = 'booking_archive_rollup'
@@ -0,0 +1,18 @@
+"""Revoked token model for server-side logout."""
+from datetime import datetime
+from app import db
+
+
+class RevokedToken(db.Model):
+    """Digest of a JWT that must no longer be accepted, kept until it expires."""
+    
+    __tablename__ = 'revoked_tokens'
+    
+    # SHA-256 hex digest of the encoded token
+    token_digest = db.Column(db.String(64), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        """String representation of a revoked token."""
+        return f'<RevokedToken {self.token_digest[:12]}>'
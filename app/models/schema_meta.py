@@ -0,0 +1,17 @@
+"""Schema metadata model recording how far a database has been initialized."""
+from datetime import datetime
+from app import db
+
+
+class SchemaMeta(db.Model):
+    """Key/value markers such as the applied schema and seed versions."""
+    
+    __tablename__ = 'schema_meta'
+    
+    key = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.String(255), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        """String representation of a schema marker."""
+        return f'<SchemaMeta {self.key}={self.value}>'
@@ -0,0 +1,50 @@
+"""Optional third-party dependencies, imported on first use.
+
+Importing openai, reportlab or pyarrow takes longer than importing Flask and
+SQLAlchemy together, yet only the LLM advice, PDF report and Parquet export
+code paths need them. Those modules ask optional_import() for the dependency
+when they run instead of importing it at module load, so booking and
+analytics workers never pay for it. Whether each dependency could be imported
+is remembered, so a missing package is only looked for once.
+"""
+import importlib
+import threading
+from types import ModuleType
+from typing import Dict, Optional
+
+_modules = {}
+_lock = threading.Lock()
+
+
+def optional_import(name: str) -> Optional[ModuleType]:
+    """
+    Import an optional dependency, once per process.
+    
+    Args:
+        name: Dotted module name, e.g. 'openai' or 'pyarrow.parquet'
+    
+    Returns:
+        The module, or None if it is not installed
+    """
+    try:
+        return _modules[name]
+    except KeyError:
+        pass
+    
+    with _lock:
+        if name not in _modules:
+            try:
+                _modules[name] = importlib.import_module(name)
+            except ImportError:
+                _modules[name] = None
+        return _modules[name]
+
+
+def is_available(name: str) -> bool:
+    """Check whether an optional dependency can be imported, importing it if needed."""
+    return optional_import(name) is not None
+
+
+def import_status() -> Dict[str, bool]:
+    """Availability of the optional dependencies requested so far."""
+    return {name: module is not None for name, module in _modules.items()}
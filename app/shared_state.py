@@ -0,0 +1,81 @@
+"""Generation counters shared between worker processes.
+
+A generation counter is a monotonically increasing integer that writers bump
+after they commit a change. In-process caches remember the generation they
+were filled at and treat any difference as an invalidation. For file-based or
+server databases the counter lives in a small file under the instance folder,
+so every worker on the host sees the bump; for in-memory SQLite each process
+owns its own data, so an in-process counter is used instead.
+"""
+import os
+import threading
+from flask import current_app
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+
+class GenerationCounter:
+    """Monotonic counter, optionally persisted to a file shared by workers."""
+    
+    def __init__(self, path=None):
+        """Create a counter stored at path, or kept in memory if path is None."""
+        self.path = path
+        self._value = 0
+        self._lock = threading.Lock()
+    
+    def current(self):
+        """Return the current generation."""
+        if self.path is None:
+            return self._value
+        
+        try:
+            with open(self.path, 'r') as handle:
+                return int(handle.read() or 0)
+        except (OSError, ValueError):
+            return 0
+    
+    def bump(self):
+        """Increment the generation and return the new value."""
+        with self._lock:
+            if self.path is None:
+                self._value += 1
+                return self._value
+            
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                value = int(os.read(fd, 32) or 0) + 1
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.ftruncate(fd, 0)
+                os.write(fd, str(value).encode())
+                return value
+            finally:
+                os.close(fd)
+
+
+def _uses_memory_database(app):
+    """Check whether the application database lives only in this process."""
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI') or ''
+    return uri in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in uri
+
+
+def get_generation_counter(name):
+    """Return the named generation counter for the current application."""
+    app = current_app._get_current_object()
+    counters = app.extensions.setdefault('generation_counters', {})
+    
+    counter = counters.get(name)
+    if counter is None:
+        path = None
+        if not _uses_memory_database(app):
+            state_dir = app.config.get('SHARED_STATE_DIR') or app.instance_path
+            path = os.path.join(state_dir, f'{name}.generation')
+        counter = counters.setdefault(name, GenerationCounter(path))
+    
+    return counter
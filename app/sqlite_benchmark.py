@@ -0,0 +1,143 @@
+"""Read throughput of SQLite while bookings are being written.
+
+A scratch database file is seeded with bookings, then reader threads keep
+running a booking list page and a status aggregate while one writer thread
+keeps committing batches of inserts and updates. The same run is repeated
+per connection profile, so SQLite's defaults (rollback journal, where a
+committing writer locks readers out) can be compared with the configured
+profile (WAL, where readers never wait for writers).
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+from sqlalchemy import create_engine, func, insert, select, update
+from sqlalchemy.exc import OperationalError
+from app.models.booking import Booking
+from app.models.user import User
+from app.sqlite_profile import configure_sqlite_engine, read_pragmas
+
+# Bookings inserted per write transaction
+WRITE_BATCH = 20
+
+
+def _booking_rows(count: int, offset: int = 0):
+    """Booking rows for seeding and writing."""
+    now = datetime.utcnow()
+    return [{
+        'customer_name': f'Benchmark Buyer {offset + index}',
+        'contact_number': '9876500000',
+        'project_name': ('Sunrise Apartments', 'Green Valley', 'Blue Heights')[index % 3],
+        'type': ('2BHK', '3BHK')[index % 2],
+        'area': 1000.0 + index % 500,
+        'agreement_cost': 5000000,
+        'amount': 4800000 + index % 1000,
+        'tax_gst': 240000,
+        'refund_buyer': 0,
+        'refund_referral': 0,
+        'onc_trust_fund': 0,
+        'oncct_funded': 0,
+        'invoice_status': 'Pending',
+        'timeline': now + timedelta(days=30),
+        'loan_req': 'no',
+        'status': ('active', 'complete', 'cancelled')[index % 3],
+        'created_at': now - timedelta(minutes=offset + index),
+        'updated_at': now,
+        'created_by': 1
+    } for index in range(count)]
+
+
+def run_benchmark(pragmas: Dict[str, Any],
+                  duration: float = 3.0,
+                  readers: int = 4,
+                  rows: int = 5000,
+                  directory: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Measure read and write throughput under one connection profile.
+    
+    Args:
+        pragmas: PRAGMA profile to apply, or {} for SQLite's defaults
+        duration: Seconds to run readers and the writer for
+        readers: Number of reader threads
+        rows: Bookings seeded before the run
+        directory: Where to create the scratch database (a temporary
+                   directory by default)
+    
+    Returns:
+        Dictionary with the effective journal_mode, the read and write
+        counts, failed operations and reads/writes per second
+    """
+    workdir = tempfile.mkdtemp(dir=directory)
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'benchmark.db')}",
+                           pool_size=readers + 1, max_overflow=0)
+    try:
+        configure_sqlite_engine(engine, pragmas)
+        User.metadata.create_all(engine, tables=[User.__table__, Booking.__table__])
+        with engine.begin() as connection:
+            connection.execute(insert(User.__table__), {
+                'id': 1, 'username': 'benchmark', 'password_hash': '-', 'role': 'admin'
+            })
+            connection.execute(insert(Booking.__table__), _booking_rows(rows))
+        
+        with engine.connect() as connection:
+            journal_mode = read_pragmas(connection)['journal_mode']
+        
+        counts = {'reads': 0, 'writes': 0, 'read_errors': 0, 'write_errors': 0}
+        lock = threading.Lock()
+        stop = threading.Event()
+        
+        def count(name):
+            with lock:
+                counts[name] += 1
+        
+        def reader():
+            page = select(Booking.id, Booking.customer_name, Booking.amount).order_by(
+                Booking.created_at.desc()).limit(50)
+            totals = select(Booking.status, func.count(), func.sum(Booking.amount)).group_by(Booking.status)
+            while not stop.is_set():
+                try:
+                    with engine.connect() as connection:
+                        connection.execute(page).all()
+                        connection.execute(totals).all()
+                    count('reads')
+                except OperationalError:
+                    count('read_errors')
+        
+        def writer():
+            offset = rows
+            while not stop.is_set():
+                try:
+                    with engine.begin() as connection:
+                        connection.execute(insert(Booking.__table__), _booking_rows(WRITE_BATCH, offset))
+                        connection.execute(
+                            update(Booking.__table__)
+                            .where(Booking.id % 97 == offset % 97)
+                            .values(updated_at=datetime.utcnow())
+                        )
+                    offset += WRITE_BATCH
+                    count('writes')
+                except OperationalError:
+                    count('write_errors')
+        
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+        
+        return dict(
+            counts,
+            journal_mode=journal_mode,
+            reads_per_second=round(counts['reads'] / elapsed, 1),
+            writes_per_second=round(counts['writes'] / elapsed, 1)
+        )
+    finally:
+        engine.dispose()
+        shutil.rmtree(workdir, ignore_errors=True)
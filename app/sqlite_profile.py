@@ -0,0 +1,91 @@
+"""SQLite connection profile.
+
+SQLite keeps most of its tuning per connection, so the PRAGMAs configured in
+SQLITE_PRAGMAS are run on every new DB-API connection through a SQLAlchemy
+'connect' event. With journal_mode=WAL readers keep reading the last
+committed snapshot while a writer commits, instead of failing with
+"database is locked", and busy_timeout makes writers queue for the lock
+rather than error out immediately.
+"""
+import re
+from typing import Dict, Any
+from sqlalchemy import event
+
+# PRAGMAs the profile may set, in the order they are applied; journal_mode
+# comes first because it needs the database to itself
+PROFILE_PRAGMAS = ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size',
+                   'mmap_size', 'temp_store', 'foreign_keys')
+
+_VALUE_PATTERN = re.compile(r'^-?\w+$')
+
+
+def validate_pragmas(pragmas: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Check a PRAGMA profile before it is interpolated into SQL.
+    
+    Returns:
+        The profile in PROFILE_PRAGMAS order
+    
+    Raises:
+        ValueError: If it names an unsupported PRAGMA or has an invalid value
+    """
+    unknown = [name for name in pragmas if name not in PROFILE_PRAGMAS]
+    if unknown:
+        raise ValueError(f'Unsupported SQLite pragmas: {", ".join(unknown)}')
+    
+    for name, value in pragmas.items():
+        if not _VALUE_PATTERN.match(str(value)):
+            raise ValueError(f'Invalid value for SQLite pragma {name}: {value!r}')
+    
+    return {name: pragmas[name] for name in PROFILE_PRAGMAS if name in pragmas}
+
+
+def apply_pragmas(dbapi_connection, pragmas: Dict[str, Any]):
+    """Run the profile's PRAGMAs on a raw DB-API connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+
+def configure_sqlite_engine(engine, pragmas: Dict[str, Any]) -> bool:
+    """
+    Apply a PRAGMA profile to every new connection of an engine.
+    
+    Args:
+        engine: SQLAlchemy engine; engines of other databases are left alone
+        pragmas: PRAGMA name to value mapping
+    
+    Returns:
+        True if the profile was installed
+    
+    Raises:
+        ValueError: If the profile is invalid
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return False
+    
+    pragmas = validate_pragmas(pragmas)
+    
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+    
+    return True
+
+
+def read_pragmas(connection) -> Dict[str, Any]:
+    """
+    Read the profile's PRAGMAs as a connection actually has them.
+    
+    Returns:
+        Dictionary of PRAGMA values, or {} for other databases
+    """
+    if connection.dialect.name != 'sqlite':
+        return {}
+    return {
+        name: connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+        for name in PROFILE_PRAGMAS
+    }
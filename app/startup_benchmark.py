@@ -0,0 +1,79 @@
+"""Wall time of create_app() on a persistent database.
+
+Every worker boot and serverless cold start runs create_app(), and with it
+init_database(). The benchmark times create_app() on a scratch SQLite file
+in three states: empty (schema and demo data are created), initialized
+without schema_meta markers (every DDL statement, backfill check and seed
+lookup runs again, as on every start before the markers existed) and
+initialized (only the markers are read).
+"""
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from typing import Dict, Optional
+
+
+def _start(database_path: str, directory: str) -> float:
+    """Create an app on the database file and return the seconds it took."""
+    from app import create_app, db
+    
+    started = time.perf_counter()
+    app = create_app('production', overrides={
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database_path}',
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+        'SHARED_STATE_DIR': directory,
+        'SEED_ON_STARTUP': True
+    })
+    elapsed = time.perf_counter() - started
+    
+    with app.app_context():
+        db.engine.dispose()
+    return elapsed
+
+
+def measure_startup(runs: int = 5, directory: Optional[str] = None) -> Dict[str, float]:
+    """
+    Time create_app() on a scratch database file.
+    
+    Args:
+        runs: Starts timed per state; the median is reported
+        directory: Directory for the scratch database; a temporary one is
+                   created and removed if omitted
+    
+    Returns:
+        Dictionary with the median milliseconds of a start on an empty
+        database ('empty'), on an initialized one without schema_meta
+        markers ('unmarked') and on an initialized one ('initialized')
+    """
+    scratch = directory is None
+    directory = directory or tempfile.mkdtemp(prefix='startup-benchmark-')
+    database_path = os.path.join(directory, 'startup.db')
+    
+    try:
+        empty = []
+        for _ in range(runs):
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(database_path + suffix):
+                    os.remove(database_path + suffix)
+            empty.append(_start(database_path, directory))
+        
+        unmarked = []
+        for _ in range(runs):
+            connection = sqlite3.connect(database_path)
+            with connection:
+                connection.execute('DELETE FROM schema_meta')
+            connection.close()
+            unmarked.append(_start(database_path, directory))
+        
+        initialized = [_start(database_path, directory) for _ in range(runs)]
+    finally:
+        if scratch:
+            shutil.rmtree(directory, ignore_errors=True)
+    
+    return {
+        name: round(statistics.median(times) * 1000, 1)
+        for name, times in (('empty', empty), ('unmarked', unmarked), ('initialized', initialized))
+    }
@@ -3,6 +3,8 @@
 class AnalyticsManager {
     constructor() {
         this.charts = {};
+        this.stopUpdates = null; // Closes the dashboard event stream
+        this.updatesQuery = null;
         this.currentFilters = {};
         this.dateRange = {
             start_date: null,
@@ -121,12 +123,25 @@ class AnalyticsManager {
             // Update charts
             this.updateCharts(data.charts);
             
+            // Keep KPIs current while the dashboard stays open
+            this.subscribeToUpdates(params.toString());
+            
         } catch (error) {
             console.error('Error loading dashboard data:', error);
             throw error;
         }
     }
 
+    subscribeToUpdates(query) {
+        if (this.updatesQuery === query) return;
+        if (this.stopUpdates) this.stopUpdates();
+
+        this.updatesQuery = query;
+        this.stopUpdates = authService.streamEvents(`/analytics/events?${query}`, (event, data) => {
+            if (event === 'kpis') this.updateKPIs(data.kpis);
+        });
+    }
+
     updateKPIs(kpis) {
         // Update KPI values
         const totalBookingsEl = document.getElementById('total-bookings');
@@ -92,8 +92,18 @@ class AuthService {
         }
     }
 
-    // Logout
-    logout() {
+    // Logout, revoking the token on the server
+    async logout() {
+        if (this.token) {
+            try {
+                await fetch(`${this.baseURL}/auth/logout`, {
+                    method: 'POST',
+                    headers: this.getAuthHeaders()
+                });
+            } catch (error) {
+                // The token is dropped locally either way
+            }
+        }
         this.clearAuth();
         window.location.reload();
     }
@@ -120,6 +130,93 @@ class AuthService {
             throw error;
         }
     }
+
+    // Subscribe to a Server-Sent Events endpoint (fetch-based, so the auth
+    // header is sent). Reconnects with Last-Event-ID whenever the stream
+    // ends; returns a function that closes the subscription.
+    streamEvents(endpoint, onEvent) {
+        let lastEventId = null;
+        let closed = false;
+        let controller = null;
+        // Reconnect delay; the server sets it with 'retry:' lines
+        let retryDelay = 3000;
+        // Connections in a row the server turned away as busy
+        let busyCount = 0;
+
+        const connect = async () => {
+            while (!closed) {
+                controller = new AbortController();
+                const headers = this.getAuthHeaders();
+                if (lastEventId) {
+                    headers['Last-Event-ID'] = lastEventId;
+                }
+
+                try {
+                    const response = await fetch(`${this.baseURL}${endpoint}`, {
+                        headers,
+                        signal: controller.signal
+                    });
+
+                    if (response.status === 401) {
+                        this.logout();
+                        return;
+                    }
+                    if (!response.ok) {
+                        if (response.status < 500) return;
+                    } else {
+                        const reader = response.body.getReader();
+                        const decoder = new TextDecoder();
+                        let buffer = '';
+
+                        while (true) {
+                            const { value, done } = await reader.read();
+                            if (done) break;
+
+                            buffer += decoder.decode(value, { stream: true });
+                            const blocks = buffer.split('\n\n');
+                            buffer = blocks.pop();
+
+                            for (const block of blocks) {
+                                let event = 'message';
+                                let data = '';
+                                for (const line of block.split('\n')) {
+                                    if (line.startsWith('id: ')) lastEventId = line.slice(4);
+                                    else if (line.startsWith('event: ')) event = line.slice(7);
+                                    else if (line.startsWith('data: ')) data += line.slice(6);
+                                    else if (line.startsWith('retry: ')) {
+                                        const delay = parseInt(line.slice(7), 10);
+                                        if (delay >= 0) retryDelay = delay;
+                                    }
+                                }
+                                // The worker has no stream slot left: back off,
+                                // longer each time it turns us away in a row
+                                if (event === 'busy') {
+                                    busyCount += 1;
+                                    continue;
+                                }
+                                if (data) {
+                                    busyCount = 0;
+                                    onEvent(event, JSON.parse(data));
+                                }
+                            }
+                        }
+                    }
+                } catch (error) {
+                    if (closed) return;
+                    console.error('Event stream error:', error);
+                }
+
+                const backoff = 2 ** Math.min(Math.max(busyCount - 1, 0), 3);
+                await new Promise(resolve => setTimeout(resolve, retryDelay * backoff));
+            }
+        };
+
+        connect();
+        return () => {
+            closed = true;
+            if (controller) controller.abort();
+        };
+    }
 }
 
 // Form validation utilities
@@ -8,6 +8,8 @@ class BookingManager {
         this.sortDirection = 'asc';
         this.editingBooking = null;
         this.userRole = null; // Will be set by the main app
+        this.syncToken = null; // Position in the server's booking change log
+        this.stopUpdates = null; // Closes the booking event stream
         
         this.init();
     }
@@ -199,8 +201,16 @@ class BookingManager {
             
             const data = await response.json();
             this.bookings = data.bookings || [];
+            this.syncToken = data.sync_token || null;
             this.filteredBookings = [...this.bookings];
             this.renderBookingsTable();
+
+            // Pull changes made by other users as they are pushed
+            if (!this.stopUpdates) {
+                this.stopUpdates = authService.streamEvents('/bookings/events', (event) => {
+                    if (event === 'bookings') this.syncBookings();
+                });
+            }
             
         } catch (error) {
             console.error('Error loading bookings:', error);
@@ -215,6 +225,46 @@ class BookingManager {
         }
     }
 
+    async syncBookings() {
+        // Pull only the bookings changed since the last load or sync
+        if (!this.syncToken) {
+            return this.loadBookings();
+        }
+
+        try {
+            let hasMore = true;
+            while (hasMore) {
+                const response = await authService.apiRequest(`/bookings/changes?since=${encodeURIComponent(this.syncToken)}`);
+                if (!response || !response.ok) {
+                    // Expired token or error: fall back to a full reload
+                    return this.loadBookings();
+                }
+
+                const data = await response.json();
+                const deleted = new Set(data.deleted);
+                this.bookings = this.bookings.filter(booking => !deleted.has(booking.id));
+
+                for (const changed of data.bookings) {
+                    const index = this.bookings.findIndex(booking => booking.id === changed.id);
+                    if (index >= 0) {
+                        this.bookings[index] = changed;
+                    } else {
+                        this.bookings.unshift(changed);
+                    }
+                }
+
+                this.syncToken = data.sync_token;
+                hasMore = data.has_more;
+            }
+
+            this.filteredBookings = [...this.bookings];
+            this.renderBookingsTable();
+        } catch (error) {
+            console.error('Error syncing bookings:', error);
+            return this.loadBookings();
+        }
+    }
+
     renderBookingsTable() {
         const tbody = document.getElementById('bookings-tbody');
         if (!tbody) return;
@@ -348,7 +398,7 @@ class BookingManager {
                 const result = await response.json();
                 UIUtils.showSuccess(result.message || 'Booking saved successfully');
                 this.closeModal();
-                await this.loadBookings(); // Reload bookings
+                await this.syncBookings(); // Pull only the changed bookings
             } else {
                 const error = await response.json();
                 UIUtils.showError(error.error || 'Failed to save booking', 'modal-error');
@@ -432,7 +482,7 @@ class BookingManager {
             if (response && response.ok) {
                 const result = await response.json();
                 UIUtils.showSuccess(result.message || 'Booking deleted successfully');
-                await this.loadBookings(); // Reload bookings
+                await this.syncBookings(); // Pull only the changed bookings
             } else {
                 const error = await response.json();
                 UIUtils.showError(error.error || 'Failed to delete booking');
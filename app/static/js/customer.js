@@ -456,7 +456,19 @@ class CustomerPortal {
         document.querySelector(`#customer-portal .nav-tab[data-tab="${tabName}"]`).classList.add('active');
     }
 
-    logout() {
+    async logout() {
+        // Revoke the token on the server before dropping it
+        const token = localStorage.getItem('jwt_token');
+        if (token) {
+            try {
+                await fetch('/api/auth/logout', {
+                    method: 'POST',
+                    headers: { 'Authorization': `Bearer ${token}` }
+                });
+            } catch (error) {
+                // The token is dropped locally either way
+            }
+        }
         localStorage.removeItem('jwt_token');
         localStorage.removeItem('user');
         window.location.reload();
@@ -1,9 +1,16 @@
 """Test analytics API endpoints."""
 import pytest
+import csv
+import io
 import json
 from datetime import datetime, timedelta
+from sqlalchemy import event
 from app import create_app, db
-from app.models import User, Booking
+from app.models import User, Booking, BookingMonthlyRollup
+from app.analytics.analytics_service import AnalyticsService
+from app.analytics.export_service import ExportService
+from app.analytics.rollup_service import RollupService
+from app.booking.write_hooks import record_booking_write
 
 
 @pytest.fixture
@@ -178,4 +185,464 @@ def test_analytics_export(client, auth_headers, sample_bookings):
     # Check that we get some export data
     if response.content_type == 'application/json':
         data = json.loads(response.data)
-        assert 'bookings' in data or 'data' in data
\ No newline at end of file
+        assert 'bookings' in data or 'data' in data
+
+
+def test_analytics_streaming_export(app, client, auth_headers, sample_bookings):
+    """Test streamed CSV and NDJSON exports of raw bookings and analytics."""
+    app.config['EXPORT_CHUNK_SIZE'] = 1
+    
+    response = client.get('/api/analytics/export?type=bookings&format=csv&stream=true',
+                          headers=auth_headers)
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'text/csv'
+    assert 'attachment' in response.headers['Content-Disposition']
+    
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == Booking.query.count()
+    john = next(row for row in rows if row['customer_name'] == 'John Doe')
+    assert john['amount'] == '4800000.00'
+    
+    response = client.get('/api/analytics/export?type=bookings&format=ndjson&stream=true&customer_name=jane',
+                          headers=auth_headers)
+    assert response.mimetype == 'application/x-ndjson'
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(records) == 1
+    assert records[0]['customer_name'] == 'Jane Smith'
+    assert records[0]['amount'] == 5800000.0
+    
+    response = client.get('/api/analytics/export?type=projects&format=csv&stream=true',
+                          headers=auth_headers)
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0] == AnalyticsService._get_csv_headers('projects')
+    assert len(rows) == len(AnalyticsService.get_project_distribution()) + 1
+    
+    # Raw bookings can only be exported as a stream
+    response = client.get('/api/analytics/export?type=bookings&format=json', headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_parquet_bookings_export_round_trips(app, client, auth_headers, sample_bookings, tmp_path):
+    """Test that Parquet exports from the API and the CLI reproduce the booking rows exactly."""
+    pq = pytest.importorskip('pyarrow.parquet')
+    app.config['EXPORT_CHUNK_SIZE'] = 4
+    expected = list(ExportService.iter_bookings())
+    
+    response = client.get('/api/analytics/export?type=bookings&format=parquet', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/vnd.apache.parquet'
+    
+    table = pq.read_table(io.BytesIO(response.get_data()))
+    assert str(table.schema.field('amount').type) == 'decimal128(15, 2)'
+    assert str(table.schema.field('created_at').type) == 'timestamp[us]'
+    assert table.to_pylist() == expected
+    assert pq.ParquetFile(io.BytesIO(response.get_data())).num_row_groups == -(-len(expected) // 4)
+    
+    output = tmp_path / 'bookings.parquet'
+    result = app.test_cli_runner().invoke(args=['export-bookings', str(output), '--status', 'complete'])
+    assert result.exit_code == 0, result.output
+    assert pq.read_table(output).to_pylist() == list(ExportService.iter_bookings(filters={'status': ['complete']}))
+    
+    # Aggregated analytics have no Parquet representation
+    response = client.get('/api/analytics/export?type=kpis&format=parquet', headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_kpi_summary_uses_single_query(app, sample_bookings):
+    """Test that all KPIs are computed from a single scan of the bookings table."""
+    statements = []
+    
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', record_statement)
+    try:
+        kpis = AnalyticsService.get_kpi_summary(
+            start_date=datetime.utcnow() - timedelta(days=1),
+            filters={'status': ['active', 'complete', 'cancelled']}
+        )
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record_statement)
+    
+    assert len(statements) == 1
+    
+    # Values must agree with a straightforward computation over the rows
+    bookings = Booking.query.all()
+    revenue_bookings = [b for b in bookings if b.status in ('active', 'complete')]
+    assert kpis['total_bookings'] == len(bookings)
+    assert kpis['active_bookings'] == len([b for b in bookings if b.status == 'active'])
+    assert kpis['completed_bookings'] == len([b for b in bookings if b.status == 'complete'])
+    assert kpis['cancelled_bookings'] == len([b for b in bookings if b.status == 'cancelled'])
+    assert kpis['total_revenue'] == float(sum(b.amount for b in revenue_bookings))
+    assert kpis['total_tax'] == float(sum(b.tax_gst for b in revenue_bookings))
+    assert kpis['total_area'] == float(sum(b.area for b in bookings))
+
+
+def test_dashboard_data_matches_individual_queries(app, sample_bookings):
+    """Test that the single-scan dashboard agrees with the per-chart queries."""
+    chart_types = ['monthly_trends', 'project_distribution', 'property_types',
+                   'status_distribution', 'revenue_trends']
+    scenarios = [
+        (None, None, {}),
+        (datetime.utcnow() - timedelta(days=1), None, {'status': ['active', 'complete']}),
+        (None, datetime.utcnow() + timedelta(days=1), {'project_name': 'green'}),
+    ]
+    
+    for start_date, end_date, filters in scenarios:
+        statements = []
+        
+        def record_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(db.engine, 'before_cursor_execute', record_statement)
+        try:
+            dashboard = AnalyticsService.get_dashboard_data(start_date, end_date, filters)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record_statement)
+        
+        assert len(statements) == 1
+        assert dashboard['kpis'] == AnalyticsService.get_kpi_summary(start_date, end_date, filters)
+        for chart_type in chart_types:
+            assert dashboard['charts'][chart_type] == AnalyticsService.get_chart_data(
+                chart_type, start_date, end_date, filters
+            )
+
+
+def _rollup_contents():
+    """Return the rollup table as a comparable set of tuples."""
+    return {
+        (row.year, row.month, row.project_name, row.type, row.status,
+         row.booking_count, float(row.total_amount), float(row.total_tax), float(row.total_area))
+        for row in BookingMonthlyRollup.query.all()
+    }
+
+
+def test_rollup_tracks_booking_writes(client, auth_headers, sample_bookings):
+    """Test that every booking write path keeps the monthly rollup exact."""
+    booking_id = Booking.query.filter_by(customer_name='John Doe').first().id
+    
+    response = client.put(f'/api/bookings/{booking_id}',
+                          json={'project_name': 'Ocean View', 'amount': 4700000.0},
+                          headers=auth_headers)
+    assert response.status_code == 200
+    
+    other_id = Booking.query.filter_by(customer_name='Jane Smith').first().id
+    response = client.delete(f'/api/bookings/{other_id}', headers=auth_headers)
+    assert response.status_code == 200
+    
+    response = client.delete(f'/api/bookings/{booking_id}/hard-delete', headers=auth_headers)
+    assert response.status_code == 200
+    
+    maintained = _rollup_contents()
+    RollupService.rebuild()
+    assert maintained == _rollup_contents()
+
+
+def test_rollup_survives_drift(client, auth_headers, sample_bookings):
+    """Test that writes to a drifted rollup cell neither fail nor leave empty cells."""
+    from sqlalchemy import text
+    from app.booking.archive_service import BookingArchiveService
+    
+    # A status change that bypasses the write hooks leaves no 'cancelled' cell
+    booking = Booking.query.filter_by(customer_name='John Doe').first()
+    db.session.execute(text("UPDATE bookings SET status = 'cancelled', updated_at = :old WHERE id = :id"),
+                       {'old': datetime.utcnow() - timedelta(days=120), 'id': booking.id})
+    db.session.commit()
+    
+    cell = BookingMonthlyRollup.query.filter_by(project_name='Sunrise Apartments', status='cancelled')
+    assert BookingArchiveService.archive({'cancelled': 90}) == 1
+    assert cell.count() == 0
+    
+    response = client.post('/api/bookings/', json={
+        'customer_name': 'Rohan Das',
+        'contact_number': '9876543212',
+        'project_name': 'Sunrise Apartments',
+        'type': '2BHK',
+        'area': 1100.0,
+        'agreement_cost': 4500000.0,
+        'amount': 4300000.0,
+        'status': 'cancelled',
+        'timeline': (datetime.utcnow() + timedelta(days=30)).isoformat()
+    }, headers=auth_headers)
+    assert response.status_code == 201
+    assert cell.one().booking_count == 1
+
+
+def test_trends_from_rollup_match_raw_bookings(app, sample_bookings):
+    """Test that rollup-backed trends equal trends aggregated from raw rows."""
+    admin = User.query.filter_by(username='admin').first()
+    now = datetime.utcnow()
+    for months_ago, status in [(2, 'active'), (3, 'complete'), (5, 'cancelled'), (14, 'active')]:
+        booking = Booking(
+            customer_name='Backdated Buyer',
+            contact_number='9876500000',
+            project_name='Green Valley',
+            type='2BHK',
+            area=1000.0,
+            agreement_cost=4000000.0,
+            amount=3900000.0,
+            tax_gst=195000.0,
+            status=status,
+            timeline=now + timedelta(days=30),
+            created_at=now - timedelta(days=30 * months_ago),
+            created_by=admin.id
+        )
+        db.session.add(booking)
+        record_booking_write(None, booking)
+    db.session.commit()
+    
+    start_date = now - timedelta(days=400)
+    for filters in [{}, {'status': ['active', 'complete']}, {'project_name': 'green'}]:
+        raw = AnalyticsService._group_measures(
+            AnalyticsService._aggregate(
+                AnalyticsService._month_columns(Booking), start_date, now, filters
+            ),
+            lambda row: (int(row['year']), int(row['month']))
+        )
+        
+        assert AnalyticsService.get_monthly_trends(start_date, now, filters) == \
+            AnalyticsService._format_monthly_trends(raw)
+        for group_by in ['month', 'quarter', 'year']:
+            assert AnalyticsService.get_revenue_trends(start_date, now, filters, group_by) == \
+                AnalyticsService._format_revenue_trends(raw, group_by)
+
+
+def test_analytics_results_cached_until_booking_write(client, auth_headers, sample_bookings):
+    """Test that repeated analytics calls are cached and invalidated by writes."""
+    statements = []
+    
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    filters = {'status': ['complete', 'active']}
+    first = AnalyticsService.get_dashboard_data(filters=filters)
+    
+    event.listen(db.engine, 'before_cursor_execute', record_statement)
+    try:
+        # Equivalent filters in a different order hit the same entry
+        second = AnalyticsService.get_dashboard_data(filters={'status': ['active', 'complete']})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record_statement)
+    
+    assert second is first
+    assert statements == []
+    
+    booking_id = Booking.query.filter_by(customer_name='John Doe').first().id
+    response = client.delete(f'/api/bookings/{booking_id}', headers=auth_headers)
+    assert response.status_code == 200
+    
+    third = AnalyticsService.get_dashboard_data(filters=filters)
+    assert third['kpis']['active_bookings'] == first['kpis']['active_bookings'] - 1
+
+
+def _engine_and_sql_results(app, start_date, end_date, filters):
+    """Compute every analytics result with the columnar engine and with SQL."""
+    results = {}
+    for engine in ['columnar', 'sql']:
+        app.config['ANALYTICS_ENGINE'] = engine
+        results[engine] = [
+            AnalyticsService.get_kpi_summary(start_date, end_date, filters),
+            AnalyticsService.get_monthly_trends(start_date, end_date, filters),
+            AnalyticsService.get_project_distribution(start_date, end_date, filters),
+            AnalyticsService.get_status_distribution(start_date, end_date, filters),
+            AnalyticsService.get_property_type_analysis(start_date, end_date, filters),
+            AnalyticsService.get_revenue_trends(start_date, end_date, filters, 'quarter'),
+            AnalyticsService.get_dashboard_data(start_date, end_date, filters)
+        ]
+    return results['columnar'], results['sql']
+
+
+def test_columnar_engine_matches_sql(app, client, auth_headers, sample_bookings):
+    """Test that the columnar engine returns exactly the SQL results, before and after writes."""
+    pytest.importorskip('numpy')
+    app.config['ANALYTICS_CACHE_ENABLED'] = False
+    
+    admin = User.query.filter_by(username='admin').first()
+    now = datetime.utcnow()
+    for index, (months_ago, status, project, amount, area) in enumerate([
+        (1, 'active', 'Green Valley', 3900000.55, 1000.5),
+        (2, 'cancelled', 'Sunrise Apartments', 2750000.10, 850.0),
+        (4, 'complete', 'Blue_Ridge Towers', 6100000.99, 1725.25),
+        (13, 'active', 'Green Valley', 4200000.0, 1100.0)
+    ]):
+        booking = Booking(
+            customer_name=f'Buyer {index}',
+            contact_number='9876500000',
+            project_name=project,
+            type='2BHK' if index % 2 else 'Villa',
+            area=area,
+            agreement_cost=amount + 100000,
+            amount=amount,
+            tax_gst=round(amount * 0.05, 2),
+            status=status,
+            timeline=now + timedelta(days=30),
+            created_at=now - timedelta(days=30 * months_ago),
+            created_by=admin.id
+        )
+        db.session.add(booking)
+        record_booking_write(None, booking)
+    db.session.commit()
+    
+    scenarios = [
+        (None, None, {}),
+        (now - timedelta(days=200), now, {}),
+        (None, None, {'status': ['active', 'complete']}),
+        (None, None, {'project_name': 'GREEN', 'property_type': 'bhk'}),
+        (None, None, {'project_name': 'e_r', 'customer_name': 'buyer'}),
+        (None, None, {'min_amount': 3000000, 'max_amount': 5000000, 'min_area': 900}),
+        (now - timedelta(days=90), None, {'status': 'cancelled'})
+    ]
+    for start_date, end_date, filters in scenarios:
+        columnar, sql = _engine_and_sql_results(app, start_date, end_date, filters)
+        assert columnar == sql
+    
+    # Writes are applied to the loaded engine incrementally, not by reloading
+    store = app.extensions['columnar_store']
+    john = Booking.query.filter_by(customer_name='John Doe').first()
+    jane = Booking.query.filter_by(customer_name='Jane Smith').first()
+    assert client.put(f'/api/bookings/{john.id}', json={'amount': 4700000.25, 'status': 'complete'},
+                      headers=auth_headers).status_code == 200
+    assert client.delete(f'/api/bookings/{jane.id}/hard-delete', headers=auth_headers).status_code == 200
+    
+    def fail_reload(generation):
+        raise AssertionError('columnar store reloaded')
+    
+    store.load = fail_reload
+    for start_date, end_date, filters in scenarios:
+        columnar, sql = _engine_and_sql_results(app, start_date, end_date, filters)
+        assert columnar == sql
+    assert store.size == Booking.query.count()
+
+
+def test_archived_bookings_keep_analytics_totals(app, client, auth_headers, sample_bookings):
+    """Test that archiving bookings leaves every analytics result unchanged."""
+    pytest.importorskip('numpy')
+    from app.booking.archive_service import BookingArchiveService
+    from app.models import BookingArchive
+    app.config['ANALYTICS_CACHE_ENABLED'] = False
+    
+    admin = User.query.filter_by(username='admin').first()
+    now = datetime.utcnow()
+    for index, (days_ago, status, project) in enumerate([
+        (45, 'cancelled', 'Green Valley'),
+        (75, 'complete', 'Sunrise Apartments'),
+        (130, 'complete', 'Green Valley'),
+        (400, 'cancelled', 'Blue Heights'),
+        (10, 'active', 'Ocean View')
+    ]):
+        booking = Booking(
+            customer_name=f'Archive Buyer {index}',
+            contact_number='9876500000',
+            project_name=project,
+            type='3BHK',
+            area=1000.0 + index * 50,
+            agreement_cost=5000000,
+            amount=4000000.25 + index * 100000,
+            tax_gst=200000.5,
+            status=status,
+            timeline=now + timedelta(days=30),
+            created_at=now - timedelta(days=days_ago),
+            created_by=admin.id
+        )
+        db.session.add(booking)
+        record_booking_write(None, booking)
+    db.session.commit()
+    
+    scenarios = [
+        (None, None, {}),
+        (now - timedelta(days=200), now, {}),
+        (now - timedelta(days=100), now - timedelta(days=40), {'project_name': 'green'}),
+        (None, None, {'status': ['complete', 'cancelled']}),
+        (None, None, {'customer_name': 'archive', 'min_area': 1050})
+    ]
+    app.config['ANALYTICS_ENGINE'] = 'sql'
+    before = [_engine_and_sql_results(app, *scenario)[1] for scenario in scenarios]
+    options = AnalyticsService.get_filter_options()
+    
+    archived = BookingArchiveService.archive({'cancelled': 0, 'complete': 0}, batch_size=3,
+                                             now=datetime.utcnow() + timedelta(seconds=1))
+    assert archived == BookingArchive.query.count() > 0
+    assert Booking.query.filter(Booking.status != 'active').count() == 0
+    
+    # Archived rows are read from the archive rollup and the archive table, by either engine
+    for scenario, expected in zip(scenarios, before):
+        columnar, sql = _engine_and_sql_results(app, *scenario)
+        assert sql == expected
+        assert columnar == expected
+    assert AnalyticsService.get_filter_options() == options
+    
+    # The full ledger export still carries the archived bookings
+    exported = list(ExportService.iter_bookings(filters={'customer_name': 'archive'}))
+    assert [row['customer_name'] for row in exported] == [f'Archive Buyer {index}' for index in range(5)]
+    assert [row['id'] for row in exported] == sorted(row['id'] for row in exported)
+
+
+def test_filter_options_with_counts_from_rollup(client, auth_headers, sample_bookings):
+    """Test that filter options carry booking counts without scanning bookings."""
+    statements = []
+    
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', record_statement)
+    try:
+        response = client.get('/api/analytics/filters/options', headers=auth_headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record_statement)
+    
+    assert response.status_code == 200
+    options = json.loads(response.data)['filter_options']
+    assert not any('FROM bookings' in statement for statement in statements)
+    
+    expected = dict(db.session.query(Booking.project_name, db.func.count(Booking.id))
+                    .group_by(Booking.project_name).all())
+    assert options['projects'] == sorted(expected)
+    assert options['counts']['projects'] == expected
+    assert sum(options['counts']['statuses'].values()) == Booking.query.count()
+    assert options['statuses'] == ['active', 'complete', 'cancelled']
+    
+    # Counts follow booking writes
+    booking_id = Booking.query.filter_by(customer_name='John Doe').first().id
+    client.delete(f'/api/bookings/{booking_id}/hard-delete', headers=auth_headers)
+    response = client.get('/api/analytics/filters/options', headers=auth_headers)
+    counts = json.loads(response.data)['filter_options']['counts']
+    assert counts['projects'].get('Sunrise Apartments', 0) == expected['Sunrise Apartments'] - 1
+
+
+def _sse_events(chunk):
+    """Parse a chunk of a Server-Sent Events stream into {event: data}."""
+    events = {}
+    for block in chunk.decode().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n') if ': ' in line)
+        if 'event' in fields:
+            events[fields['event']] = json.loads(fields['data'])
+    return events
+
+
+def test_dashboard_event_stream_pushes_kpi_deltas(app, client, auth_headers, sample_bookings):
+    """Test that the dashboard stream pushes recomputed KPIs after a write."""
+    app.config.update(EVENTS_POLL_INTERVAL=0.01, EVENTS_MAX_DURATION=5)
+    
+    response = client.get('/api/analytics/events', headers=auth_headers, buffered=False)
+    assert response.status_code == 200
+    chunks = iter(response.response)
+    kpis = _sse_events(next(chunks))['ready']['kpis']
+    assert kpis == AnalyticsService.get_kpi_summary()
+    
+    booking = {
+        'customer_name': 'Stream Buyer', 'contact_number': '9876543299',
+        'project_name': 'Sunrise Apartments', 'type': '2BHK', 'area': 900.0,
+        'agreement_cost': 1100000.0, 'amount': 1000000.0,
+        'timeline': (datetime.utcnow() + timedelta(days=10)).isoformat()
+    }
+    assert client.post('/api/bookings/', json=booking, headers=auth_headers).status_code == 201
+    
+    events = _sse_events(next(chunks))
+    response.close()
+    
+    assert events['bookings']['bookings'][0]['customer_name'] == 'Stream Buyer'
+    assert events['kpis']['kpis']['total_bookings'] == kpis['total_bookings'] + 1
+    assert events['kpis']['delta']['total_bookings'] == 1
+    assert events['kpis']['delta']['total_revenue'] == 1000000.0
@@ -1,7 +1,18 @@
 """Test basic Flask application setup."""
+import os
+import subprocess
+import sys
 import pytest
 from app import create_app
 
+# Import time of the application allowed, relative to importing Flask,
+# Flask-SQLAlchemy and SQLAlchemy in the same run (roughly 0.5 without the
+# optional dependencies); a ratio keeps slow machines from failing the test
+IMPORT_TIME_BUDGET_RATIO = 1.0
+
+# Packages that creating the app must leave unimported
+OPTIONAL_DEPENDENCIES = ('openai', 'reportlab', 'requests', 'pyarrow')
+
 
 @pytest.fixture
 def app():
@@ -31,6 +42,18 @@ def test_health_check(client):
     data = response.get_json()
     assert data['status'] == 'healthy'
     assert 'ONC REALTY PARTNERS' in data['message']
+    
+    # Optional dependencies are listed once something has asked for them
+    from app.optional_imports import is_available
+    available = is_available('pyarrow')
+    assert client.get('/api/health').get_json()['optional_dependencies']['pyarrow'] is available
+    
+    # Connections carry the configured SQLite profile
+    pragmas = data['database']['pragmas']
+    assert data['database']['dialect'] == 'sqlite'
+    assert pragmas['busy_timeout'] == 5000
+    assert pragmas['foreign_keys'] == 1
+    assert pragmas['temp_store'] == 2
 
 
 def test_cors_configuration(app):
@@ -42,4 +65,176 @@ def test_cors_configuration(app):
 def test_json_configuration(app):
     """Test JSON handling configuration."""
     assert app.config['JSON_SORT_KEYS'] is False
-    assert app.json.ensure_ascii is False
\ No newline at end of file
+    assert app.json.ensure_ascii is False
+
+
+def test_sqlite_profile_keeps_reads_going_during_writes(tmp_path):
+    """Test that the WAL profile lets readers run while a writer commits."""
+    from app.config import Config
+    from app.sqlite_benchmark import run_benchmark
+    
+    result = run_benchmark(Config.SQLITE_PRAGMAS, duration=0.5, readers=2, rows=200,
+                           directory=str(tmp_path))
+    assert result['journal_mode'] == 'wal'
+    assert result['writes'] > 0 and result['reads'] > 0
+    assert result['read_errors'] == result['write_errors'] == 0
+
+
+def test_sqlite_profile_rejects_unknown_pragmas():
+    """Test that only known pragmas with plain values can be configured."""
+    from app.sqlite_profile import validate_pragmas
+    
+    assert list(validate_pragmas({'foreign_keys': 'ON', 'journal_mode': 'WAL'})) == ['journal_mode', 'foreign_keys']
+    with pytest.raises(ValueError):
+        validate_pragmas({'writable_schema': 'ON'})
+    with pytest.raises(ValueError):
+        validate_pragmas({'journal_mode': 'WAL; DROP TABLE bookings'})
+
+
+def test_initialized_database_starts_without_ddl_or_seeding(tmp_path):
+    """Test that create_app() only reads schema_meta once the database is initialized."""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from app import db
+    from app.models import Booking, User
+    
+    overrides = {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'startup.db'}",
+        'SHARED_STATE_DIR': str(tmp_path),
+        'SEED_ON_STARTUP': False
+    }
+    app = create_app('testing', overrides)
+    with app.app_context():
+        assert User.query.count() == 0
+    
+    runner = app.test_cli_runner()
+    assert 'booking records' in runner.invoke(args=['seed-database']).output
+    assert 'already seeded' in runner.invoke(args=['seed-database']).output
+    with app.app_context():
+        assert User.query.count() == 3
+        assert Booking.query.count() == 10
+        db.engine.dispose()
+    
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith('PRAGMA'):
+            statements.append(statement)
+    
+    event.listen(Engine, 'before_cursor_execute', record)
+    try:
+        create_app('testing', dict(overrides, SEED_ON_STARTUP=True))
+    finally:
+        event.remove(Engine, 'before_cursor_execute', record)
+    
+    assert len(statements) == 1
+    assert 'FROM schema_meta' in statements[0]
+
+
+def test_upgrade_rebuilds_bookings_without_autoincrement(tmp_path):
+    """Test that bookings created before AUTOINCREMENT never get archived ids again."""
+    import sqlite3
+    from app import db
+    from app.models import Booking
+    
+    database_path = tmp_path / 'legacy.db'
+    overrides = {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database_path}',
+        'SHARED_STATE_DIR': str(tmp_path),
+        'SEED_ON_STARTUP': True
+    }
+    with create_app('testing', overrides).app_context():
+        db.engine.dispose()
+    
+    # Recreate bookings the way older versions declared it
+    connection = sqlite3.connect(database_path)
+    with connection:
+        sql = connection.execute("SELECT sql FROM sqlite_master WHERE name = 'bookings'").fetchone()[0]
+        connection.execute(sql.replace('CREATE TABLE bookings', 'CREATE TABLE legacy').replace('AUTOINCREMENT', ''))
+        connection.execute('INSERT INTO legacy SELECT * FROM bookings')
+        connection.execute('DROP TABLE bookings')
+        connection.execute('ALTER TABLE legacy RENAME TO bookings')
+        columns = ', '.join(column.name for column in Booking.__table__.columns if column.name != 'id')
+        connection.execute(f'INSERT INTO bookings_archive (id, {columns}, archived_at) '
+                           f'SELECT 50, {columns}, updated_at FROM bookings WHERE id = 1')
+        connection.execute("DELETE FROM schema_meta WHERE key = 'schema_version'")
+    connection.close()
+    
+    app = create_app('testing', overrides)
+    with app.app_context():
+        assert 'AUTOINCREMENT' in db.session.execute(
+            db.text("SELECT sql FROM sqlite_master WHERE name = 'bookings'")
+        ).scalar()
+        assert Booking.query.count() == 10
+        booking = Booking(**{column.name: getattr(Booking.query.first(), column.name)
+                             for column in Booking.__table__.columns if column.name != 'id'})
+        db.session.add(booking)
+        db.session.commit()
+        assert booking.id == 51
+        db.engine.dispose()
+
+
+def test_in_memory_database_loads_from_snapshot(tmp_path):
+    """Test that seeded snapshots and in-process clones give independent, complete databases."""
+    from app import db
+    from app.database import build_snapshot, start_database
+    from app.models import Booking, User
+    
+    snapshot = str(tmp_path / 'seed.db')
+    build_snapshot(snapshot)
+    
+    app = create_app('production', {'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+                                     'SQLALCHEMY_ENGINE_OPTIONS': {},
+                                     'SEED_SNAPSHOT': snapshot})
+    with app.app_context():
+        assert start_database(app.config) == 'snapshot'
+        assert User.query.filter_by(username='admin').first().check_password('admin123')
+        assert Booking.query.count() == 10
+    
+    response = app.test_client().post('/api/auth/login', json={'username': 'sales', 'password': 'sales123'})
+    assert response.status_code == 200
+    
+    # Writes to one clone do not reach the next one
+    first = create_app('testing')
+    with first.app_context():
+        db.session.delete(Booking.query.first())
+        db.session.commit()
+        assert Booking.query.count() == 9
+    
+    second = create_app('testing')
+    with second.app_context():
+        assert start_database(second.config) == 'clone'
+        assert Booking.query.count() == 10
+
+
+def test_create_app_import_time_stays_within_budget():
+    """Test that creating the app imports no optional dependency and stays within the import budget."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = (
+        "import sys\n"
+        "import flask, flask_sqlalchemy, sqlalchemy\n"
+        "from app import create_app\n"
+        "create_app('testing')\n"
+        f"print('imported:', ','.join(sorted(name for name in {OPTIONAL_DEPENDENCIES!r} if name in sys.modules)))\n"
+    )
+    # A fresh interpreter, since this one may have imported them already
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', script],
+                            cwd=root, capture_output=True, text=True, check=True)
+    assert result.stdout.splitlines()[-1] == 'imported: '
+    
+    # Cumulative times of top-level imports, in the order they finished
+    imports = []
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and 'self [us]' not in line:
+            _, cumulative, name = line.split('|')
+            if not name.startswith('  '):
+                imports.append((name.strip(), int(cumulative)))
+    
+    frameworks = max(index for index, (name, _) in enumerate(imports)
+                     if name in ('flask', 'flask_sqlalchemy', 'sqlalchemy'))
+    baseline = sum(time for name, time in imports[:frameworks + 1]
+                   if name in ('flask', 'flask_sqlalchemy', 'sqlalchemy'))
+    application = sum(time for _, time in imports[frameworks + 1:])
+    ratio = application / baseline
+    assert ratio < IMPORT_TIME_BUDGET_RATIO, \
+        f'create_app imports took {application / 1000:.0f} ms, {ratio:.2f}x Flask and SQLAlchemy'
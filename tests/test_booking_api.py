@@ -1,5 +1,8 @@
 """Test booking API endpoints."""
 import pytest
+import base64
+import csv
+import io
 import json
 from datetime import datetime, timedelta
 from app import create_app, db
@@ -82,6 +85,69 @@ def test_search_bookings(client, auth_headers):
     assert data['query'] == 'test'
 
 
+def _search(client, auth_headers, term):
+    """Return the customer names found by the search endpoint."""
+    response = client.get('/api/bookings/search', query_string={'q': term}, headers=auth_headers)
+    assert response.status_code == 200
+    return [booking['customer_name'] for booking in json.loads(response.data)['results']]
+
+
+def test_search_full_text_index(app, client, auth_headers):
+    """Test prefix search, ranking and index maintenance on booking writes."""
+    from app.booking.search_index import fts_enabled
+    if not fts_enabled():
+        pytest.skip('SQLite build without FTS5')
+    
+    booking_data = {
+        'customer_name': 'Zoya Lakeview',
+        'contact_number': '7012345678',
+        'project_name': 'Lakeview Residency',
+        'type': '3BHK',
+        'area': 1400,
+        'agreement_cost': 6000000,
+        'amount': 5500000,
+        'timeline': (datetime.utcnow() + timedelta(days=30)).isoformat()
+    }
+    response = client.post('/api/bookings/', json=booking_data, headers=auth_headers)
+    booking_id = json.loads(response.data)['booking']['id']
+    response = client.post('/api/bookings/', json=dict(booking_data, customer_name='Tarun Rao'),
+                          headers=auth_headers)
+    assert response.status_code == 201
+    
+    # Prefix matches across columns; the booking matching in two columns ranks first
+    assert _search(client, auth_headers, 'lakev') == ['Zoya Lakeview', 'Tarun Rao']
+    assert _search(client, auth_headers, 'tarun lake') == ['Tarun Rao']
+    assert sorted(_search(client, auth_headers, '70123')) == ['Tarun Rao', 'Zoya Lakeview']
+    
+    client.put(f'/api/bookings/{booking_id}', json={'customer_name': 'Zoya Iyer'}, headers=auth_headers)
+    assert _search(client, auth_headers, 'zoya') == ['Zoya Iyer']
+    
+    client.delete(f'/api/bookings/{booking_id}/hard-delete', headers=auth_headers)
+    assert _search(client, auth_headers, 'zoya') == []
+    
+    response = client.get('/api/bookings/', query_string={'search': 'taru'}, headers=auth_headers)
+    assert [b['customer_name'] for b in json.loads(response.data)['bookings']] == ['Tarun Rao']
+
+
+def test_search_like_fallback(app, client, auth_headers):
+    """Test that search falls back to substring matching without a full-text index."""
+    app.extensions['booking_fts'] = False
+    
+    booking_data = {
+        'customer_name': 'Fallback Buyer',
+        'contact_number': '9123456780',
+        'project_name': 'Substring Heights',
+        'type': '2BHK',
+        'area': 1000,
+        'agreement_cost': 5000000,
+        'amount': 4500000,
+        'timeline': (datetime.utcnow() + timedelta(days=30)).isoformat()
+    }
+    client.post('/api/bookings/', json=booking_data, headers=auth_headers)
+    
+    assert _search(client, auth_headers, 'string heig') == ['Fallback Buyer']
+
+
 def test_booking_stats(client, auth_headers):
     """Test getting booking statistics."""
     response = client.get('/api/bookings/stats', headers=auth_headers)
@@ -131,4 +197,576 @@ def test_create_booking_validation(client, auth_headers):
     
     assert response.status_code == 400
     data = json.loads(response.data)
-    assert 'Invalid timeline format' in data['error']
\ No newline at end of file
+    assert 'Invalid timeline format' in data['error']
+
+def test_get_bookings_keyset_pagination(client, auth_headers):
+    """Test that cursor pages cover every booking exactly once in sort order."""
+    total = Booking.query.count()
+    assert total > 3
+    
+    for sort_by in ['created_at', 'updated_at', 'customer_name', 'project_name',
+                    'amount', 'timeline', 'status']:
+        for sort_order in ['asc', 'desc']:
+            params = {'pagination': 'cursor', 'per_page': 3,
+                      'sort_by': sort_by, 'sort_order': sort_order}
+            seen = []
+            while True:
+                response = client.get('/api/bookings/', query_string=params, headers=auth_headers)
+                assert response.status_code == 200
+                data = json.loads(response.data)
+                assert 'total' not in data['pagination']
+                seen.extend(data['bookings'])
+                if not data['pagination']['has_next']:
+                    assert data['pagination']['next_cursor'] is None
+                    break
+                params['after'] = data['pagination']['next_cursor']
+            
+            keys = [(booking[sort_by], booking['id']) for booking in seen]
+            assert len(seen) == total
+            assert keys == sorted(keys, reverse=sort_order == 'desc')
+    
+    response = client.get('/api/bookings/', query_string={'pagination': 'cursor', 'include_total': 'true',
+                                                          'status': 'active'}, headers=auth_headers)
+    assert json.loads(response.data)['pagination']['total'] == Booking.query.filter_by(status='active').count()
+    
+    # Cursors are bound to their sort order
+    response = client.get('/api/bookings/', query_string={'pagination': 'cursor', 'per_page': 1},
+                          headers=auth_headers)
+    cursor = json.loads(response.data)['pagination']['next_cursor']
+    response = client.get('/api/bookings/', query_string={'after': cursor, 'sort_by': 'amount'},
+                          headers=auth_headers)
+    assert response.status_code == 400
+    response = client.get('/api/bookings/', query_string={'after': 'not-a-cursor'}, headers=auth_headers)
+    assert response.status_code == 400
+    
+    # Cursor values must match the type of the sort column
+    for sort_by, value in [('amount', 'abc'), ('amount', [1]), ('customer_name', 5), ('created_at', 7)]:
+        forged = base64.urlsafe_b64encode(json.dumps([sort_by, 'desc', value, 9]).encode()).decode()
+        response = client.get('/api/bookings/', query_string={'after': forged, 'sort_by': sort_by},
+                              headers=auth_headers)
+        assert response.status_code == 400
+
+
+def test_sparse_fieldsets_match_full_serialization(client, auth_headers):
+    """Test that fields= returns exactly the requested subset of to_dict()."""
+    fields = ['id', 'customer_name', 'amount', 'status', 'created_at', 'total_amount']
+    full = json.loads(client.get('/api/bookings/', headers=auth_headers).data)['bookings']
+    
+    for params in [{}, {'pagination': 'cursor'}]:
+        response = client.get('/api/bookings/', query_string=dict(params, fields=','.join(fields)),
+                              headers=auth_headers)
+        assert response.status_code == 200
+        sparse = json.loads(response.data)['bookings']
+        expected = [{name: booking[name] for name in fields} for booking in full]
+        assert sorted(sparse, key=lambda b: b['id']) == sorted(expected, key=lambda b: b['id'])
+    
+    booking = full[0]
+    response = client.get(f"/api/bookings/{booking['id']}?fields=net_refund,timeline", headers=auth_headers)
+    assert json.loads(response.data)['booking'] == {
+        'net_refund': booking['net_refund'], 'timeline': booking['timeline']
+    }
+    
+    response = client.get('/api/bookings/search', query_string={'q': booking['customer_name'], 'fields': 'id'},
+                          headers=auth_headers)
+    assert {'id': booking['id']} in json.loads(response.data)['results']
+    
+    response = client.get('/api/bookings/?fields=id,password', headers=auth_headers)
+    assert response.status_code == 400
+    assert 'password' in json.loads(response.data)['error']
+
+
+def _bulk_row(name, **overrides):
+    """Build a valid bulk booking payload."""
+    row = {
+        'customer_name': name,
+        'contact_number': '7012345600',
+        'project_name': 'Harbour Heights',
+        'type': '3BHK',
+        'area': 1500,
+        'agreement_cost': 6000000,
+        'amount': 5500000,
+        'tax_gst': 550000,
+        'timeline': (datetime.utcnow() + timedelta(days=60)).isoformat()
+    }
+    row.update(overrides)
+    return row
+
+
+def test_bulk_create_atomic_and_best_effort(client, auth_headers):
+    """Test that atomic batches are all-or-nothing and best-effort ones are not."""
+    count = Booking.query.count()
+    rows = [_bulk_row('Ishaan Bulk'), _bulk_row('Tara Bulk', area=-5), _bulk_row('Nikhil Bulk', timeline='soon')]
+    
+    response = client.post('/api/bookings/bulk', json={'bookings': rows}, headers=auth_headers)
+    assert response.status_code == 400
+    data = json.loads(response.data)
+    assert [r['status'] for r in data['results']] == ['skipped', 'error', 'error']
+    assert 'Area must be greater than 0' in data['results'][1]['errors']
+    assert Booking.query.count() == count
+    
+    response = client.post('/api/bookings/bulk', json={'bookings': rows, 'mode': 'best_effort'},
+                           headers=auth_headers)
+    assert response.status_code == 201
+    data = json.loads(response.data)
+    assert (data['created'], data['failed']) == (1, 2)
+    booking = db.session.get(Booking, data['results'][0]['id'])
+    assert booking.customer_name == 'Ishaan Bulk'
+    assert Booking.query.count() == count + 1
+    
+    # Bulk inserts reach the same derived data as single writes
+    response = client.get('/api/bookings/search?q=Ishaan', headers=auth_headers)
+    assert [r['id'] for r in json.loads(response.data)['results']] == [booking.id]
+    
+    response = client.post('/api/bookings/bulk', json={'bookings': rows, 'mode': 'partial'},
+                           headers=auth_headers)
+    assert response.status_code == 400
+    response = client.post('/api/bookings/bulk', json={'bookings': []}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_bulk_best_effort_with_offset_timelines(client, auth_headers):
+    """Test that timelines with a UTC offset are stored as naive UTC in best-effort batches."""
+    rows = [
+        _bulk_row('Zoya Offset', timeline='2030-01-01T05:30:00+05:30'),
+        _bulk_row('Yash Offset', timeline='2030-06-01T00:00:00Z'),
+        _bulk_row('Xavier Offset', timeline='2001-01-01T00:00:00+05:30'),
+    ]
+    response = client.post('/api/bookings/bulk', json={'bookings': rows, 'mode': 'best_effort'},
+                           headers=auth_headers)
+    assert response.status_code == 201
+    data = json.loads(response.data)
+    assert (data['created'], data['failed']) == (2, 1)
+    assert data['results'][2]['status'] == 'error'
+    assert db.session.get(Booking, data['results'][0]['id']).timeline == datetime(2030, 1, 1)
+    
+    response = client.patch('/api/bookings/bulk',
+                            json={'bookings': [{'id': data['results'][1]['id'], 'timeline': '2031-01-01T00:00:00Z'}],
+                                  'mode': 'best_effort'},
+                            headers=auth_headers)
+    assert response.status_code == 200
+    assert json.loads(response.data)['updated'] == 1
+
+
+def test_bulk_update(client, auth_headers):
+    """Test batched partial updates with per-row results."""
+    response = client.post('/api/bookings/bulk',
+                           json={'bookings': [_bulk_row('Farah Bulk'), _bulk_row('Kabir Bulk')]},
+                           headers=auth_headers)
+    first, second = [r['id'] for r in json.loads(response.data)['results']]
+    
+    rows = [{'id': first, 'amount': 100}, {'id': second, 'status': 'archived'}, {'id': 999999, 'amount': 1},
+            {'id': [first], 'amount': 5}]
+    response = client.patch('/api/bookings/bulk', json={'bookings': rows}, headers=auth_headers)
+    assert response.status_code == 400
+    assert float(db.session.get(Booking, first).amount) == 5500000
+    
+    response = client.patch('/api/bookings/bulk', json={'bookings': rows, 'mode': 'best_effort'},
+                            headers=auth_headers)
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert (data['updated'], data['failed']) == (1, 3)
+    assert data['results'][2]['errors'] == ['Booking not found']
+    assert data['results'][3]['errors'] == ['Booking id must be an integer']
+    
+    db.session.expire_all()
+    assert float(db.session.get(Booking, first).amount) == 100
+    assert db.session.get(Booking, second).status == 'active'
+    
+    response = client.get(f'/api/bookings/{first}', headers=auth_headers)
+    assert json.loads(response.data)['booking']['total_amount'] == 550100
+
+
+def _import_csv(rows):
+    """Build an import CSV with the given (name, area, timeline) rows."""
+    lines = ['customer_name,contact_number,project_name,type,area,agreement_cost,amount,timeline,tax_gst']
+    for name, area, timeline in rows:
+        lines.append(f'{name},7012345601,Harbour Heights,2BHK,{area},5000000,4500000,{timeline},')
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def test_csv_import_chunks_errors_and_resume(app, client, auth_headers, tmp_path, monkeypatch):
+    """Test chunked CSV import with an error report and resume after a failure."""
+    from app.booking.bulk_service import BulkBookingService
+    
+    app.config['IMPORT_DIR'] = str(tmp_path)
+    future = (datetime.utcnow() + timedelta(days=30)).isoformat()
+    count = Booking.query.count()
+    
+    rows = [(f'Csv Buyer {i}', 900, future) for i in range(7)]
+    rows[2] = ('Csv Bad Area', -1, future)
+    rows[5] = ('Csv Bad Date', 900, 'someday')
+    
+    # Fail the third chunk: the first two stay committed
+    insert_bookings = BulkBookingService.insert_bookings
+    calls = []
+    
+    def flaky(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 3:
+            raise RuntimeError('disk full')
+        return insert_bookings(*args, **kwargs)
+    
+    monkeypatch.setattr(BulkBookingService, 'insert_bookings', staticmethod(flaky))
+    response = client.post('/api/bookings/import', headers=auth_headers,
+                           data={'file': (io.BytesIO(_import_csv(rows)), 'crm.csv'), 'chunk_size': '2'})
+    assert response.status_code == 400
+    job = json.loads(response.data)['import']
+    assert (job['status'], job['rows_processed'], job['rows_imported'], job['rows_failed']) == ('failed', 4, 3, 1)
+    assert job['error'] == 'disk full'
+    assert Booking.query.count() == count + 3
+    
+    monkeypatch.setattr(BulkBookingService, 'insert_bookings', staticmethod(insert_bookings))
+    response = client.post(f"/api/bookings/imports/{job['id']}/resume", headers=auth_headers)
+    assert response.status_code == 200
+    job = json.loads(response.data)['import']
+    assert (job['status'], job['rows_processed'], job['rows_imported'], job['rows_failed']) == ('completed', 7, 5, 2)
+    assert Booking.query.count() == count + 5
+    assert Booking.query.filter(Booking.customer_name.like('Csv Buyer%')).count() == 5
+    
+    response = client.get(f"/api/bookings/imports/{job['id']}/errors", headers=auth_headers)
+    assert response.status_code == 200
+    report = list(csv.DictReader(io.StringIO(response.data.decode())))
+    assert [(r['line'], r['customer_name']) for r in report] == [('4', 'Csv Bad Area'), ('7', 'Csv Bad Date')]
+    assert 'Invalid timeline format' in report[1]['errors']
+    
+    response = client.get(f"/api/bookings/imports/{job['id']}", headers=auth_headers)
+    assert json.loads(response.data)['import']['status'] == 'completed'
+    
+    response = client.post('/api/bookings/import', headers=auth_headers,
+                           data={'file': (io.BytesIO(b'name,phone\nA,1\n'), 'other.csv')})
+    assert response.status_code == 400
+    assert 'Missing required columns' in json.loads(response.data)['error']
+
+
+def test_csv_import_utc_timelines_and_row_exceptions(app, client, auth_headers, tmp_path, monkeypatch):
+    """Test that Z-suffixed timelines import and a row that raises only fails itself."""
+    from app.booking.bulk_service import BulkBookingService
+    
+    app.config['IMPORT_DIR'] = str(tmp_path)
+    prepare_create = BulkBookingService._prepare_create
+    
+    def explode_on_marker(data, user_id, now):
+        if data.get('customer_name') == 'Csv Exploding':
+            raise RuntimeError('unexpected value')
+        return prepare_create(data, user_id, now)
+    
+    monkeypatch.setattr(BulkBookingService, '_prepare_create', staticmethod(explode_on_marker))
+    rows = [('Csv Zulu One', 900, '2030-01-01T00:00:00Z'),
+            ('Csv Exploding', 900, '2030-01-01T00:00:00Z'),
+            ('Csv Zulu Two', 900, '2030-02-01T05:30:00+05:30')]
+    response = client.post('/api/bookings/import', headers=auth_headers,
+                           data={'file': (io.BytesIO(_import_csv(rows)), 'zulu.csv')})
+    assert response.status_code == 201
+    job = json.loads(response.data)['import']
+    assert (job['status'], job['rows_processed'], job['rows_imported'], job['rows_failed']) == ('completed', 3, 2, 1)
+    assert Booking.query.filter_by(customer_name='Csv Zulu One').one().timeline == datetime(2030, 1, 1)
+    assert Booking.query.filter_by(customer_name='Csv Zulu Two').one().timeline == datetime(2030, 2, 1)
+    
+    response = client.get(f"/api/bookings/imports/{job['id']}/errors", headers=auth_headers)
+    report = list(csv.DictReader(io.StringIO(response.data.decode())))
+    assert [(r['line'], r['customer_name']) for r in report] == [('3', 'Csv Exploding')]
+    assert 'unexpected value' in report[0]['errors']
+
+
+def test_booking_changes_delta_sync(client, auth_headers):
+    """Test delta sync of inserts, updates, cancellations and hard deletes."""
+    from app.models import BookingChange
+    from app.booking.sync_service import BookingSyncService
+    
+    token = json.loads(client.get('/api/bookings/', headers=auth_headers).data)['sync_token']
+    response = client.get(f'/api/bookings/changes?since={token}', headers=auth_headers)
+    data = json.loads(response.data)
+    assert (data['bookings'], data['deleted'], data['sync_token']) == ([], [], token)
+    
+    response = client.post('/api/bookings/bulk', json={'bookings': [
+        _bulk_row('Delta One'), _bulk_row('Delta Two'), _bulk_row('Delta Three')
+    ]}, headers=auth_headers)
+    first, second, third = [r['id'] for r in json.loads(response.data)['results']]
+    client.put(f'/api/bookings/{first}', json={'amount': 1234}, headers=auth_headers)
+    client.delete(f'/api/bookings/{second}', headers=auth_headers)
+    client.delete(f'/api/bookings/{third}/hard-delete', headers=auth_headers)
+    
+    response = client.get(f'/api/bookings/changes?since={token}', headers=auth_headers)
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    changed = {booking['id']: booking for booking in data['bookings']}
+    assert set(changed) == {first, second}
+    assert changed[first]['amount'] == 1234
+    assert changed[second]['status'] == 'cancelled'
+    assert data['deleted'] == [third]
+    assert data['has_more'] is False
+    
+    # Paging through the log with a small limit ends at the same token
+    next_token, seen = token, set()
+    while True:
+        page = json.loads(client.get(f'/api/bookings/changes?since={next_token}&limit=2',
+                                     headers=auth_headers).data)
+        seen.update(booking['id'] for booking in page['bookings'])
+        seen.update(page['deleted'])
+        next_token = page['sync_token']
+        if not page['has_more']:
+            break
+    assert seen == {first, second, third}
+    assert next_token == data['sync_token']
+    
+    response = client.get('/api/bookings/changes?since=abc', headers=auth_headers)
+    assert response.status_code == 400
+    
+    # Tokens older than the retained log must trigger a full reload
+    BookingChange.query.update({'changed_at': datetime.utcnow() - timedelta(days=90)})
+    db.session.commit()
+    assert BookingSyncService.prune(30) > 0
+    response = client.get(f'/api/bookings/changes?since={token}', headers=auth_headers)
+    assert response.status_code == 410
+    response = client.get(f"/api/bookings/changes?since={data['sync_token']}", headers=auth_headers)
+    assert response.status_code == 200
+
+
+def _sse_events(text):
+    """Parse a Server-Sent Events body into (event, data, id) tuples."""
+    events = []
+    for block in text.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n') if ': ' in line and not line.startswith(':'))
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data']), fields.get('id')))
+    return events
+
+
+def test_booking_event_stream(app, client, auth_headers):
+    """Test that the event stream replays missed changes and pushes live ones."""
+    app.config.update(EVENTS_POLL_INTERVAL=0.01, EVENTS_MAX_DURATION=5)
+    token = json.loads(client.get('/api/bookings/changes', headers=auth_headers).data)['sync_token']
+    
+    response = client.post('/api/bookings/bulk', json={'bookings': [_bulk_row('Stream Early')]},
+                           headers=auth_headers)
+    early = json.loads(response.data)['results'][0]['id']
+    
+    # Reconnecting with Last-Event-ID replays the changes missed since then
+    response = client.get('/api/bookings/events', headers=dict(auth_headers, **{'Last-Event-ID': token}),
+                          buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    events = _sse_events(next(chunks).decode())
+    assert events[0][0] == 'ready'
+    assert events[1][0] == 'bookings'
+    assert [b['id'] for b in events[1][1]['bookings']] == [early]
+    assert set(events[1][1]['bookings'][0]) <= {'id', 'customer_name', 'project_name', 'type', 'amount',
+                                                'status', 'timeline', 'updated_at'}
+    
+    # A write made while the stream is open is pushed to it
+    client.delete(f'/api/bookings/{early}', headers=auth_headers)
+    events = _sse_events(next(chunks).decode())
+    assert events[0][0] == 'bookings'
+    assert events[0][1]['bookings'][0]['status'] == 'cancelled'
+    assert events[0][2] == events[0][1]['sync_token']
+    response.close()
+    
+    response = client.get('/api/bookings/events?since=x', headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_event_streams_are_capped_per_worker(app, client, auth_headers):
+    """Test that streams beyond EVENTS_MAX_STREAMS are turned away until a slot frees up."""
+    app.config.update(EVENTS_POLL_INTERVAL=0.01, EVENTS_MAX_DURATION=5, EVENTS_MAX_STREAMS=1)
+    
+    first = client.get('/api/bookings/events', headers=auth_headers, buffered=False)
+    assert _sse_events(next(iter(first.response)).decode())[0][0] == 'ready'
+    
+    second = client.get('/api/bookings/events', headers=auth_headers, buffered=False)
+    body = b''.join(second.response).decode()
+    assert body.startswith('retry: 15000')
+    assert _sse_events(body)[0][0] == 'busy'
+    
+    first.close()
+    third = client.get('/api/bookings/events', headers=auth_headers, buffered=False)
+    assert _sse_events(next(iter(third.response)).decode())[0][0] == 'ready'
+    third.close()
+
+
+def test_booking_stats_from_maintained_counters(app, client, auth_headers):
+    """Test that stats read the counters, which track every kind of booking write."""
+    from sqlalchemy import event, func
+    from app.models import BookingCounter
+    from app.booking.counter_service import BookingCounterService
+    
+    def recount():
+        count = lambda status: Booking.query.filter_by(status=status).count()
+        revenue = db.session.query(func.sum(Booking.amount)).filter(
+            Booking.status.in_(['active', 'complete'])).scalar()
+        return {
+            'total_bookings': Booking.query.count(),
+            'active_bookings': count('active'),
+            'completed_bookings': count('complete'),
+            'cancelled_bookings': count('cancelled'),
+            'total_revenue': float(revenue or 0)
+        }
+    
+    response = client.post('/api/bookings/bulk', json={'bookings': [
+        _bulk_row('Counter One', amount=1000.55), _bulk_row('Counter Two'), _bulk_row('Counter Three')
+    ]}, headers=auth_headers)
+    first, second, third = [r['id'] for r in json.loads(response.data)['results']]
+    client.put(f'/api/bookings/{first}', json={'status': 'complete', 'amount': 2000.45}, headers=auth_headers)
+    client.delete(f'/api/bookings/{second}', headers=auth_headers)
+    client.delete(f'/api/bookings/{third}/hard-delete', headers=auth_headers)
+    
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        data = json.loads(client.get('/api/bookings/stats', headers=auth_headers).data)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    
+    assert not [s for s in statements if 'FROM bookings' in s]
+    expected = recount()
+    assert {key: data[key] for key in expected} == pytest.approx(expected)
+    assert data['completion_rate'] == pytest.approx(expected['completed_bookings'] / expected['total_bookings'] * 100)
+    assert BookingCounterService.reconcile() == []
+    
+    # Drift is reported and repaired by the reconciliation command
+    db.session.get(BookingCounter, 'active').booking_count += 5
+    db.session.commit()
+    result = app.test_cli_runner().invoke(args=['reconcile-booking-counters'])
+    assert result.exit_code != 0
+    assert 'active: stored' in result.output
+    result = app.test_cli_runner().invoke(args=['reconcile-booking-counters', '--fix'])
+    assert result.exit_code == 0
+    assert BookingCounterService.reconcile() == []
+
+
+def test_archive_bookings_by_policy(app, client, auth_headers):
+    """Test that archived bookings leave lists and search unless asked for, but still count."""
+    from app.models import BookingArchive
+    
+    stats = json.loads(client.get('/api/bookings/stats', headers=auth_headers).data)
+    sync_token = json.loads(client.get('/api/bookings/', headers=auth_headers).data)['sync_token']
+    
+    # A long-cancelled booking, a long-completed one and a recently completed one
+    cancelled = Booking.query.filter_by(customer_name='Vikram Singh').first()
+    completed = Booking.query.filter_by(customer_name='Priya Sharma').first()
+    cancelled.updated_at = datetime.utcnow() - timedelta(days=120)
+    completed.updated_at = datetime.utcnow() - timedelta(days=400)
+    db.session.commit()
+    cancelled_id, archived_ids = cancelled.id, {cancelled.id, completed.id}
+    
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['archive-bookings', '--dry-run'])
+    assert result.exit_code == 0
+    assert '2 bookings would be archived' in result.output
+    assert BookingArchive.query.count() == 0
+    
+    assert runner.invoke(args=['archive-bookings', '--policy', 'active:1']).exit_code != 0
+    result = runner.invoke(args=['archive-bookings'])
+    assert result.exit_code == 0
+    assert 'Archived 2 bookings' in result.output
+    assert {booking.id for booking in BookingArchive.query.all()} == archived_ids
+    
+    data = json.loads(client.get('/api/bookings/?per_page=100', headers=auth_headers).data)
+    assert data['pagination']['total'] == 8
+    assert not archived_ids & {booking['id'] for booking in data['bookings']}
+    
+    data = json.loads(client.get('/api/bookings/?per_page=100&include_archived=true',
+                                 headers=auth_headers).data)
+    assert data['pagination']['total'] == 10
+    assert data['filters_applied']['include_archived'] is True
+    listed = {booking['id']: booking for booking in data['bookings']}
+    assert listed[cancelled_id]['status'] == 'cancelled'
+    
+    # Cursor pages and sparse fieldsets work over the archive too
+    seen, after = [], None
+    while True:
+        url = '/api/bookings/?include_archived=true&pagination=cursor&per_page=3&fields=id,status'
+        page = json.loads(client.get(url + (f'&after={after}' if after else ''), headers=auth_headers).data)
+        seen += [booking['id'] for booking in page['bookings']]
+        after = page['pagination']['next_cursor']
+        if not after:
+            break
+    assert sorted(seen) == sorted(listed)
+    
+    search = lambda url: json.loads(client.get(url, headers=auth_headers).data)['count']
+    assert search('/api/bookings/search?q=Vikram') == 0
+    assert search('/api/bookings/search?q=Vikram&include_archived=true') == 1
+    
+    # Stats still count archived bookings; delta sync clients drop them
+    assert json.loads(client.get('/api/bookings/stats', headers=auth_headers).data) == stats
+    changes = json.loads(client.get(f'/api/bookings/changes?since={sync_token}', headers=auth_headers).data)
+    assert set(changes['deleted']) == archived_ids
+    assert app.test_cli_runner().invoke(args=['reconcile-booking-counters']).exit_code == 0
+
+
+def test_archived_booking_ids_are_never_reused(app, client, auth_headers):
+    """Test that a booking created after archival and a hard delete gets a new id."""
+    from app.booking.archive_service import BookingArchiveService
+    
+    newest = db.session.query(db.func.max(Booking.id)).scalar()
+    client.put(f'/api/bookings/{newest - 1}', json={'status': 'cancelled'}, headers=auth_headers)
+    db.session.get(Booking, newest - 1).updated_at = datetime.utcnow() - timedelta(days=120)
+    db.session.commit()
+    assert BookingArchiveService.archive({'cancelled': 90}) == 1
+    assert client.delete(f'/api/bookings/{newest}/hard-delete', headers=auth_headers).status_code == 200
+    
+    response = client.post('/api/bookings/', json=_bulk_row('Ira Fresh'), headers=auth_headers)
+    assert response.status_code == 201
+    assert json.loads(response.data)['booking']['id'] == newest + 1
+    
+    data = json.loads(client.get('/api/bookings/?per_page=100&include_archived=true',
+                                 headers=auth_headers).data)
+    assert sorted(booking['id'] for booking in data['bookings']) == list(range(1, newest)) + [newest + 1]
+
+
+def test_token_checks_use_cached_user_status(app, client, auth_headers):
+    """Test that authenticated requests skip the users table until a user's status changes."""
+    from sqlalchemy import event
+    
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    client.get('/api/bookings/stats', headers=auth_headers)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        for _ in range(3):
+            assert client.get('/api/bookings/stats', headers=auth_headers).status_code == 200
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert not [statement for statement in statements if 'FROM users' in statement]
+    
+    # Role changes apply to tokens issued before them
+    response = client.post('/api/auth/demo-login', json={'role': 'sales_person'})
+    sales_headers = {'Authorization': f"Bearer {json.loads(response.data)['data']['token']}"}
+    assert client.get('/api/analytics/kpis', headers=sales_headers).status_code == 403
+    
+    sales = User.query.filter_by(username='sales').first()
+    sales.role = 'admin'
+    db.session.commit()
+    assert client.get('/api/analytics/kpis', headers=sales_headers).status_code == 200
+    
+    # Deactivated users are locked out on their next request
+    User.query.filter_by(username='sales').update({'is_active': False})
+    db.session.commit()
+    response = client.get('/api/bookings/stats', headers=sales_headers)
+    assert response.status_code == 401
+    assert json.loads(response.data)['error'] == 'User not found or inactive'
+
+
+def test_logout_revokes_cached_token(client, auth_headers):
+    """Test that repeat requests reuse the verified token until logout revokes it."""
+    for _ in range(3):
+        assert client.get('/api/bookings/stats', headers=auth_headers).status_code == 200
+    
+    stats = json.loads(client.get('/api/auth/cache-stats', headers=auth_headers).data)['token_cache']
+    assert stats['size'] == 1
+    assert stats['hits'] >= 3 and stats['hit_rate'] > 0.5
+    
+    response = client.post('/api/auth/logout', headers=auth_headers)
+    assert response.status_code == 200
+    
+    response = client.get('/api/bookings/stats', headers=auth_headers)
+    assert response.status_code == 401
+    assert json.loads(response.data)['error'] == 'Token has been revoked'
+    
+    # A new login gets a new token that is accepted
+    response = client.post('/api/auth/demo-login', json={'role': 'admin'})
+    headers = {'Authorization': f"Bearer {json.loads(response.data)['data']['token']}"}
+    assert client.get('/api/bookings/stats', headers=headers).status_code == 200
@@ -0,0 +1,191 @@
+"""Test booking and analytics queries on every database backend.
+
+In-memory SQLite is what the rest of the suite runs on. A SQLite file stands
+in for a server database: it gets the pooled engine options of the
+production configuration and file-backed shared state. Setting
+TEST_DATABASE_URL (e.g. to the Postgres service of docker-compose.yml) adds
+that database to the matrix.
+"""
+import os
+import json
+import pytest
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.config import database_url, engine_options
+from app.models import User, Booking
+from app.analytics.analytics_service import AnalyticsService
+from app.booking.archive_service import BookingArchiveService
+from app.booking.write_hooks import record_booking_write
+
+BACKENDS = ['sqlite-memory', 'sqlite-file'] + (['database-url'] if os.environ.get('TEST_DATABASE_URL') else [])
+
+
+def _database_uri(backend, tmp_path):
+    """Database URI of a backend in the matrix."""
+    if backend == 'sqlite-memory':
+        return 'sqlite:///:memory:'
+    if backend == 'sqlite-file':
+        return f"sqlite:///{tmp_path / 'bookings.db'}"
+    return os.environ['TEST_DATABASE_URL']
+
+
+@pytest.fixture(params=BACKENDS)
+def app(request, tmp_path):
+    """Create test application on one backend of the matrix."""
+    uri = _database_uri(request.param, tmp_path)
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': uri,
+        'SQLALCHEMY_ENGINE_OPTIONS': engine_options(uri),
+        'SHARED_STATE_DIR': str(tmp_path / 'state'),
+        'ANALYTICS_CACHE_ENABLED': False
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """Create test client."""
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Get authentication headers for testing."""
+    response = client.post('/api/auth/demo-login', json={'role': 'admin'})
+    
+    assert response.status_code == 200
+    token = json.loads(response.data)['data']['token']
+    
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_database_url_and_pool_options(monkeypatch):
+    """Test that DATABASE_URL and the pool settings come from the environment."""
+    monkeypatch.setenv('DATABASE_URL', 'postgres://booking:secret@db:5432/realty_booking')
+    monkeypatch.setenv('DB_POOL_SIZE', '12')
+    monkeypatch.setenv('DB_POOL_PRE_PING', 'false')
+    
+    url = database_url('sqlite:///:memory:')
+    assert url == 'postgresql://booking:secret@db:5432/realty_booking'
+    assert engine_options(url) == {
+        'pool_size': 12, 'max_overflow': 10, 'pool_pre_ping': False, 'pool_recycle': 1800
+    }
+    
+    monkeypatch.delenv('DATABASE_URL')
+    assert database_url('sqlite:///:memory:') == 'sqlite:///:memory:'
+    assert engine_options('sqlite:///:memory:') == {}
+
+
+def test_pooled_engine(app):
+    """Test that file and server databases get the configured connection pool."""
+    options = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+    if not options:
+        pytest.skip('in-memory SQLite shares a single connection')
+    
+    assert db.engine.pool.size() == options['pool_size']
+    assert db.engine.pool._pre_ping is True
+
+
+def test_analytics_and_lists_on_backend(app, client, auth_headers):
+    """Test that analytics, archival and list queries agree with the rows on every backend."""
+    admin = User.query.filter_by(username='admin').first()
+    now = datetime.utcnow()
+    for index, (days_ago, status, amount) in enumerate([
+        (40, 'complete', 3900000.55), (70, 'cancelled', 2750000.10),
+        (130, 'active', 6100000.99), (400, 'complete', 4200000.0)
+    ]):
+        booking = Booking(
+            customer_name=f'Backend Buyer {index}',
+            contact_number='9876500000',
+            project_name='Green Valley',
+            type='2BHK',
+            area=1000.0 + index,
+            agreement_cost=amount + 100000,
+            amount=amount,
+            tax_gst=round(amount * 0.05, 2),
+            status=status,
+            timeline=now + timedelta(days=30),
+            created_at=now - timedelta(days=days_ago),
+            created_by=admin.id
+        )
+        db.session.add(booking)
+        record_booking_write(None, booking)
+    db.session.commit()
+    
+    bookings = Booking.query.all()
+    revenue = sum(float(b.amount) for b in bookings if b.status in ('active', 'complete'))
+    
+    kpis = AnalyticsService.get_kpi_summary()
+    assert kpis['total_bookings'] == len(bookings)
+    assert kpis['total_revenue'] == pytest.approx(revenue)
+    
+    # Month keys are plain ints whatever EXTRACT returns on the backend
+    start = now - timedelta(days=500)
+    trends = AnalyticsService.get_monthly_trends(start, now)
+    assert all(type(point['year']) is int and type(point['month']) is int for point in trends)
+    assert sum(point['booking_count'] for point in trends) == len(bookings)
+    by_month = {}
+    for b in bookings:
+        key = (b.created_at.year, b.created_at.month)
+        by_month[key] = by_month.get(key, 0) + 1
+    assert {(p['year'], p['month']): p['booking_count'] for p in trends} == by_month
+    
+    quarters = AnalyticsService.get_revenue_trends(start, now, group_by='quarter')
+    assert sum(point['booking_count'] for point in quarters) == len(bookings)
+    
+    dashboard = AnalyticsService.get_dashboard_data(start, now)
+    assert dashboard['kpis'] == AnalyticsService.get_kpi_summary(start, now)
+    
+    # Archived bookings are unioned back into analytics and, on request, into lists
+    archived = BookingArchiveService.archive({'cancelled': 0, 'complete': 0},
+                                             now=datetime.utcnow() + timedelta(seconds=1))
+    assert archived > 0
+    assert AnalyticsService.get_kpi_summary() == kpis
+    assert AnalyticsService.get_monthly_trends(start, now) == trends
+    
+    data = json.loads(client.get('/api/bookings/?per_page=100&include_archived=true&sort_by=amount',
+                                 headers=auth_headers).data)
+    assert data['pagination']['total'] == len(bookings)
+    page = json.loads(client.get('/api/bookings/?pagination=cursor&per_page=2&sort_by=amount'
+                                 '&include_archived=true', headers=auth_headers).data)
+    assert page['pagination']['has_next'] is True
+    
+    stats = json.loads(client.get('/api/bookings/stats', headers=auth_headers).data)
+    assert stats['total_bookings'] == len(bookings)
+    assert stats['total_revenue'] == pytest.approx(revenue)
+
+
+def test_change_log_ids_follow_commit_order(app, request):
+    """Test that a change log writer waits for an open one, so sync tokens never skip a change."""
+    import threading
+    from app.booking.sync_service import BookingSyncService
+    from app.models import BookingChange
+    
+    if 'sqlite-memory' in request.node.callspec.id:
+        pytest.skip('one shared connection, no concurrent writers')
+    
+    BookingSyncService.record_changes([(None, {'id': 9001})])
+    db.session.flush()
+    
+    committed = threading.Event()
+    
+    def second_writer():
+        with app.app_context():
+            BookingSyncService.record_changes([(None, {'id': 9002})])
+            db.session.commit()
+            committed.set()
+    
+    writer = threading.Thread(target=second_writer)
+    writer.start()
+    assert not committed.wait(0.5)
+    
+    db.session.commit()
+    writer.join(10)
+    assert committed.is_set()
+    
+    entries = db.session.query(BookingChange.booking_id).order_by(BookingChange.id).all()
+    assert [entry.booking_id for entry in entries][-2:] == [9001, 9002]
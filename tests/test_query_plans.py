@@ -0,0 +1,128 @@
+"""Query-plan regression tests for booking hot paths.
+
+Every SELECT that AnalyticsService and GET /api/bookings emit for their
+typical, date-bounded requests is run through EXPLAIN QUERY PLAN, and the
+test fails if SQLite would read any table without an index.
+"""
+import pytest
+import json
+import re
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import create_app, db
+from app.analytics.analytics_service import AnalyticsService
+
+
+@pytest.fixture
+def app():
+    """Create test application."""
+    app = create_app('testing')
+    app.config['ANALYTICS_CACHE_ENABLED'] = False
+    app.config['ANALYTICS_ENGINE'] = 'sql'
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """Create test client."""
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Get authentication headers for testing."""
+    # Login as admin user
+    response = client.post('/api/auth/demo-login',
+                          json={'role': 'admin'})
+    
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    token = data['data']['token']
+    
+    return {'Authorization': f'Bearer {token}'}
+
+
+def _capture_selects(action):
+    """Run action and return the SELECT statements it executed, with parameters."""
+    statements = []
+    
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            statements.append((statement, parameters))
+    
+    event.listen(db.engine, 'before_cursor_execute', record_statement)
+    try:
+        action()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record_statement)
+    
+    assert statements
+    return statements
+
+
+def _full_table_scans(statements):
+    """Return (statement, plan step) pairs where a table is scanned without an index."""
+    tables = set(db.metadata.tables)
+    scans = []
+    for statement, parameters in statements:
+        plan = db.session.connection().exec_driver_sql(
+            f'EXPLAIN QUERY PLAN {statement}', parameters
+        ).all()
+        for step in plan:
+            match = re.match(r'SCAN (\w+)$', step[3])
+            if match and match.group(1) in tables:
+                scans.append((statement, step[3]))
+    return scans
+
+
+def test_analytics_queries_use_indexes(app):
+    """Test that date-bounded analytics queries never scan a whole table."""
+    end_date = datetime.utcnow()
+    start_date = end_date - timedelta(days=30)
+    trend_start = end_date - timedelta(days=400)
+    
+    for filters in [{}, {'status': ['active', 'complete']}, {'project_name': 'green'}]:
+        def run_analytics():
+            AnalyticsService.get_kpi_summary(start_date, end_date, filters)
+            AnalyticsService.get_project_distribution(start_date, end_date, filters)
+            AnalyticsService.get_status_distribution(start_date, end_date, filters)
+            AnalyticsService.get_property_type_analysis(start_date, end_date, filters)
+            AnalyticsService.get_monthly_trends(trend_start, end_date, filters)
+            AnalyticsService.get_revenue_trends(trend_start, end_date, filters, 'quarter')
+            AnalyticsService.get_dashboard_data(start_date, end_date, filters)
+        
+        assert _full_table_scans(_capture_selects(run_analytics)) == []
+
+
+def test_booking_list_queries_use_indexes(client, auth_headers):
+    """Test that booking list sorting and filtering never scan a whole table."""
+    end_date = datetime.utcnow()
+    start_date = (end_date - timedelta(days=30)).isoformat()
+    
+    queries = [
+        {},
+        {'status': 'active'},
+        {'start_date': start_date},
+        {'status': 'complete', 'start_date': start_date, 'end_date': end_date.isoformat()}
+    ]
+    for sort_by in ['created_at', 'updated_at', 'customer_name', 'project_name',
+                    'amount', 'timeline', 'status']:
+        for sort_order in ['asc', 'desc']:
+            queries.append({'sort_by': sort_by, 'sort_order': sort_order})
+            
+            # Keyset pages after the first must cost the same as the first
+            first_page = client.get('/api/bookings/', query_string={
+                'pagination': 'cursor', 'per_page': 2, 'sort_by': sort_by, 'sort_order': sort_order
+            }, headers=auth_headers)
+            queries.append({'sort_by': sort_by, 'sort_order': sort_order, 'per_page': 2,
+                            'after': json.loads(first_page.data)['pagination']['next_cursor']})
+    
+    for params in queries:
+        def list_bookings():
+            response = client.get('/api/bookings/', query_string=params, headers=auth_headers)
+            assert response.status_code == 200
+        
+        assert _full_table_scans(_capture_selects(list_bookings)) == []